@@ -1,7 +1,6 @@
 import time
 from uuid import UUID
 
-import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -24,8 +23,6 @@ from app.schemas.content import (
 from app.services.ai_service import AIService
 from app.services.content_service import ContentService
 
-logger = structlog.get_logger()
-
 router = APIRouter()
 
 
@@ -71,47 +68,37 @@ async def generate_content(
     # Generate content via AI service
     ai_service = AIService()
 
-    generated_items = []
-    for _i in range(request.variants):
-        # Re-check credits with row lock to serialize concurrent requests
-        remaining = await content_service.get_remaining_credits(user.tenant_id, lock=True)
-        if remaining < 1:
-            if not generated_items:
-                raise HTTPException(
-                    status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                    detail="Insufficient credits. 0 remaining.",
-                )
-            break
-
-        start = time.time()
-        try:
-            result = await ai_service.generate(
-                listing=listing,
-                content_type=request.content_type,
-                tone=request.tone,
-                brand_profile_id=(
-                    str(request.brand_profile_id)
-                    if request.brand_profile_id
-                    else None
-                ),
-                instructions=request.instructions,
-                event_details=request.event_details or "",
-                tenant_id=str(user.tenant_id),
-                db=db,
-            )
-        except Exception:
-            logger.warning(
-                "variant_generation_failed",
-                content_type=request.content_type,
-                variant=len(generated_items) + 1,
-                exc_info=True,
-            )
-            if not generated_items:
-                raise
-            break
+    # Re-check credits with row lock to serialize concurrent requests; the
+    # lock is held until commit, so every variant generated here is covered
+    remaining = await content_service.get_remaining_credits(user.tenant_id, lock=True)
+    variant_count = min(request.variants, remaining)
+    if variant_count < 1:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Insufficient credits. 0 remaining.",
+        )
 
-        generation_time_ms = int((time.time() - start) * 1000)
+    # Variants share one prompt and are generated concurrently
+    start = time.time()
+    results = await ai_service.generate_variants(
+        listing=listing,
+        content_type=request.content_type,
+        tone=request.tone,
+        brand_profile_id=(
+            str(request.brand_profile_id)
+            if request.brand_profile_id
+            else None
+        ),
+        instructions=request.instructions,
+        event_details=request.event_details or "",
+        tenant_id=str(user.tenant_id),
+        db=db,
+        count=variant_count,
+    )
+    generation_time_ms = int((time.time() - start) * 1000)
 
+    generated_items = []
+    for result in results:
         content_item = await content_service.create(
             tenant_id=user.tenant_id,
             listing_id=listing.id,
@@ -127,7 +114,7 @@ async def generate_content(
             generation_time_ms=generation_time_ms,
         )
 
-        # Track usage immediately per-variant so credits are consumed atomically
+        # Track usage per variant so only delivered content consumes credits
         await content_service.track_usage(
             tenant_id=user.tenant_id,
             user_id=user.id,
@@ -141,7 +128,8 @@ async def generate_content(
         content=[ContentResponse.model_validate(c) for c in generated_items],
         usage={
             "credits_consumed": len(generated_items),
-            "credits_remaining": await content_service.get_remaining_credits(user.tenant_id),
+            # The usage counter only moves once this request commits
+            "credits_remaining": remaining - len(generated_items),
         },
     )
 
@@ -326,11 +314,9 @@ async def export_content(
                 branding_settings = bp.settings
         if not branding_settings:
             tenant_result = await db.execute(
-                select(Tenant).where(Tenant.id == user.tenant_id)
+                select(Tenant.settings).where(Tenant.id == user.tenant_id)
             )
-            tenant = tenant_result.scalar_one_or_none()
-            if tenant and tenant.settings:
-                branding_settings = tenant.settings
+            branding_settings = tenant_result.scalar_one_or_none()
 
     export_service = ExportService()
     try:
@@ -14,6 +14,8 @@ from app.schemas.lead import (
     LeadActivityCreate,
     LeadActivityResponse,
     LeadAnalyticsSummary,
+    LeadBulkStatusResponse,
+    LeadBulkStatusUpdate,
     LeadDetailResponse,
     LeadFunnelResponse,
     LeadFunnelStep,
@@ -37,41 +39,44 @@ async def list_leads(
     pipeline_status: str | None = None,
     utm_source: str | None = None,
     agent_id: UUID | None = None,
-    page: int = Query(1, ge=1, le=10000),
+    cursor: str | None = Query(None, max_length=200),
+    page: int = Query(1, ge=1, le=10000, deprecated=True),
     page_size: int = Query(20, ge=1, le=100),
+    include_total: bool | None = None,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_tenant_db),
 ):
-    """List leads with filtering and pagination."""
-    service = LeadService(db)
-    leads, total = await service.list_leads(
-        tenant_id=user.tenant_id,
-        agent_id=agent_id,
-        pipeline_status=pipeline_status,
-        utm_source=utm_source,
-        page=page,
-        page_size=page_size,
-        user_role=user.role,
-        current_user_id=user.id,
-    )
+    """List leads with filtering and pagination.
 
-    # Batch-fetch agent names
-    agent_ids = {lead.agent_id for lead in leads if lead.agent_id}
-    agent_names = {}
-    if agent_ids:
-        result = await db.execute(
-            select(User.id, User.full_name).where(User.id.in_(agent_ids))
+    Pass ``next_cursor`` back as ``cursor`` to fetch the following page; the
+    ``page`` parameter is kept for existing clients.
+    """
+    service = LeadService(db)
+    try:
+        leads, total, next_cursor = await service.list_leads(
+            tenant_id=user.tenant_id,
+            agent_id=agent_id,
+            pipeline_status=pipeline_status,
+            utm_source=utm_source,
+            cursor=cursor,
+            page=page,
+            page_size=page_size,
+            include_total=include_total,
+            user_role=user.role,
+            current_user_id=user.id,
         )
-        agent_names = {row[0]: row[1] for row in result.all()}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
     return LeadListResponse(
         leads=[
-            _lead_to_response(lead, agent_names.get(lead.agent_id))
+            _lead_to_response(lead, lead.agent.full_name if lead.agent else None)
             for lead in leads
         ],
         total=total,
         page=page,
         page_size=page_size,
+        next_cursor=next_cursor,
     )
 
 
@@ -198,6 +203,28 @@ async def update_lead(
     return _lead_to_response(lead)
 
 
+@router.post("/bulk-status", response_model=LeadBulkStatusResponse)
+async def bulk_update_status(
+    payload: LeadBulkStatusUpdate,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_tenant_db),
+):
+    """Move many leads to one pipeline status.
+
+    Leads outside the tenant (or, for agents, not their own) and leads
+    already in that status are skipped; the response lists those moved.
+    """
+    service = LeadService(db)
+    try:
+        updated = await service.bulk_transition(
+            user, payload.lead_ids, payload.pipeline_status,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return LeadBulkStatusResponse(updated=updated)
+
+
 @router.delete("/{lead_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_lead(
     lead_id: UUID,
@@ -39,6 +39,8 @@ MAGIC_BYTES = {
     "image/webp": [b"RIFF"],  # Full check includes WEBP at offset 8
     "application/pdf": [b"%PDF"],
 }
+# Bytes of file header needed to check every signature (WebP reads up to 12)
+MAGIC_HEADER_SIZE = 12
 
 
 def _validate_magic_bytes(content_type: str, data: bytes) -> bool:
@@ -59,12 +61,13 @@ async def upload_media(
     file: UploadFile = File(...),
     user: User = Depends(get_current_user),
 ):
-    # Read file contents
-    contents = await file.read()
-
-    # Check file size
+    # Check file size. The multipart parser has already spooled the upload,
+    # so the size is known without reading it into memory.
     max_size = get_settings().max_upload_file_size
-    if len(contents) > max_size:
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, 2)
+    if size > max_size:
         max_mb = max_size // (1024 * 1024)
         raise HTTPException(
             status_code=400, detail=f"File too large. Maximum size is {max_mb}MB."
@@ -80,7 +83,10 @@ async def upload_media(
         )
 
     # Validate magic bytes
-    if not _validate_magic_bytes(content_type, contents):
+    await file.seek(0)
+    header = await file.read(MAGIC_HEADER_SIZE)
+    await file.seek(0)
+    if not _validate_magic_bytes(content_type, header):
         raise HTTPException(status_code=400, detail="File content does not match declared type.")
 
     # Generate safe filename (no user input in path)
@@ -89,7 +95,7 @@ async def upload_media(
     media_service = MediaService()
     try:
         result = await media_service.upload_validated(
-            contents=contents,
+            contents=file.file,
             filename=safe_filename,
             content_type=content_type,
             tenant_id=str(user.tenant_id),
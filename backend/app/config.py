@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 _VALID_LOG_LEVELS = {"debug", "info", "warning", "error", "critical"}
 _VALID_ENVS = {"development", "testing", "staging", "production"}
 _VALID_JWT_ALGORITHMS = {"HS256", "HS384", "HS512"}
+_VALID_PDF_ENGINES = {"weasyprint", "fpdf"}
 
 
 class Settings(BaseSettings):
@@ -37,6 +38,7 @@ class Settings(BaseSettings):
     anthropic_api_key: str = ""
     claude_model_default: str = "claude-sonnet-4-5-20250929"
     claude_model_short: str = "claude-haiku-4-5-20251001"
+    ai_concurrency: int = 8  # concurrent generations per batch task (provider rate limits)
 
     # JWT
     jwt_secret_key: str = ""
@@ -61,6 +63,8 @@ class Settings(BaseSettings):
     s3_secret_key: str = ""
     s3_bucket_name: str = "listingai-media"
     s3_region: str = "us-east-1"
+    s3_transfer_workers: int = 8  # concurrent S3 uploads/listings per process
+    s3_max_pool_connections: int = 50  # HTTP connections shared by all S3 calls
 
     # SendGrid (email delivery)
     sendgrid_api_key: str = ""
@@ -77,6 +81,10 @@ class Settings(BaseSettings):
     max_upload_file_size: int = 10 * 1024 * 1024  # 10 MB
     database_pool_size: int = 20
     database_max_overflow: int = 10
+    export_render_workers: int = 0  # PDF/flyer render processes; 0 = one per CPU
+    # Content PDF renderer: "weasyprint" (full HTML/CSS layout) or "fpdf" (fast
+    # title + text layout; core fonts, so non-Latin-1 characters are replaced)
+    export_pdf_engine: str = "weasyprint"
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
 
@@ -155,6 +163,41 @@ class Settings(BaseSettings):
             raise ValueError(f"Pool size must be >= 1, got {v}")
         return v
 
+    @field_validator("ai_concurrency")
+    @classmethod
+    def check_ai_concurrency(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError(f"ai_concurrency must be >= 1, got {v}")
+        return v
+
+    @field_validator("export_render_workers")
+    @classmethod
+    def check_export_render_workers(cls, v: int) -> int:
+        if v < 0:
+            raise ValueError(f"export_render_workers must be >= 0, got {v}")
+        return v
+
+    @field_validator("s3_transfer_workers")
+    @classmethod
+    def check_s3_transfer_workers(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError(f"s3_transfer_workers must be >= 1, got {v}")
+        return v
+
+    @field_validator("s3_max_pool_connections")
+    @classmethod
+    def check_s3_max_pool_connections(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError(f"s3_max_pool_connections must be >= 1, got {v}")
+        return v
+
+    @field_validator("export_pdf_engine")
+    @classmethod
+    def check_export_pdf_engine(cls, v: str) -> str:
+        if v not in _VALID_PDF_ENGINES:
+            raise ValueError(f"export_pdf_engine must be one of {_VALID_PDF_ENGINES}, got '{v}'")
+        return v
+
     @field_validator("mls_sync_interval_minutes")
     @classmethod
     def check_sync_interval(cls, v: int) -> int:
@@ -4,11 +4,19 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
 
 from app.config import get_settings
 
 settings = get_settings()
 
+_connect_args = {
+    "server_settings": {"statement_timeout": "30000"},
+    "timeout": 10,
+}
+
+# Request traffic: create_async_engine defaults to AsyncAdaptedQueuePool, so
+# connections stay open between requests within the configured bounds.
 engine = create_async_engine(
     settings.database_url,
     echo=settings.app_debug,
@@ -17,10 +25,7 @@ engine = create_async_engine(
     pool_pre_ping=True,
     pool_recycle=1800,
     pool_timeout=30,
-    connect_args={
-        "server_settings": {"statement_timeout": "30000"},
-        "timeout": 10,
-    },
+    connect_args=_connect_args,
 )
 
 async_session_factory = async_sessionmaker(
@@ -29,6 +34,23 @@ async_session_factory = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Celery tasks: each job runs in its own event loop via asyncio.run(), and an
+# asyncpg connection can't be reused from another loop, so pooling would only
+# hand the next task a dead connection. Workers also stay off the request
+# pool's budget, so a long MLS sync can't starve API requests.
+worker_engine = create_async_engine(
+    settings.database_url,
+    echo=settings.app_debug,
+    poolclass=NullPool,
+    connect_args=_connect_args,
+)
+
+worker_session_factory = async_sessionmaker(
+    worker_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 class Base(DeclarativeBase):
     pass
@@ -0,0 +1,44 @@
+import asyncio
+
+import httpx
+
+
+class SharedHttpClient:
+    """A pooled httpx client shared by one service's outbound calls.
+
+    Reusing it keeps TCP/TLS connections alive across requests instead of
+    paying a handshake per call. The client is bound to the event loop that
+    created it: Celery tasks run each job in a new loop via asyncio.run(), so
+    a client from a previous loop is replaced, not reused.
+    """
+
+    def __init__(self, *, timeout: httpx.Timeout, limits: httpx.Limits):
+        self._timeout = timeout
+        self._limits = limits
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        _shared_clients.append(self)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the client for the running loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits)
+            self._loop = loop
+        return self._client
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+_shared_clients: list[SharedHttpClient] = []
+
+
+async def close_http_clients():
+    """Close every shared HTTP client (called on app shutdown)."""
+    for shared in _shared_clients:
+        await shared.close()
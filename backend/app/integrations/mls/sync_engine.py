@@ -50,6 +50,7 @@ class SyncEngine:
                 if not records:
                     break
 
+                batch = []
                 for record in records:
                     stats["total"] += 1
                     try:
@@ -64,19 +65,9 @@ class SyncEngine:
                             ]
                             normalized["photos"] = photos
 
-                        listing, is_new = await self.listing_service.upsert_from_mls(
-                            tenant_id=connection.tenant_id,
-                            mls_connection_id=connection.id,
-                            mls_data=normalized,
-                        )
-
-                        if is_new:
-                            stats["created"] += 1
-                            new_listing_ids.append(str(listing.id))
-                        else:
-                            stats["updated"] += 1
-
-                        # Track latest timestamp (parse to datetime for safe comparison)
+                        # Track latest timestamp (parse to datetime for safe comparison).
+                        # A failed page write counts as errors below, which holds
+                        # the watermark back regardless.
                         mod_ts = record.get("ModificationTimestamp")
                         if mod_ts:
                             mod_dt = datetime.fromisoformat(mod_ts.replace("Z", "+00:00"))
@@ -89,6 +80,8 @@ class SyncEngine:
                             else:
                                 latest_timestamp = mod_ts
 
+                        batch.append(normalized)
+
                     except Exception as e:
                         stats["errors"] += 1
                         await logger.aerror(
@@ -97,6 +90,30 @@ class SyncEngine:
                             error=str(e),
                         )
 
+                # One multi-row upsert per page instead of a round trip per record
+                if batch:
+                    try:
+                        written = await self.listing_service.bulk_upsert_from_mls(
+                            tenant_id=connection.tenant_id,
+                            mls_connection_id=connection.id,
+                            rows=batch,
+                        )
+                    except Exception as e:
+                        stats["errors"] += len(batch)
+                        await logger.aerror(
+                            "sync_batch_error",
+                            connection_id=str(connection.id),
+                            records=len(batch),
+                            error=str(e),
+                        )
+                    else:
+                        for listing_id, is_new in written:
+                            if is_new:
+                                stats["created"] += 1
+                                new_listing_ids.append(str(listing_id))
+                            else:
+                                stats["updated"] += 1
+
                 skip += page_size
                 pages_fetched += 1
 
@@ -25,11 +25,21 @@ async def lifespan(app: FastAPI):
     # Startup
     get_settings()
     from app.core.database import engine
+    from app.core.http_client import close_http_clients
     from app.core.redis import redis_pool
+    from app.services.ai_service import close_anthropic_client
+    from app.services.export_service import shutdown_render_pool, warm_export_renderers
+    from app.services.media_service import shutdown_s3_pool
 
     await redis_pool.initialize()
+    # Off the event loop so startup is not held up by the imports
+    asyncio.get_running_loop().run_in_executor(None, warm_export_renderers)
     yield
     # Shutdown
+    await close_anthropic_client()
+    await close_http_clients()
+    shutdown_render_pool()
+    shutdown_s3_pool()
     await redis_pool.close()
     await engine.dispose()
 
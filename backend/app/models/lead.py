@@ -1,12 +1,27 @@
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Index, Numeric, String, Text
+from sqlalchemy import (
+    DDL,
+    CheckConstraint,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    Text,
+    event,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 from app.models.base import TenantMixin, TimestampMixin
 
+# Pipeline stages in board order; ck_leads_pipeline_status allows exactly these
+PIPELINE_STATUSES = ("new", "contacted", "showing", "under_contract", "closed", "lost")
+
 
 class Lead(Base, TenantMixin, TimestampMixin):
     __tablename__ = "leads"
@@ -29,9 +44,7 @@ class Lead(Base, TenantMixin, TimestampMixin):
     property_interest = Column(String(500))
 
     # Pipeline
-    pipeline_status = Column(
-        String(20), server_default="new", nullable=False,
-    )  # new, contacted, showing, under_contract, closed, lost
+    pipeline_status = Column(String(20), server_default="new", nullable=False)
 
     # UTM tracking
     utm_source = Column(String(200))
@@ -53,13 +66,66 @@ class Lead(Base, TenantMixin, TimestampMixin):
     # Relationships
     tenant = relationship("Tenant", back_populates="leads")
     agent_page = relationship("AgentPage", back_populates="leads")
+    # Never lazy-loaded: list queries join in the agent's name explicitly, and
+    # any other access should fail loudly rather than issue a query per lead.
+    agent = relationship("User", lazy="raise")
     activities = relationship(
         "LeadActivity", back_populates="lead", cascade="all, delete-orphan",
         order_by="LeadActivity.created_at.desc()",
     )
 
+    # Each list filter gets its own index in list order, so a filtered page is
+    # an index range read at any depth. The unfiltered index carries the
+    # columns get_summary aggregates, letting it scan the tenant index-only.
     __table_args__ = (
-        Index("ix_leads_tenant_agent", "tenant_id", "agent_id"),
-        Index("ix_leads_tenant_status", "tenant_id", "pipeline_status"),
-        Index("ix_leads_tenant_created", "tenant_id", "created_at"),
+        CheckConstraint(
+            "pipeline_status IN ({})".format(",".join(f"'{s}'" for s in PIPELINE_STATUSES)),
+            name="ck_leads_pipeline_status",
+        ),
+        Index(
+            "ix_leads_tenant_agent",
+            "tenant_id", "agent_id", text("created_at DESC"), text("id DESC"),
+            postgresql_where=text("agent_id IS NOT NULL"),
+        ),
+        Index(
+            "ix_leads_tenant_status",
+            "tenant_id", "pipeline_status", text("created_at DESC"), text("id DESC"),
+        ),
+        Index(
+            "ix_leads_tenant_source",
+            "tenant_id", "utm_source", text("created_at DESC"), text("id DESC"),
+            postgresql_where=text("utm_source IS NOT NULL"),
+        ),
+        Index(
+            "ix_leads_tenant_created_id",
+            "tenant_id", text("created_at DESC"), text("id DESC"),
+            postgresql_include=["agent_id", "pipeline_status", "utm_source", "closed_value"],
+        ),
     )
+
+
+# closed_at is stamped server-side too, so set-based updates follow the same
+# rule as the ORM path. Migration m3n4o5p6q7r8 creates this in deployed
+# databases; these hooks give schemas built with create_all the same trigger.
+_CLOSED_AT_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION leads_set_closed_at() RETURNS trigger AS $$
+BEGIN
+    IF NEW.pipeline_status = 'closed'
+            AND OLD.pipeline_status IS DISTINCT FROM 'closed' THEN
+        NEW.closed_at := now();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""")
+_CLOSED_AT_TRIGGER = DDL(
+    "CREATE TRIGGER trg_leads_closed_at "
+    "BEFORE UPDATE OF pipeline_status ON leads "
+    "FOR EACH ROW EXECUTE FUNCTION leads_set_closed_at()"
+)
+event.listen(
+    Lead.__table__, "after_create", _CLOSED_AT_FUNCTION.execute_if(dialect="postgresql"),
+)
+event.listen(
+    Lead.__table__, "after_create", _CLOSED_AT_TRIGGER.execute_if(dialect="postgresql"),
+)
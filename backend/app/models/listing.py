@@ -1,6 +1,17 @@
 import uuid
 
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -50,3 +61,11 @@ class Listing(Base, TenantMixin, TimestampMixin):
     tenant = relationship("Tenant", back_populates="listings")
     content = relationship("Content", back_populates="listing")
     mls_connection = relationship("MLSConnection", back_populates="listings")
+
+    __table_args__ = (
+        # Created in a1b2c3d4e5f6; the MLS upsert's ON CONFLICT targets it
+        Index(
+            "ix_listings_tenant_mls_id", "tenant_id", "mls_listing_id",
+            unique=True, postgresql_where=text("mls_listing_id IS NOT NULL"),
+        ),
+    )
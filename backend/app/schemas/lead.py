@@ -57,6 +57,15 @@ class LeadUpdate(BaseModel):
     property_interest: str | None = Field(default=None, max_length=500)
 
 
+class LeadBulkStatusUpdate(BaseModel):
+    lead_ids: list[UUID] = Field(..., min_length=1, max_length=500)
+    pipeline_status: str = Field(..., max_length=20)
+
+
+class LeadBulkStatusResponse(BaseModel):
+    updated: list[UUID]
+
+
 class LeadActivityCreate(BaseModel):
     activity_type: str = Field(..., max_length=30)
     note: str | None = Field(default=None, max_length=5000)
@@ -99,9 +108,10 @@ class LeadResponse(BaseModel):
 
 class LeadListResponse(BaseModel):
     leads: list[LeadResponse]
-    total: int
+    total: int | None
     page: int
     page_size: int
+    next_cursor: str | None = None
 
 
 class LeadActivityResponse(BaseModel):
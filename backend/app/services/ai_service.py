@@ -1,5 +1,8 @@
+import asyncio
 import re
+import threading
 import time
+from collections import deque
 from uuid import UUID
 
 import anthropic
@@ -13,7 +16,7 @@ from app.config import get_settings
 from app.models.brand_profile import BrandProfile
 from app.models.listing import Listing
 from app.models.tenant import Tenant
-from app.services.prompt_builder import PromptBuilder
+from app.services.prompt_builder import PromptBuilder, split_batch_response
 
 logger = structlog.get_logger()
 
@@ -24,25 +27,20 @@ CIRCUIT_BREAKER_STATE = Gauge(
 )
 _STATE_MAP = {"closed": 0, "open": 1, "half_open": 2}
 
-# Content types that use the short (cheaper/faster) model
-_SHORT_MODEL_TYPES = {"social_x"}
-
-
-def _build_model_map(default: str, short: str) -> dict[str, str]:
-    """Build content-type → model mapping from configured model IDs."""
-    types = [
-        "listing_description", "social_instagram", "social_facebook",
-        "social_linkedin", "social_x", "email_just_listed", "email_open_house",
-        "email_drip", "flyer", "video_script",
-        "open_house_invite", "price_reduction", "just_sold",
-    ]
-    return {t: short if t in _SHORT_MODEL_TYPES else default for t in types}
+# Content types that use the short (cheaper/faster) model; every other type
+# falls through to the default model.
+_SHORT_MODEL_TYPES = frozenset({"social_x"})
 
 # --- Circuit Breaker ---
-# Simple in-process circuit breaker. Opens after FAILURE_THRESHOLD consecutive
-# failures and stays open for RECOVERY_TIMEOUT seconds before allowing a probe.
-
-FAILURE_THRESHOLD = 5
+# Simple in-process circuit breaker. Tracks the outcomes of the last
+# WINDOW_SIZE calls and opens once at least MIN_CALLS have been seen and the
+# failure rate reaches FAILURE_RATE_THRESHOLD, so an intermittently failing
+# API trips it even when successes are interleaved. Stays open for
+# RECOVERY_TIMEOUT seconds before allowing a probe.
+
+WINDOW_SIZE = 20
+MIN_CALLS = 10
+FAILURE_RATE_THRESHOLD = 0.5
 RECOVERY_TIMEOUT = 60  # seconds
 
 
@@ -53,51 +51,210 @@ class CircuitBreakerOpenError(Exception):
         super().__init__("AI service temporarily unavailable. Please try again shortly.")
 
 
+class _Permit:
+    """Admission handed out by ``allow_request``; passed back with the outcome."""
+
+    __slots__ = ("probe",)
+
+    def __init__(self, probe: bool):
+        self.probe = probe
+
+
+# Every call admitted while the breaker is closed shares one permit
+_CLOSED_PERMIT = _Permit(probe=False)
+
+
 class _CircuitBreaker:
-    def __init__(self, threshold: int = FAILURE_THRESHOLD, recovery: int = RECOVERY_TIMEOUT):
-        self._threshold = threshold
+    """Breaker shared by every request in the process.
+
+    State transitions happen under a lock so that when the recovery window
+    elapses exactly one caller wins the half-open probe slot instead of a
+    burst of probes hitting an API that is still recovering. The slot is the
+    probe's own permit: only its holder can free it, and only its outcome
+    closes or reopens the breaker, so a call admitted before the breaker
+    opened cannot finish late and let a second probe through. The critical
+    sections never await, so a plain thread lock suffices and stays valid
+    across the per-task event loops Celery workers create.
+    """
+
+    def __init__(
+        self,
+        window_size: int = WINDOW_SIZE,
+        min_calls: int = MIN_CALLS,
+        failure_rate: float = FAILURE_RATE_THRESHOLD,
+        recovery: float = RECOVERY_TIMEOUT,
+    ):
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
         self._recovery = recovery
+        # Ring of recent outcomes (True = success) plus a running failure tally
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
         self._failure_count = 0
         self._last_failure_time: float = 0
         self._state = "closed"  # closed | open | half_open
+        self._probe: _Permit | None = None
+        self._recovery_timer: asyncio.TimerHandle | None = None
+        self._lock = threading.Lock()
 
     def _set_state(self, state: str) -> None:
         self._state = state
         CIRCUIT_BREAKER_STATE.set(_STATE_MAP.get(state, 0))
 
-    def record_success(self) -> None:
+    def _schedule_half_open(self) -> None:
+        """(Re)arm the open -> half_open timer. Caller holds the lock.
+
+        Moving state forward on a timer keeps the exported gauge accurate when
+        traffic is sparse. Without a running loop (sync callers) or once the
+        loop is gone, allow_request still makes the transition lazily.
+        """
+        self._cancel_recovery_timer()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._recovery_timer = loop.call_later(self._recovery, self._on_recovery_elapsed)
+
+    def _cancel_recovery_timer(self) -> None:
+        if self._recovery_timer is not None:
+            self._recovery_timer.cancel()
+            self._recovery_timer = None
+
+    def _on_recovery_elapsed(self) -> None:
+        with self._lock:
+            self._recovery_timer = None
+            # CAS: only advance from open; a probe outcome may have closed it already
+            if self._state == "open":
+                self._set_state("half_open")
+
+    def _record(self, success: bool) -> None:
+        outcomes = self._outcomes
+        if len(outcomes) == outcomes.maxlen and not outcomes[0]:
+            self._failure_count -= 1
+        outcomes.append(success)
+        if not success:
+            self._failure_count += 1
+
+    def _reset_window(self) -> None:
+        self._outcomes.clear()
         self._failure_count = 0
-        self._set_state("closed")
 
-    def record_failure(self) -> None:
-        self._failure_count += 1
-        self._last_failure_time = time.monotonic()
-        if self._failure_count >= self._threshold:
+    def record_success(self, permit: _Permit) -> None:
+        with self._lock:
+            if not permit.probe:
+                # A call admitted before the breaker opened says nothing about recovery
+                if self._state == "closed":
+                    self._record(True)
+                return
+            if permit is not self._probe:
+                return
+            # Probe succeeded: start the closed state with a clean window
+            self._probe = None
+            self._cancel_recovery_timer()
+            self._reset_window()
+            self._set_state("closed")
+
+    def record_failure(self, permit: _Permit) -> None:
+        with self._lock:
+            if not permit.probe:
+                if self._state != "closed":
+                    return
+                self._record(False)
+                calls = len(self._outcomes)
+                if calls < self._min_calls or self._failure_count < self._failure_rate * calls:
+                    return
+            elif permit is not self._probe:
+                return
+            self._probe = None
+            self._last_failure_time = time.monotonic()
+            failures, calls = self._failure_count, len(self._outcomes)
             self._set_state("open")
-            logger.warning(
-                "circuit_breaker_opened",
-                failures=self._failure_count,
-                recovery_seconds=self._recovery,
-            )
-
-    def allow_request(self) -> bool:
-        if self._state == "closed":
-            return True
-        if self._state == "half_open":
-            return False  # Only one probe allowed; wait for success/failure result
-        # state == "open"
-        elapsed = time.monotonic() - self._last_failure_time
-        if elapsed >= self._recovery:
-            self._set_state("half_open")
-            return True
-        return False
+            self._schedule_half_open()
+        logger.warning(
+            "circuit_breaker_opened",
+            failures=failures,
+            calls=calls,
+            recovery_seconds=self._recovery,
+        )
 
+    def release_probe(self, permit: _Permit) -> None:
+        """Free the half-open probe slot when the probe ended without an outcome.
+
+        A probe that fails for a reason that says nothing about API health
+        (e.g. a 4xx) must not leave the breaker half-open forever. No-op for
+        any permit but the probe currently holding the slot.
+        """
+        with self._lock:
+            if permit is self._probe:
+                self._probe = None
+
+    def allow_request(self) -> _Permit | None:
+        """Admit a call, returning its permit, or None if the breaker rejects it."""
+        with self._lock:
+            if self._state == "closed":
+                return _CLOSED_PERMIT
+            if self._state == "open":
+                if time.monotonic() - self._last_failure_time < self._recovery:
+                    return None
+                self._set_state("half_open")
+            # half_open: only the caller that takes the single probe slot proceeds
+            if self._probe is not None:
+                return None
+            self._probe = _Permit(probe=True)
+            return self._probe
 
 _circuit = _CircuitBreaker()
 
+# Whitespace-delimited tokens, matching str.split() semantics
+_WORD_RE = re.compile(r"\S+")
+
 # Timeout for the Anthropic HTTP client (connect, read, total)
 _API_TIMEOUT = httpx.Timeout(connect=10.0, read=90.0, write=10.0, pool=10.0)
 
+# Output budget per piece of content. A batched call gets one budget per
+# content type (capped), and a longer read timeout since the whole response
+# arrives at once.
+_MAX_TOKENS = 2048
+_BATCH_MAX_TOKENS = 16384
+_BATCH_API_TIMEOUT = httpx.Timeout(connect=10.0, read=300.0, write=10.0, pool=10.0)
+
+# Shared Anthropic client so every AIService reuses one pooled set of HTTPS
+# connections instead of a fresh client (and TLS handshakes) per request.
+# Bound to the event loop that created it — Celery tasks run each job in a new
+# loop via asyncio.run(), so a client from a previous loop is replaced.
+_anthropic_client: anthropic.AsyncAnthropic | None = None
+_anthropic_client_key: tuple[str, asyncio.AbstractEventLoop | None] | None = None
+
+
+def _get_anthropic_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Return the shared Anthropic client, creating it on first use."""
+    global _anthropic_client, _anthropic_client_key
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    key = (api_key, loop)
+    if (
+        _anthropic_client is None
+        or _anthropic_client.is_closed()
+        or _anthropic_client_key != key
+    ):
+        _anthropic_client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            timeout=_API_TIMEOUT,
+            max_retries=2,
+        )
+        _anthropic_client_key = key
+    return _anthropic_client
+
+
+async def close_anthropic_client() -> None:
+    """Close the shared Anthropic client (called on app shutdown)."""
+    global _anthropic_client, _anthropic_client_key
+    if _anthropic_client is not None and not _anthropic_client.is_closed():
+        await _anthropic_client.close()
+    _anthropic_client = None
+    _anthropic_client_key = None
+
 
 def _scrub_avoid_words(text: str, avoid_words: list[str]) -> str:
     """Remove banned words/phrases that slip through prompt instructions.
@@ -114,18 +271,27 @@ def _scrub_avoid_words(text: str, avoid_words: list[str]) -> str:
     return text
 
 
+def _prompt_tokens(usage) -> int:
+    """All input tokens of a call; input_tokens alone excludes cached prefix reads/writes."""
+    counts = (
+        usage.input_tokens,
+        getattr(usage, "cache_creation_input_tokens", None),
+        getattr(usage, "cache_read_input_tokens", None),
+    )
+    return sum(n for n in counts if isinstance(n, int))
+
+
+def _share(total: int, parts: int, index: int) -> int:
+    """The index-th of `parts` near-equal integer shares of `total`."""
+    return total // parts + (1 if index < total % parts else 0)
+
+
 class AIService:
     def __init__(self):
         settings = get_settings()
-        self.client = anthropic.AsyncAnthropic(
-            api_key=settings.anthropic_api_key,
-            timeout=_API_TIMEOUT,
-            max_retries=2,
-        )
+        self.client = _get_anthropic_client(settings.anthropic_api_key)
         self.prompt_builder = PromptBuilder()
-        self._model_map = _build_model_map(
-            settings.claude_model_default, settings.claude_model_short,
-        )
+        self._model_overrides = dict.fromkeys(_SHORT_MODEL_TYPES, settings.claude_model_short)
         self._default_model = settings.claude_model_default
 
     async def generate(
@@ -139,6 +305,133 @@ class AIService:
         db: AsyncSession,
         event_details: str = "",
     ) -> dict:
+        brand_profile, market_areas = await self._load_context(tenant_id, brand_profile_id, db)
+
+        # Build prompt using three-layer architecture
+        system_prompt, user_prompt = self.prompt_builder.build(
+            listing=listing,
+            content_type=content_type,
+            tone=tone,
+            brand_profile=brand_profile,
+            instructions=instructions,
+            event_details=event_details,
+            market_areas=market_areas,
+        )
+
+        # Select model
+        model = self._model_overrides.get(content_type, self._default_model)
+
+        response = await self._create_message(model, system_prompt, user_prompt)
+        return self._result(response, model, content_type, brand_profile)
+
+    async def generate_variants(
+        self,
+        listing: Listing,
+        content_type: str,
+        tone: str,
+        brand_profile_id: str | None,
+        instructions: str | None,
+        tenant_id: str,
+        db: AsyncSession,
+        count: int,
+        event_details: str = "",
+    ) -> list[dict]:
+        """Generate ``count`` alternative versions of one content type.
+
+        The Messages API has no n= option for several samples of a prompt, so
+        the prompt is built once and the calls run concurrently. Failed calls
+        are logged and left out; if every call fails, the first error is raised.
+        """
+        brand_profile, market_areas = await self._load_context(tenant_id, brand_profile_id, db)
+        system_prompt, user_prompt = self.prompt_builder.build(
+            listing=listing,
+            content_type=content_type,
+            tone=tone,
+            brand_profile=brand_profile,
+            instructions=instructions,
+            event_details=event_details,
+            market_areas=market_areas,
+        )
+        model = self._model_overrides.get(content_type, self._default_model)
+
+        responses = await asyncio.gather(
+            *(self._create_message(model, system_prompt, user_prompt) for _ in range(count)),
+            return_exceptions=True,
+        )
+        results = []
+        errors = []
+        for response in responses:
+            if isinstance(response, Exception):
+                errors.append(response)
+                await logger.awarning(
+                    "variant_generation_failed", content_type=content_type, error=str(response),
+                )
+                continue
+            if isinstance(response, BaseException):
+                raise response
+            results.append(self._result(response, model, content_type, brand_profile))
+        if not results and errors:
+            raise errors[0]
+        return results
+
+    async def generate_batch(
+        self,
+        listing: Listing,
+        content_types: list[str],
+        tone: str,
+        brand_profile_id: str | None,
+        tenant_id: str,
+        db: AsyncSession,
+    ) -> dict[str, dict]:
+        """Generate several content types for one listing in a single API call.
+
+        Returns generate()'s result dict per content type. Types the response
+        has no section for are left out, so callers can retry them one by one
+        with generate(). Token usage is split evenly across the returned
+        types, so per-content figures still add up to the call's usage.
+        """
+        brand_profile, market_areas = await self._load_context(tenant_id, brand_profile_id, db)
+        system_prompt, user_prompt = self.prompt_builder.build_batch(
+            listing=listing,
+            content_types=content_types,
+            tone=tone,
+            brand_profile=brand_profile,
+            market_areas=market_areas,
+        )
+
+        # One model per call: the short model only if every type allows it
+        models = {self._model_overrides.get(t, self._default_model) for t in content_types}
+        model = models.pop() if len(models) == 1 else self._default_model
+
+        response = await self._create_message(
+            model, system_prompt, user_prompt,
+            max_tokens=min(_MAX_TOKENS * len(content_types), _BATCH_MAX_TOKENS),
+            timeout=_BATCH_API_TIMEOUT,
+        )
+        sections = split_batch_response(response.content[0].text, content_types)
+        if len(sections) < len(content_types):
+            await logger.awarning(
+                "claude_batch_sections_missing",
+                missing=[t for t in content_types if t not in sections],
+                model=model,
+            )
+
+        results = {}
+        for i, (content_type, text) in enumerate(sections.items()):
+            body = self._scrub(text, brand_profile)
+            results[content_type] = {
+                "body": body,
+                "metadata": self._extract_metadata(body, content_type),
+                "model": model,
+                "prompt_tokens": _share(_prompt_tokens(response.usage), len(sections), i),
+                "completion_tokens": _share(response.usage.output_tokens, len(sections), i),
+            }
+        return results
+
+    async def _load_context(
+        self, tenant_id: str, brand_profile_id: str | None, db: AsyncSession,
+    ) -> tuple[BrandProfile | None, list[dict] | None]:
+        """Brand profile and market areas that shape the prompt for a tenant."""
         # Load brand profile if specified
         brand_profile = None
         if brand_profile_id:
@@ -162,52 +455,57 @@ class AIService:
         # Load tenant market data (if configured)
         market_areas = None
         tenant_result = await db.execute(
-            select(Tenant).where(Tenant.id == UUID(tenant_id))
+            select(Tenant.settings).where(Tenant.id == UUID(tenant_id))
         )
-        tenant = tenant_result.scalar_one_or_none()
-        if tenant and tenant.settings:
-            market_data = tenant.settings.get("market_data", {})
+        tenant_settings = tenant_result.scalar_one_or_none()
+        if tenant_settings:
+            market_data = tenant_settings.get("market_data", {})
             market_areas = market_data.get("areas") if isinstance(market_data, dict) else None
+        return brand_profile, market_areas
 
-        # Build prompt using three-layer architecture
-        system_prompt, user_prompt = self.prompt_builder.build(
-            listing=listing,
-            content_type=content_type,
-            tone=tone,
-            brand_profile=brand_profile,
-            instructions=instructions,
-            event_details=event_details,
-            market_areas=market_areas,
-        )
-
-        # Select model
-        model = self._model_map.get(content_type, self._default_model)
-
+    async def _create_message(
+        self,
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = _MAX_TOKENS,
+        **options,
+    ):
         # Circuit breaker check
-        if not _circuit.allow_request():
+        permit = _circuit.allow_request()
+        if permit is None:
             raise CircuitBreakerOpenError()
 
         # Call Claude API with timeout and circuit breaker
         try:
             response = await self.client.messages.create(
                 model=model,
-                max_tokens=2048,
-                system=system_prompt,
+                max_tokens=max_tokens,
+                # The system prompt (type rules + tenant brand voice) repeats
+                # across a tenant's listings while the listing data in the user
+                # message varies, so mark it as a cacheable prefix. Prompts
+                # under the model's minimum cacheable length are sent uncached.
+                system=[{
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }],
                 messages=[{"role": "user", "content": user_prompt}],
+                **options,
             )
-            _circuit.record_success()
+            _circuit.record_success(permit)
         except (
             anthropic.APIConnectionError,
             anthropic.APITimeoutError,
             httpx.TimeoutException,
         ) as exc:
-            _circuit.record_failure()
+            _circuit.record_failure(permit)
             await logger.aerror("claude_api_error", error=str(exc), model=model, exc_info=True)
             raise
         except anthropic.APIStatusError as exc:
             # 5xx = transient, count toward circuit breaker; 4xx = caller error, don't
             if exc.status_code >= 500:
-                _circuit.record_failure()
+                _circuit.record_failure(permit)
             await logger.aerror(
                 "claude_api_status_error",
                 status_code=exc.status_code,
@@ -215,32 +513,48 @@ class AIService:
                 model=model,
             )
             raise
+        finally:
+            # No-op once success/failure was recorded; frees a half-open probe otherwise
+            _circuit.release_probe(permit)
+        return response
 
-        body = response.content[0].text
-
-        # Post-generation filtering: scrub avoid_words that slipped through prompts
-        if brand_profile and brand_profile.avoid_words:
-            body = _scrub_avoid_words(body, brand_profile.avoid_words)
-
-        metadata = self._extract_metadata(body, content_type)
-
+    def _result(
+        self, response, model: str, content_type: str, brand_profile: BrandProfile | None,
+    ) -> dict:
+        body = self._scrub(response.content[0].text, brand_profile)
         return {
             "body": body,
-            "metadata": metadata,
+            "metadata": self._extract_metadata(body, content_type),
             "model": model,
-            "prompt_tokens": response.usage.input_tokens,
+            "prompt_tokens": _prompt_tokens(response.usage),
             "completion_tokens": response.usage.output_tokens,
         }
 
+    @staticmethod
+    def _scrub(body: str, brand_profile: BrandProfile | None) -> str:
+        # Post-generation filtering: scrub avoid_words that slipped through prompts
+        if brand_profile and brand_profile.avoid_words:
+            body = _scrub_avoid_words(body, brand_profile.avoid_words)
+        return body
+
     def _extract_metadata(self, body: str, content_type: str) -> dict:
+        # One tokenizing pass yields both the word count and (for social
+        # content) the hashtags, instead of splitting the body twice.
+        is_social = content_type.startswith("social_")
+        word_count = 0
+        hashtags = []
+        for match in _WORD_RE.finditer(body):
+            word_count += 1
+            if is_social and body[match.start()] == "#":
+                hashtags.append(match.group())
+
         metadata = {
-            "word_count": len(body.split()),
+            "word_count": word_count,
             "character_count": len(body),
         }
 
         # Extract hashtags for social media content
-        if content_type.startswith("social_"):
-            hashtags = [word for word in body.split() if word.startswith("#")]
+        if is_social:
             metadata["hashtags"] = hashtags
 
         return metadata
@@ -1,14 +1,14 @@
-from datetime import UTC, datetime
+import asyncio
 from uuid import UUID
 
 import stripe
 import structlog
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.models.tenant import Tenant
-from app.models.usage_event import UsageEvent
+from app.services.content_service import ContentService
 
 logger = structlog.get_logger()
 
@@ -20,38 +20,7 @@ class BillingService:
         stripe.api_key = settings.stripe_secret_key
 
     async def get_current_usage(self, tenant_id: UUID) -> dict:
-        now = datetime.now(UTC)
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        # Get usage counts
-        result = await self.db.execute(
-            select(
-                func.count(UsageEvent.id).label("total_events"),
-                func.coalesce(func.sum(UsageEvent.credits_consumed), 0).label("credits_used"),
-                func.coalesce(func.sum(UsageEvent.tokens_used), 0).label("tokens_used"),
-            ).where(
-                UsageEvent.tenant_id == tenant_id,
-                UsageEvent.created_at >= month_start,
-            )
-        )
-        row = result.one()
-
-        # Get tenant limit
-        tenant_result = await self.db.execute(
-            select(Tenant).where(Tenant.id == tenant_id)
-        )
-        tenant = tenant_result.scalar_one()
-
-        return {
-            "period_start": month_start.isoformat(),
-            "period_end": now.isoformat(),
-            "credits_used": row.credits_used,
-            "credits_limit": tenant.monthly_generation_limit,
-            "credits_remaining": max(0, tenant.monthly_generation_limit - row.credits_used),
-            "tokens_used": row.tokens_used,
-            "total_events": row.total_events,
-            "plan": tenant.plan,
-        }
+        return await ContentService(self.db).get_monthly_usage(tenant_id)
 
     async def create_or_update_subscription(self, tenant_id: UUID, price_id: str) -> dict:
         result = await self.db.execute(select(Tenant).where(Tenant.id == tenant_id))
@@ -60,7 +29,9 @@ class BillingService:
         # Create Stripe customer if needed
         if not tenant.stripe_customer_id:
             try:
-                customer = stripe.Customer.create(
+                # The Stripe SDK call is a blocking HTTPS request; keep it off the loop
+                customer = await asyncio.to_thread(
+                    stripe.Customer.create,
                     metadata={"tenant_id": str(tenant_id), "tenant_name": tenant.name},
                 )
             except stripe.error.StripeError as exc:
@@ -78,7 +49,8 @@ class BillingService:
 
         # Create subscription
         try:
-            subscription = stripe.Subscription.create(
+            subscription = await asyncio.to_thread(
+                stripe.Subscription.create,
                 customer=tenant.stripe_customer_id,
                 items=[{"price": price_id}],
             )
@@ -1,18 +1,112 @@
+import asyncio
 from datetime import UTC, datetime
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import func, select
+import redis.asyncio as aioredis
+import redis.exceptions as redis_exceptions
+import structlog
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.event import listens_for
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.core.redis import get_redis
 from app.models.content import Content
 from app.models.content_version import ContentVersion
 from app.models.tenant import Tenant
 from app.models.usage_event import UsageEvent
 
+logger = structlog.get_logger()
+
+# Running per-tenant monthly usage counters in Redis (hash: credits, tokens,
+# events, seed). usage_events stays the source of truth: the totals are only
+# written from an aggregate read under the tenant row lock, tagged with a fresh
+# seed token, and a generation's increment is applied after its transaction
+# commits, only if the counter still carries the token its lock holder wrote.
+USAGE_COUNTER_TTL_SECONDS = 40 * 24 * 3600
+_DEFAULT_MONTHLY_LIMIT = 50
+
+_REDIS_ERRORS = (redis_exceptions.RedisError, ConnectionError, OSError, RuntimeError)
+
+# A counter re-seeded since (or expired) already counts the event, or will be
+# rebuilt from the ledger, so only the seeding the increment belongs to is bumped.
+_INCR_COUNTER_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'seed') == ARGV[1] then
+  redis.call('HINCRBY', KEYS[1], 'credits', ARGV[2])
+  redis.call('HINCRBY', KEYS[1], 'tokens', ARGV[3])
+  redis.call('HINCRBY', KEYS[1], 'events', 1)
+  return 1
+end
+return 0
+"""
+
+_SEED_COUNTER_SCRIPT = """
+redis.call('HSET', KEYS[1], 'credits', ARGV[1], 'tokens', ARGV[2], 'events', ARGV[3],
+           'seed', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+# Session.info keys: counter key -> seed token written under this transaction's
+# lock, and the increments waiting for the transaction to commit
+_COUNTER_SEEDS = "usage_counter_seeds"
+_PENDING_INCREMENTS = "usage_counter_increments"
+
+# Post-commit counter updates in flight, referenced until they finish
+_counter_updates: set[asyncio.Task] = set()
+
+
+@listens_for(Session, "after_commit")
+def _apply_counter_increments(session: Session) -> None:
+    session.info.pop(_COUNTER_SEEDS, None)
+    pending = session.info.pop(_PENDING_INCREMENTS, None)
+    if not pending:
+        return
+    # Session events are synchronous; run the Redis calls on the loop that is
+    # driving the commit.
+    task = asyncio.get_running_loop().create_task(_increment_counters(pending))
+    _counter_updates.add(task)
+    task.add_done_callback(_counter_updates.discard)
+
+
+@listens_for(Session, "after_rollback")
+def _discard_counter_increments(session: Session) -> None:
+    session.info.pop(_COUNTER_SEEDS, None)
+    session.info.pop(_PENDING_INCREMENTS, None)
+
+
+async def _increment_counters(pending: list[tuple]) -> None:
+    for redis, key, seed, credits, tokens in pending:
+        try:
+            await redis.eval(_INCR_COUNTER_SCRIPT, 1, key, seed, credits, tokens)
+        except _REDIS_ERRORS:
+            await logger.awarning("usage_counter_unavailable", key=key)
+
+
+def usage_counter_key(tenant_id: UUID | str, when: datetime) -> str:
+    """Redis key for a tenant's usage counter in the month containing ``when``."""
+    return f"usage:{tenant_id}:{when:%Y%m}"
+
+
+def current_month_start():
+    """SQL expression for the start of the current UTC month, evaluated by Postgres.
+
+    Truncating in UTC explicitly keeps the boundary independent of the
+    session TimeZone setting.
+    """
+    return func.date_trunc("month", func.now(), "UTC")
+
 
 class ContentService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, redis: aioredis.Redis | None = None):
         self.db = db
+        # Celery tasks pass their own client; requests use the app's pool
+        self._redis_client = redis
+
+    async def _redis(self) -> aioredis.Redis:
+        if self._redis_client is not None:
+            return self._redis_client
+        return await get_redis()
 
     async def create(
         self,
@@ -29,31 +123,46 @@ class ContentService:
         generation_time_ms: int,
         brand_profile_id: UUID | None = None,
     ) -> Content:
-        content = Content(
-            tenant_id=tenant_id,
-            listing_id=listing_id,
-            user_id=user_id,
-            brand_profile_id=brand_profile_id,
-            content_type=content_type,
-            tone=tone,
-            body=body,
-            content_metadata=metadata,
-            ai_model=ai_model,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            generation_time_ms=generation_time_ms,
+        # Write the content row and its initial version in one statement: the
+        # version insert rides along as a data-modifying CTE, so there is no
+        # flush round-trip to learn the content id first.
+        content_id = uuid4()
+        now = datetime.now(UTC)
+        version_cte = (
+            insert(ContentVersion.__table__)
+            .values(
+                id=uuid4(),
+                content_id=content_id,
+                version=1,
+                body=body,
+                metadata=metadata,
+                created_at=now,
+            )
+            .cte("initial_version")
         )
-        self.db.add(content)
-        await self.db.flush()
-
-        # Save initial version
-        version = ContentVersion(
-            content_id=content.id,
-            version=1,
-            body=body,
-            content_metadata=metadata,
+        stmt = (
+            insert(Content)
+            .values(
+                id=content_id,
+                tenant_id=tenant_id,
+                listing_id=listing_id,
+                user_id=user_id,
+                brand_profile_id=brand_profile_id,
+                content_type=content_type,
+                tone=tone,
+                body=body,
+                content_metadata=metadata,
+                ai_model=ai_model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                generation_time_ms=generation_time_ms,
+                created_at=now,
+                updated_at=now,
+            )
+            .add_cte(version_cte)
+            .returning(Content)
         )
-        self.db.add(version)
+        content = (await self.db.scalars(stmt)).one()
 
         return content
 
@@ -75,6 +184,101 @@ class ContentService:
         )
         self.db.add(event)
 
+        # Only a counter seeded under this transaction's tenant lock is known
+        # not to include the event; any other is left to the next locked read.
+        key = usage_counter_key(tenant_id, datetime.now(UTC))
+        seed = self.db.info.get(_COUNTER_SEEDS, {}).get(key)
+        if seed is not None:
+            self.db.info.setdefault(_PENDING_INCREMENTS, []).append(
+                (await self._redis(), key, seed, count, tokens),
+            )
+
+    async def get_monthly_usage(self, tenant_id: UUID, *, lock: bool = False) -> dict:
+        """Return the tenant's plan, limit, and current-month usage totals.
+
+        Unlocked reads use the tenant's Redis counter when present, so the hot
+        path is a primary-key tenant lookup plus one HGETALL. Locked reads, a
+        counter miss, or Redis being unavailable fall back to a single Tenant
+        LEFT JOIN usage_events aggregate. Locked reads always hit the database
+        and re-seed the counter from what they read.
+
+        Args:
+            tenant_id: Tenant to check.
+            lock: If True, acquire a row-level lock on the tenant row to
+                  serialize concurrent credit checks (use inside a transaction).
+        """
+        now = datetime.now(UTC)
+        # Reported period only; the SQL filter uses current_month_start()
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        key = usage_counter_key(tenant_id, now)
+
+        counter = None if lock else await self._read_usage_counter(key)
+        if counter is not None:
+            row = (
+                await self.db.execute(
+                    select(
+                        Tenant.monthly_generation_limit.label("credits_limit"),
+                        Tenant.plan.label("plan"),
+                    ).where(Tenant.id == tenant_id)
+                )
+            ).one_or_none()
+            used = int(counter.get("credits", 0))
+            tokens_used = int(counter.get("tokens", 0))
+            total_events = int(counter.get("events", 0))
+        else:
+            if lock:
+                # Lock before aggregating, so a request queued behind another's
+                # generation counts its events once they commit. FOR UPDATE is
+                # not allowed alongside GROUP BY, so lock separately.
+                await self.db.execute(
+                    select(Tenant.id).where(Tenant.id == tenant_id).with_for_update()
+                )
+            row = (
+                await self.db.execute(
+                    select(
+                        Tenant.monthly_generation_limit.label("credits_limit"),
+                        Tenant.plan.label("plan"),
+                        func.coalesce(func.sum(UsageEvent.credits_consumed), 0)
+                        .label("credits_used"),
+                        func.coalesce(func.sum(UsageEvent.tokens_used), 0).label("tokens_used"),
+                        func.count(UsageEvent.id).label("total_events"),
+                    )
+                    .select_from(Tenant)
+                    .outerjoin(
+                        UsageEvent,
+                        and_(
+                            UsageEvent.tenant_id == Tenant.id,
+                            UsageEvent.event_type == "content_generation",
+                            UsageEvent.created_at >= current_month_start(),
+                        ),
+                    )
+                    .where(Tenant.id == tenant_id)
+                    .group_by(Tenant.id)
+                )
+            ).one_or_none()
+            used = int(row.credits_used) if row else 0
+            tokens_used = int(row.tokens_used) if row else 0
+            total_events = int(row.total_events) if row else 0
+            if row and lock:
+                # No generation can commit while the lock is held, so these
+                # totals stay exact until this transaction ends
+                await self._seed_usage_counter(key, used, tokens_used, total_events)
+
+        limit = row.credits_limit if row and row.credits_limit is not None else None
+        if limit is None:
+            limit = _DEFAULT_MONTHLY_LIMIT
+
+        return {
+            "period_start": month_start.isoformat(),
+            "period_end": now.isoformat(),
+            "credits_used": used,
+            "credits_limit": limit,
+            "credits_remaining": max(0, limit - used),
+            "tokens_used": tokens_used,
+            "total_events": total_events,
+            "plan": row.plan if row else None,
+        }
+
     async def get_remaining_credits(self, tenant_id: UUID, *, lock: bool = False) -> int:
         """Return remaining credits for the current billing month.
 
@@ -83,26 +287,31 @@ class ContentService:
             lock: If True, acquire a row-level lock on the tenant row to
                   serialize concurrent credit checks (use inside a transaction).
         """
-        # Get tenant's limit (optionally with FOR UPDATE to serialize)
-        tenant_query = select(Tenant.monthly_generation_limit).where(Tenant.id == tenant_id)
-        if lock:
-            tenant_query = tenant_query.with_for_update()
-        result = await self.db.execute(tenant_query)
-        limit = result.scalar()
-        if limit is None:
-            limit = 50
+        usage = await self.get_monthly_usage(tenant_id, lock=lock)
+        return usage["credits_remaining"]
 
-        # Get current month's usage
-        now = datetime.now(UTC)
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    # --- Usage counter (fails open to the SQL aggregate if Redis is unavailable) ---
 
-        usage_result = await self.db.execute(
-            select(func.coalesce(func.sum(UsageEvent.credits_consumed), 0)).where(
-                UsageEvent.tenant_id == tenant_id,
-                UsageEvent.event_type == "content_generation",
-                UsageEvent.created_at >= month_start,
-            )
-        )
-        used = usage_result.scalar()
+    async def _read_usage_counter(self, key: str) -> dict | None:
+        try:
+            redis = await self._redis()
+            counter = await redis.hgetall(key)
+        except _REDIS_ERRORS:
+            return None
+        return counter or None
 
-        return max(0, limit - used)
+    async def _seed_usage_counter(
+        self, key: str, credits: int, tokens: int, events: int,
+    ) -> None:
+        """Replace the counter's totals; call only with the tenant row locked."""
+        seed = uuid4().hex
+        try:
+            redis = await self._redis()
+            await redis.eval(
+                _SEED_COUNTER_SCRIPT, 1, key,
+                credits, tokens, events, seed, USAGE_COUNTER_TTL_SECONDS,
+            )
+        except _REDIS_ERRORS:
+            await logger.adebug("usage_counter_unavailable", key=key)
+            return
+        self.db.info.setdefault(_COUNTER_SEEDS, {})[key] = seed
@@ -6,9 +6,16 @@ SaaS operation. Supports:
 - BCC-style personalizations (recipients don't see each other)
 - Batch sending (1000 recipients per SendGrid request)
 - DB-backed campaign tracking via EmailCampaign model
-- Agent notification emails
+- Agent notification emails, coalesced into one request per batch
 """
 
+import asyncio
+import gzip
+import json
+import re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from types import MappingProxyType
 from uuid import UUID
 
 import httpx
@@ -16,13 +23,57 @@ import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
+from app.core.http_client import SharedHttpClient
 from app.models.email_campaign import EmailCampaign
 
 logger = structlog.get_logger()
 
 SENDGRID_API_URL = "https://api.sendgrid.com/v3/mail/send"
 
+# Shared pooled client so batches and requests reuse TCP/TLS connections to
+# SendGrid instead of paying a fresh handshake per batch.
+_SENDGRID_TIMEOUT = httpx.Timeout(30.0)
+_SENDGRID_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
 
+# Batches of one send posted to SendGrid at once; kept under the pool size
+_SENDGRID_BATCH_CONCURRENCY = 4
+
+_http_client = SharedHttpClient(timeout=_SENDGRID_TIMEOUT, limits=_SENDGRID_LIMITS)
+
+
+# Request bodies at least this large are gzip-compressed (SendGrid accepts
+# Content-Encoding: gzip); batches of HTML plus up to 1000 personalizations
+# compress several-fold, while tiny bodies aren't worth the CPU.
+_GZIP_MIN_BYTES = 1024
+
+
+def _encode_payload(payload: dict) -> tuple[bytes, bool]:
+    """Serialize a Mail Send payload, gzipping it when large enough.
+
+    Returns the request body and whether it was compressed.
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    if len(body) < _GZIP_MIN_BYTES:
+        return body, False
+    return gzip.compress(body, compresslevel=6), True
+
+
+_BODY_CLOSE_RE = re.compile(r"</body\s*>", re.IGNORECASE)
+
+# First "Subject:" line; [ \t]* keeps an empty subject from spilling onto the next line
+_SUBJECT_RE = re.compile(r"^\s*subject:[ \t]*(.*?)\s*$", re.IGNORECASE | re.MULTILINE)
+
+_FOOTER_STYLE = (
+    "margin-top:24px;padding:16px 0;"
+    "border-top:1px solid #eeeeee;"
+    "text-align:center;font-size:10px;"
+    "color:#777777;"
+    "font-family:Arial,Helvetica,sans-serif;"
+)
+_UNSUB_STYLE = "color:#999999;text-decoration:underline;"
+
+
+@lru_cache(maxsize=512)
 def _canspam_footer(
     physical_address: str,
     unsubscribe_url: str | None = None,
@@ -32,30 +83,22 @@ def _canspam_footer(
     """Build a CAN-SPAM compliant footer with physical address and unsubscribe link.
 
     CAN-SPAM requires: (1) physical postal address and (2) opt-out mechanism
-    in every commercial email.
+    in every commercial email. Cached — the footer only varies per sender.
     """
     name_line = f"{brokerage_name} &bull; " if brokerage_name else ""
-    unsub_style = "color:#999999;text-decoration:underline;"
     if unsubscribe_url:
         unsub = (
             f'<a href="{unsubscribe_url}"'
-            f' style="{unsub_style}">Unsubscribe</a>'
+            f' style="{_UNSUB_STYLE}">Unsubscribe</a>'
         )
     else:
         mailto = from_email or ""
         unsub = (
             f'<a href="mailto:{mailto}?subject=Unsubscribe"'
-            f' style="{unsub_style}">Unsubscribe</a>'
+            f' style="{_UNSUB_STYLE}">Unsubscribe</a>'
         )
-    footer_style = (
-        "margin-top:24px;padding:16px 0;"
-        "border-top:1px solid #eeeeee;"
-        "text-align:center;font-size:10px;"
-        "color:#777777;"
-        "font-family:Arial,Helvetica,sans-serif;"
-    )
     return (
-        f'<div style="{footer_style}">'
+        f'<div style="{_FOOTER_STYLE}">'
         f"<div>{name_line}{physical_address}</div>"
         f'<div style="margin-top:4px;">'
         f"{unsub} from future emails.</div>"
@@ -63,6 +106,74 @@ def _canspam_footer(
     )
 
 
+# Human-readable names for content types listed in agent notifications
+_TYPE_LABELS = MappingProxyType({
+    "listing_description": "Listing Description",
+    "social_instagram": "Instagram Post",
+    "social_facebook": "Facebook Post",
+    "social_linkedin": "LinkedIn Post",
+    "social_x": "X (Twitter) Post",
+    "email_just_listed": "Just Listed Email",
+    "email_open_house": "Open House Email",
+    "email_drip": "Drip Campaign Email",
+    "flyer": "Print Flyer",
+    "video_script": "Video Script",
+    "open_house_invite": "Open House Invitation",
+    "price_reduction": "Price Reduction Announcement",
+    "just_sold": "Just Sold Announcement",
+})
+
+
+# Agent notification body shared by every recipient of a batch; the -tag-
+# placeholders are filled per personalization by SendGrid substitutions.
+_AGENT_NOTIFY_SUBJECT = "Your listing materials are ready — {address}"
+_AGENT_NOTIFY_HTML = """\
+<div style="font-family: Arial, Helvetica, sans-serif; color: #333; max-width: 600px;">
+  <p>-greeting-</p>
+  <p>Great news — your marketing materials for <strong>-address-</strong> are ready!</p>
+  <p>Here's what was generated:</p>
+  <ul>-items-</ul>
+  <p>Please log in to review and access your materials.</p>
+  <br>
+  <p style="color: #555;">— -brokerage- Marketing</p>
+</div>
+"""
+
+
+@dataclass(frozen=True)
+class AgentNotification:
+    """One listing agent to notify that their materials are ready."""
+
+    agent_email: str
+    agent_name: str
+    address: str
+    content_types: list[str]
+    listing_id: UUID | None = None
+
+
+# Redis list of JSON-encoded agent notifications awaiting a coalesced send by
+# the flush_agent_notifications task (one SendGrid request per tenant batch).
+AGENT_NOTIFY_QUEUE_KEY = "agent_notify:queue"
+
+
+def encode_agent_notification(tenant_id: UUID, notification: AgentNotification) -> str:
+    """Queue entry for ``notification``, sent on behalf of ``tenant_id``."""
+    return json.dumps({"tenant_id": tenant_id, **asdict(notification)}, default=str)
+
+
+def decode_agent_notification(raw: str) -> tuple[UUID, AgentNotification]:
+    """Tenant and notification of an entry queued by encode_agent_notification."""
+    entry = json.loads(raw)
+    listing_id = entry.get("listing_id")
+    return UUID(entry["tenant_id"]), AgentNotification(
+        agent_email=entry["agent_email"],
+        agent_name=entry["agent_name"],
+        address=entry["address"],
+        content_types=list(entry["content_types"]),
+        listing_id=UUID(listing_id) if listing_id else None,
+    )
+
+
 class EmailService:
     """SendGrid email delivery for listing marketing campaigns."""
 
@@ -113,9 +224,10 @@ class EmailService:
                 brokerage_name=self.from_name,
                 from_email=self.from_email,
             )
-            # Insert before closing </body> or </div>, or just append
-            if "</body>" in html_content.lower():
-                idx = html_content.lower().rfind("</body>")
+            # Insert before closing </body>, or just append
+            match = _BODY_CLOSE_RE.search(html_content)
+            if match:
+                idx = match.start()
                 html_content = html_content[:idx] + footer + html_content[idx:]
             else:
                 html_content += footer
@@ -129,51 +241,98 @@ class EmailService:
         if not personalizations:
             return {"sent": 0, "failed": 0, "errors": ["No valid recipients"]}
 
+        return await self._deliver(personalizations, subject, html_content, reply_to)
+
+    async def _deliver(
+        self,
+        personalizations: list[dict],
+        subject: str,
+        html_content: str,
+        reply_to: str | None = None,
+    ) -> dict:
+        """POST one message body to SendGrid for the given personalizations.
+
+        Personalizations go out in batches of 1000 (SendGrid's per-request
+        limit); each may carry its own subject and substitutions.
+        """
         results = {"sent": 0, "failed": 0, "errors": []}
         batch_size = 1000
+        client = _http_client.client
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        gzip_headers = {**headers, "Content-Encoding": "gzip"}
 
-        for i in range(0, len(personalizations), batch_size):
-            batch = personalizations[i:i + batch_size]
-            payload = {
-                "personalizations": batch,
-                "from": {"email": self.from_email, "name": self.from_name},
-                "subject": subject,
-                "content": [{"type": "text/html", "value": html_content}],
-            }
+        # Everything but the recipients is identical across batches
+        base_payload = {
+            "from": {"email": self.from_email, "name": self.from_name},
+            "subject": subject,
+            "content": [{"type": "text/html", "value": html_content}],
+        }
+        if reply_to:
+            base_payload["reply_to"] = {"email": reply_to}
+
+        # Batches are independent requests, so up to _SENDGRID_BATCH_CONCURRENCY
+        # are in flight at once on the shared client's pool
+        semaphore = asyncio.Semaphore(_SENDGRID_BATCH_CONCURRENCY)
 
-            if reply_to:
-                payload["reply_to"] = {"email": reply_to}
+        async def _post_batch(index: int, batch: list[dict]) -> dict:
+            batch_results = {"sent": 0, "failed": 0, "errors": []}
+            payload = {"personalizations": batch, **base_payload}
 
             try:
-                async with httpx.AsyncClient() as client:
+                body, compressed = _encode_payload(payload)
+                async with semaphore:
                     resp = await client.post(
                         SENDGRID_API_URL,
-                        json=payload,
-                        headers={
-                            "Authorization": f"Bearer {self.api_key}",
-                            "Content-Type": "application/json",
-                        },
-                        timeout=30.0,
+                        content=body,
+                        headers=gzip_headers if compressed else headers,
                     )
 
                 if resp.status_code in (200, 201, 202):
-                    results["sent"] += len(batch)
+                    batch_results["sent"] += len(batch)
                 else:
-                    results["failed"] += len(batch)
+                    batch_results["failed"] += len(batch)
                     try:
                         error_body = resp.json()
                         for err in error_body.get("errors", []):
-                            results["errors"].append(err.get("message", str(err)))
+                            batch_results["errors"].append(err.get("message", str(err)))
                     except Exception:
-                        results["errors"].append(f"HTTP {resp.status_code}: {resp.text[:200]}")
+                        batch_results["errors"].append(
+                            f"HTTP {resp.status_code}: {resp.text[:200]}"
+                        )
             except httpx.TimeoutException:
-                results["failed"] += len(batch)
-                results["errors"].append("SendGrid request timed out")
-                logger.warning("sendgrid_timeout", batch_index=i, batch_size=len(batch))
+                batch_results["failed"] += len(batch)
+                batch_results["errors"].append("SendGrid request timed out")
+                logger.warning("sendgrid_timeout", batch_index=index, batch_size=len(batch))
             except httpx.ConnectError as e:
-                results["failed"] += len(batch)
-                results["errors"].append(f"SendGrid connection error: {e}")
+                batch_results["failed"] += len(batch)
+                batch_results["errors"].append(f"SendGrid connection error: {e}")
                 logger.warning("sendgrid_connect_error", error=str(e))
+            return batch_results
+
+        batches = [
+            personalizations[i:i + batch_size]
+            for i in range(0, len(personalizations), batch_size)
+        ]
+        outcomes = await asyncio.gather(
+            *(_post_batch(i * batch_size, batch) for i, batch in enumerate(batches)),
+            return_exceptions=True,
+        )
+
+        # Merge in batch order; an unexpected error fails only its own batch
+        for batch, outcome in zip(batches, outcomes, strict=True):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome
+                results["failed"] += len(batch)
+                results["errors"].append(f"SendGrid request failed: {outcome}")
+                logger.error("sendgrid_batch_error", error=str(outcome), batch_size=len(batch))
+                continue
+            results["sent"] += outcome["sent"]
+            results["failed"] += outcome["failed"]
+            results["errors"].extend(outcome["errors"])
 
         return results
 
@@ -206,6 +365,32 @@ class EmailService:
             unsubscribe_url=unsubscribe_url,
         )
 
+        return self._record_campaign(
+            db=db,
+            tenant_id=tenant_id,
+            results=results,
+            subject=subject,
+            recipient_count=len(to_emails),
+            campaign_type=campaign_type,
+            reply_to=reply_to,
+            content_id=content_id,
+            listing_id=listing_id,
+            user_id=user_id,
+        )
+
+    def _record_campaign(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        results: dict,
+        subject: str,
+        recipient_count: int,
+        campaign_type: str,
+        reply_to: str | None = None,
+        content_id: UUID | None = None,
+        listing_id: UUID | None = None,
+        user_id: UUID | None = None,
+    ) -> EmailCampaign:
         campaign = EmailCampaign(
             tenant_id=tenant_id,
             content_id=content_id,
@@ -215,7 +400,7 @@ class EmailService:
             from_email=self.from_email,
             from_name=self.from_name,
             reply_to=reply_to,
-            recipient_count=len(to_emails),
+            recipient_count=recipient_count,
             sent=results["sent"],
             failed=results["failed"],
             errors=results["errors"],
@@ -223,7 +408,7 @@ class EmailService:
         )
         db.add(campaign)
 
-        log = logger.bind(campaign_type=campaign_type, recipients=len(to_emails))
+        log = logger.bind(campaign_type=campaign_type, recipients=recipient_count)
         if results["failed"]:
             log.warning("email_send_partial", sent=results["sent"], failed=results["failed"])
         else:
@@ -248,51 +433,80 @@ class EmailService:
         Returns:
             The created EmailCampaign record.
         """
-        brokerage = brokerage_name or self.from_name
+        return await self.send_agent_notifications(
+            db=db,
+            tenant_id=tenant_id,
+            notifications=[
+                AgentNotification(
+                    agent_email=agent_email,
+                    agent_name=agent_name,
+                    address=address,
+                    content_types=content_types,
+                    listing_id=listing_id,
+                ),
+            ],
+            brokerage_name=brokerage_name,
+            user_id=user_id,
+        )
 
-        type_labels = {
-            "listing_description": "Listing Description",
-            "social_instagram": "Instagram Post",
-            "social_facebook": "Facebook Post",
-            "social_linkedin": "LinkedIn Post",
-            "social_x": "X (Twitter) Post",
-            "email_just_listed": "Just Listed Email",
-            "email_open_house": "Open House Email",
-            "email_drip": "Drip Campaign Email",
-            "flyer": "Print Flyer",
-            "video_script": "Video Script",
-            "open_house_invite": "Open House Invitation",
-            "price_reduction": "Price Reduction Announcement",
-            "just_sold": "Just Sold Announcement",
-        }
+    async def send_agent_notifications(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        notifications: list[AgentNotification],
+        brokerage_name: str | None = None,
+        user_id: UUID | None = None,
+    ) -> EmailCampaign | None:
+        """Notify several listing agents with a single SendGrid request.
 
-        items_html = "".join(
-            f"<li>{type_labels.get(ct, ct)}</li>" for ct in content_types
+        The message body is shared; each agent gets a personalization with
+        their own subject and substitution values, so N notifications (e.g.
+        a listings import drained by flush_agent_notifications) cost one HTTP
+        round trip instead of N.
+
+        Returns:
+            The created EmailCampaign record, or None if there was no one to notify.
+        """
+        if not notifications:
+            return None
+
+        brokerage = brokerage_name or self.from_name
+        personalizations = [
+            {
+                "to": [{"email": n.agent_email}],
+                "subject": _AGENT_NOTIFY_SUBJECT.format(address=n.address),
+                "substitutions": {
+                    "-greeting-": f"Hi {n.agent_name}," if n.agent_name else "Hi,",
+                    "-address-": n.address,
+                    "-items-": "".join(
+                        [f"<li>{_TYPE_LABELS.get(ct, ct)}</li>" for ct in n.content_types]
+                    ),
+                    "-brokerage-": brokerage,
+                },
+            }
+            for n in notifications
+        ]
+        # A lone notification keeps its own subject and listing on the audit row
+        single = notifications[0] if len(notifications) == 1 else None
+        subject = (
+            personalizations[0]["subject"] if single
+            else _AGENT_NOTIFY_SUBJECT.format(address=f"{len(notifications)} listings")
         )
-        greeting = f"Hi {agent_name}," if agent_name else "Hi,"
-        subject = f"Your listing materials are ready — {address}"
 
-        html_content = f"""\
-<div style="font-family: Arial, Helvetica, sans-serif; color: #333; max-width: 600px;">
-  <p>{greeting}</p>
-  <p>Great news — your marketing materials for <strong>{address}</strong> are ready!</p>
-  <p>Here's what was generated:</p>
-  <ul>{items_html}</ul>
-  <p>Please log in to review and access your materials.</p>
-  <br>
-  <p style="color: #555;">— {brokerage} Marketing</p>
-</div>
-"""
+        if not self.api_key:
+            results = {"sent": 0, "failed": 0, "errors": ["SendGrid API key not configured"]}
+        else:
+            results = await self._deliver(personalizations, subject, _AGENT_NOTIFY_HTML)
 
-        return await self.send_and_track(
+        return self._record_campaign(
             db=db,
             tenant_id=tenant_id,
-            to_emails=[agent_email],
+            results=results,
             subject=subject,
-            html_content=html_content,
+            recipient_count=len(personalizations),
             campaign_type="agent_notify",
             user_id=user_id,
-            listing_id=listing_id,
+            listing_id=single.listing_id if single else None,
         )
 
 
@@ -302,8 +516,5 @@ def parse_subject_from_email(email_text: str) -> str:
     Looks for a "Subject: ..." line in the generated content.
     Falls back to a generic subject if none found.
     """
-    for line in email_text.split("\n"):
-        stripped = line.strip()
-        if stripped.lower().startswith("subject:"):
-            return stripped[len("subject:"):].strip()
-    return "New Listing Available"
+    match = _SUBJECT_RE.search(email_text)
+    return match.group(1) if match else "New Listing Available"
@@ -1,107 +1,406 @@
+import asyncio
+import contextlib
+import hashlib
 import io
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from html import escape as html_escape
+from operator import attrgetter
+from string import Template
+from uuid import UUID
+from xml.sax.saxutils import escape as xml_escape
 
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 
+from app.config import get_settings
 from app.models.content import Content
 from app.models.listing import Listing
 
-_ALLOWED_FORMATS = {"txt", "html", "docx", "pdf", "pptx", "flyer_pdf"}
+_FLYER_FORMATS = frozenset({"pptx", "flyer_pdf"})
+_ALLOWED_FORMATS = {"txt", "html", "docx", "pdf"} | _FLYER_FORMATS
+
+# The HTML export shell is kept pre-encoded, split at the title/body insertion
+# points, so a response is one bytes join around the encoded title and body
+# rather than a full-document str that is then encoded again.
+_HTML_HEAD = b"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>"""
+_HTML_MID = b"""</title></head>
+<body>
+<div style="max-width: 800px; margin: 0 auto; font-family: Georgia, serif; padding: 2rem;">
+"""
+_HTML_TAIL = b"""
+</div>
+</body>
+</html>"""
+
+# The PDF shell stays text: WeasyPrint parses a str, so only title/body are
+# substituted per request. Styling is inline on the two elements that need it:
+# with no author stylesheet WeasyPrint has no CSS to parse or selectors to
+# match beyond its user-agent defaults.
+_PDF_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"></head>
+<body style="font-family: Georgia, serif; max-width: 700px; margin: 0 auto; padding: 2rem;">
+<h1 style="color: #1a365d;">$title</h1>
+<div>$body</div>
+</body>
+</html>""")
+
+
+# Titles derive from content_type, which comes from a small fixed set, so the
+# escaped forms are cached rather than rebuilt per export.
+@lru_cache(maxsize=64)
+def _html_title(content_type: str) -> bytes:
+    return html_escape(content_type).encode("utf-8")
+
+
+@lru_cache(maxsize=64)
+def _pdf_title(content_type: str) -> str:
+    return html_escape(content_type.replace("_", " ").title())
+
+
+def _body_html(body: str) -> str:
+    """Escape content body text for the HTML/PDF shells, keeping line breaks."""
+    # html.escape is a chain of C-level str.replace calls, which measures far
+    # faster than a translate table (a per-character lookup) or a regex scan
+    # for special characters, and on par with markupsafe's C speedups.
+    return html_escape(body).replace("\n", "<br>\n")
+
+
+# Rendered DOCX/PDF output is spooled: small files stay in memory, large ones
+# spill to disk, and either way the response streams it out in chunks rather
+# than holding a second full copy in a BytesIO.
+_SPOOL_MAX_MEMORY = 1 << 20  # 1 MB
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# WeasyPrint font discovery dominates small renders, so each render thread
+# keeps its own FontConfiguration (it is not safe to share across threads).
+# Render-pool workers are long-lived and single-threaded, so in practice this
+# is built once per worker process and reused for every PDF it renders.
+_thread_state = threading.local()
+
+
+def _font_config():
+    font_config = getattr(_thread_state, "font_config", None)
+    if font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+
+        font_config = _thread_state.font_config = FontConfiguration()
+    return font_config
+
+
+# PDF and flyer rendering is CPU-bound Python that holds the GIL, so it runs in
+# a process pool: concurrent exports render on separate cores and the event
+# loop never waits on a render. Started lazily on first use (spawn, not fork —
+# the parent has live threads and an event loop) and shut down with the app.
+_render_pool: ProcessPoolExecutor | None = None
+
+
+def _render_executor() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        workers = get_settings().export_render_workers or os.cpu_count() or 1
+        _render_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_render_worker,
+        )
+    return _render_pool
+
+
+def _warm_render_worker() -> None:
+    """Pay the renderers' one-time costs when a render worker starts.
+
+    Imports WeasyPrint, builds the worker's font configuration, and renders a
+    throwaway page so fontconfig and Pango are initialised, then imports the
+    flyer libraries, all before the first real export lands on this worker.
+    Failures are left for the real render to report: an initializer that
+    raises breaks the whole pool.
+    """
+    with contextlib.suppress(Exception):
+        _render_pdf_sync("<p>x</p>")
+    with contextlib.suppress(Exception):
+        from app.services.flyer_service import warm_flyer_libraries
+
+        warm_flyer_libraries()
+
+
+def shutdown_render_pool() -> None:
+    """Stop the render worker processes (called on app shutdown)."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+async def _run_in_render_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_render_executor(), fn, *args)
+
+
+# Rendered PDFs for recently exported content, most recently used last. The
+# same content is often exported repeatedly while a user previews it; keying
+# on the content version and a hash of the rendered HTML means any edit (or
+# template change) misses. Only touched from the event loop thread.
+_PDF_CACHE_SIZE = 128
+_pdf_cache: OrderedDict[tuple, bytes] = OrderedDict()
+
+
+def _pdf_cache_key(content: Content, job: tuple) -> tuple:
+    fn, *args = job
+    digest = hashlib.blake2b("\0".join(args).encode("utf-8"), digest_size=16).digest()
+    return (content.id, content.updated_at, fn.__name__, digest)
+
+
+def _pdf_cache_get(key: tuple) -> bytes | None:
+    pdf = _pdf_cache.get(key)
+    if pdf is not None:
+        _pdf_cache.move_to_end(key)
+    return pdf
+
+
+def _pdf_cache_put(key: tuple, pdf: bytes) -> None:
+    _pdf_cache[key] = pdf
+    _pdf_cache.move_to_end(key)
+    while len(_pdf_cache) > _PDF_CACHE_SIZE:
+        _pdf_cache.popitem(last=False)
+
+
+def _new_spool() -> tempfile.SpooledTemporaryFile:
+    return tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY)
+
+
+def _render_pdf_sync(html: str) -> bytes:
+    """Render HTML to PDF bytes (CPU-bound — runs in the render pool)."""
+    from weasyprint import HTML
+
+    return HTML(string=html).write_pdf(font_config=_font_config())
+
+
+def _render_pdf_simple_sync(title: str, body: str) -> bytes:
+    """Lay out a title and body text with fpdf2, skipping HTML/CSS layout.
+
+    Used when export_pdf_engine is "fpdf". Runs in the render pool.
+    """
+    from fpdf import FPDF
+
+    from app.services.flyer_service import _sanitize_text
+
+    pdf = FPDF(orientation="P", unit="mm", format="Letter")
+    pdf.set_margins(25, 20)
+    pdf.add_page()
+    pdf.set_text_color(0x1A, 0x36, 0x5D)
+    pdf.set_font("Times", "B", 24)
+    pdf.multi_cell(w=0, h=11, text=_sanitize_text(title))
+    pdf.ln(4)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Times", "", 12)
+    pdf.multi_cell(w=0, h=6, text=_sanitize_text(body))
+    return bytes(pdf.output())
+
+
+def _render_flyer_sync(
+    format: str, branding, listing_data: dict, flyer_text: str,
+) -> bytes:
+    """Build a PPTX or PDF flyer and return its bytes (runs in the render pool)."""
+    from app.services.flyer_service import FlyerService
+
+    service = FlyerService(branding)
+    if format == "pptx":
+        buffer = service.generate_pptx(listing_data, flyer_text)
+    else:
+        buffer = service.generate_pdf(listing_data, flyer_text)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=1)
+def _docx_skeleton() -> bytes:
+    """Saved bytes of an empty python-docx document.
+
+    Document() reads and parses the bundled default template from disk each
+    time; loading it from these in-memory bytes skips the file read and part
+    discovery, roughly a third of the cost of a small export.
+    """
+    from docx import Document
+
+    buffer = io.BytesIO()
+    Document().save(buffer)
+    return buffer.getvalue()
+
+
+def warm_export_renderers() -> None:
+    """Import python-docx and build the DOCX skeleton ahead of the first export.
+
+    Called from a background thread at app startup so the first DOCX export
+    does not pay for the import and template parse. PDF and flyer imports
+    happen in the render pool workers, not in this process.
+    """
+    _docx_skeleton()
+
+
+# Tabs and line breaks inside a paragraph become run elements, as python-docx's
+# add_paragraph does for them.
+_DOCX_RUN_BREAK_RE = re.compile(r"([\t\r\n])")
+_DOCX_RUN_BREAKS = {"\t": "<w:tab/>", "\r": "<w:br/>", "\n": "<w:br/>"}
+
+
+def _docx_paragraph_xml(text: str) -> str:
+    if not text:
+        return "<w:p/>"
+    run = "".join(
+        _DOCX_RUN_BREAKS.get(piece) or f'<w:t xml:space="preserve">{xml_escape(piece)}</w:t>'
+        for piece in _DOCX_RUN_BREAK_RE.split(text)
+        if piece
+    )
+    return f"<w:p><w:r>{run}</w:r></w:p>"
+
+
+def _render_docx_sync(content_type: str, body: str) -> tempfile.SpooledTemporaryFile:
+    """Build a DOCX document into a spooled file (run off the event loop)."""
+    from docx import Document
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    doc = Document(io.BytesIO(_docx_skeleton()))
+    doc.add_heading(content_type.replace("_", " ").title(), level=1)
+
+    # Body paragraphs are built as one XML string and parsed in a single call;
+    # add_paragraph per paragraph walks the text a character at a time and
+    # builds each element through python-docx's validating constructors.
+    paragraphs = "".join(_docx_paragraph_xml(p) for p in body.split("\n\n"))
+    body_elem = doc.element.body
+    body_elem.extend(parse_xml(f"<w:body {nsdecls('w')}>{paragraphs}</w:body>"))
+    sect_pr = body_elem.sectPr
+    if sect_pr is not None:
+        body_elem.append(sect_pr)  # section properties must stay last
+
+    spool = _new_spool()
+    try:
+        doc.save(spool)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def _iter_bytes(data: bytes) -> AsyncIterator[bytes]:
+    """Yield rendered output in fixed-size chunks.
+
+    Used instead of wrapping the payload in a BytesIO, which would copy it
+    and be iterated line by line through the threadpool.
+    """
+    for start in range(0, len(data), _STREAM_CHUNK_SIZE):
+        yield data[start:start + _STREAM_CHUNK_SIZE]
+
+
+async def _iter_spool(spool: tempfile.SpooledTemporaryFile) -> AsyncIterator[bytes]:
+    """Yield a spooled file in fixed-size chunks, closing it when done."""
+    try:
+        while chunk := spool.read(_STREAM_CHUNK_SIZE):
+            yield chunk
+    finally:
+        spool.close()
+
+
+def _attachment_headers(kind: str, content_id: UUID, ext: str) -> dict[str, str]:
+    """Content-Disposition header naming the download ``<kind>-<id>.<ext>``."""
+    return {"Content-Disposition": f'attachment; filename="{kind}-{content_id}.{ext}"'}
+
+
+# Listing columns a flyer needs, read in one C-level call per export
+_flyer_listing_fields = attrgetter(
+    "address_full", "price", "bedrooms", "bathrooms", "sqft", "lot_sqft", "year_built",
+    "features", "listing_agent_name", "listing_agent_email", "listing_agent_phone",
+    "property_type",
+)
 
 
 class ExportService:
+    def __init__(self):
+        # Formats that depend only on the content; flyers also need the listing.
+        self._sync_dispatch = {"txt": self._export_txt, "html": self._export_html}
+        self._async_dispatch = {"docx": self._export_docx, "pdf": self._export_pdf}
+
     async def export(
         self,
         content: Content,
         format: str,
         listing: Listing | None = None,
         branding_settings: dict | None = None,
-    ) -> StreamingResponse:
-        if format not in _ALLOWED_FORMATS:
-            raise ValueError(
-                f"Unsupported format: {format}. "
-                f"Allowed: {', '.join(sorted(_ALLOWED_FORMATS))}"
-            )
-        if format == "txt":
-            return self._export_txt(content)
-        elif format == "html":
-            return self._export_html(content)
-        elif format == "docx":
-            return await self._export_docx(content)
-        elif format in ("pptx", "flyer_pdf"):
+    ) -> Response:
+        if handler := self._sync_dispatch.get(format):
+            return handler(content)
+        if handler := self._async_dispatch.get(format):
+            return await handler(content)
+        if format in _FLYER_FORMATS:
             return await self._export_flyer(content, format, listing, branding_settings)
-        else:
-            return await self._export_pdf(content)
+        raise ValueError(
+            f"Unsupported format: {format}. "
+            f"Allowed: {', '.join(sorted(_ALLOWED_FORMATS))}"
+        )
 
-    def _export_txt(self, content: Content) -> StreamingResponse:
-        buffer = io.BytesIO(content.body.encode("utf-8"))
-        return StreamingResponse(
-            buffer,
+    # txt and html are small and fully built in memory, so they go out as plain
+    # responses with a Content-Length instead of a chunked stream.
+    def _export_txt(self, content: Content) -> Response:
+        return Response(
+            content.body.encode("utf-8"),
             media_type="text/plain",
-            headers={"Content-Disposition": f'attachment; filename="content-{content.id}.txt"'},
+            headers=_attachment_headers("content", content.id, "txt"),
         )
 
-    def _export_html(self, content: Content) -> StreamingResponse:
-        safe_title = html_escape(content.content_type)
-        safe_body = html_escape(content.body).replace("\n", "<br>\n")
-        html = f"""<!DOCTYPE html>
-<html>
-<head><meta charset="utf-8"><title>{safe_title}</title></head>
-<body>
-<div style="max-width: 800px; margin: 0 auto; font-family: Georgia, serif; padding: 2rem;">
-{safe_body}
-</div>
-</body>
-</html>"""
-        buffer = io.BytesIO(html.encode("utf-8"))
-        return StreamingResponse(
-            buffer,
+    def _export_html(self, content: Content) -> Response:
+        html = b"".join((
+            _HTML_HEAD,
+            _html_title(content.content_type),
+            _HTML_MID,
+            _body_html(content.body).encode("utf-8"),
+            _HTML_TAIL,
+        ))
+        return Response(
+            html,
             media_type="text/html",
-            headers={"Content-Disposition": f'attachment; filename="content-{content.id}.html"'},
+            headers=_attachment_headers("content", content.id, "html"),
         )
 
     async def _export_docx(self, content: Content) -> StreamingResponse:
-        from docx import Document
-
-        doc = Document()
-        doc.add_heading(content.content_type.replace("_", " ").title(), level=1)
-        for paragraph in content.body.split("\n\n"):
-            doc.add_paragraph(paragraph)
-
-        buffer = io.BytesIO()
-        doc.save(buffer)
-        buffer.seek(0)
+        spool = await asyncio.to_thread(
+            _render_docx_sync, content.content_type, content.body,
+        )
 
         return StreamingResponse(
-            buffer,
+            _iter_spool(spool),
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": f'attachment; filename="content-{content.id}.docx"'},
+            headers=_attachment_headers("content", content.id, "docx"),
         )
 
     async def _export_pdf(self, content: Content) -> StreamingResponse:
-        safe_title = html_escape(content.content_type.replace("_", " ").title())
-        safe_body = html_escape(content.body).replace("\n", "<br>\n")
-        html = f"""<!DOCTYPE html>
-<html>
-<head><meta charset="utf-8"><style>
-body {{ font-family: Georgia, serif; max-width: 700px; margin: 0 auto; padding: 2rem; }}
-h1 {{ color: #1a365d; }}
-</style></head>
-<body>
-<h1>{safe_title}</h1>
-<div>{safe_body}</div>
-</body>
-</html>"""
-
-        from weasyprint import HTML
+        if get_settings().export_pdf_engine == "fpdf":
+            title = content.content_type.replace("_", " ").title()
+            job = (_render_pdf_simple_sync, title, content.body)
+        else:
+            html = _PDF_TEMPLATE.substitute(
+                title=_pdf_title(content.content_type), body=_body_html(content.body),
+            )
+            job = (_render_pdf_sync, html)
 
-        pdf_bytes = HTML(string=html).write_pdf()
-        buffer = io.BytesIO(pdf_bytes)
+        key = _pdf_cache_key(content, job)
+        pdf = _pdf_cache_get(key)
+        if pdf is None:
+            pdf = await _run_in_render_pool(*job)
+            _pdf_cache_put(key, pdf)
 
         return StreamingResponse(
-            buffer,
+            _iter_bytes(pdf),
             media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="content-{content.id}.pdf"'},
+            headers=_attachment_headers("content", content.id, "pdf"),
         )
 
     async def _export_flyer(
@@ -111,46 +410,45 @@ h1 {{ color: #1a365d; }}
         listing: Listing | None,
         branding_settings: dict | None,
     ) -> StreamingResponse:
-        from app.services.flyer_service import BrandingConfig, FlyerService
+        from app.services.flyer_service import BrandingConfig
 
         if not listing:
             raise ValueError("Flyer export requires a listing. Content has no associated listing.")
 
         branding = BrandingConfig.from_settings(branding_settings or {})
-        service = FlyerService(branding)
 
+        (
+            address_full, price, bedrooms, bathrooms, sqft, lot_sqft, year_built,
+            features, agent_name, agent_email, agent_phone, property_type,
+        ) = _flyer_listing_fields(listing)
         listing_data = {
-            "address_full": listing.address_full or "",
-            "price": float(listing.price) if listing.price else None,
-            "bedrooms": listing.bedrooms,
-            "bathrooms": float(listing.bathrooms) if listing.bathrooms else None,
-            "sqft": listing.sqft,
-            "lot_sqft": listing.lot_sqft,
-            "year_built": listing.year_built,
-            "features": listing.features or [],
-            "listing_agent_name": listing.listing_agent_name or "",
-            "listing_agent_email": listing.listing_agent_email or "",
-            "listing_agent_phone": listing.listing_agent_phone or "",
-            "property_type": listing.property_type or "",
+            "address_full": address_full or "",
+            "price": float(price) if price else None,
+            "bedrooms": bedrooms,
+            "bathrooms": float(bathrooms) if bathrooms else None,
+            "sqft": sqft,
+            "lot_sqft": lot_sqft,
+            "year_built": year_built,
+            "features": features or [],
+            "listing_agent_name": agent_name or "",
+            "listing_agent_email": agent_email or "",
+            "listing_agent_phone": agent_phone or "",
+            "property_type": property_type or "",
         }
 
+        flyer = await _run_in_render_pool(
+            _render_flyer_sync, format, branding, listing_data, content.body,
+        )
+
         if format == "pptx":
-            buffer = service.generate_pptx(listing_data, content.body)
-            buffer.seek(0)
             return StreamingResponse(
-                buffer,
+                _iter_bytes(flyer),
                 media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                headers={
-                    "Content-Disposition": f'attachment; filename="flyer-{content.id}.pptx"'
-                },
+                headers=_attachment_headers("flyer", content.id, "pptx"),
             )
         else:
-            buffer = service.generate_pdf(listing_data, content.body)
-            buffer.seek(0)
             return StreamingResponse(
-                buffer,
+                _iter_bytes(flyer),
                 media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f'attachment; filename="flyer-{content.id}.pdf"'
-                },
+                headers=_attachment_headers("flyer", content.id, "pdf"),
             )
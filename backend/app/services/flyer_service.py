@@ -17,9 +17,12 @@ Layout:
 """
 
 import io
-import tempfile
-from dataclasses import dataclass
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import IO
 
 import structlog
 from PIL import Image
@@ -44,6 +47,19 @@ class BrandingConfig:
     accent_color_hex: str = "#CC0000"
     headline: str = "Just Listed"
     qr_base_url: str = ""
+    # Derived from accent_color_hex / logo_path once per config (see __post_init__)
+    accent_rgb: tuple[int, int, int] = field(init=False, repr=False, compare=False)
+    has_logo: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.accent_rgb = _parse_hex_color(self.accent_color_hex)
+        self.has_logo = bool(self.logo_path) and os.path.exists(self.logo_path)
+        self.__dict__.pop("logo_bytes", None)  # logo_path may have changed
+
+    @cached_property
+    def logo_bytes(self) -> bytes:
+        """Logo file contents, read once and shared by every placement and format."""
+        return Path(self.logo_path).read_bytes()
 
     @classmethod
     def from_settings(cls, settings: dict, **overrides) -> "BrandingConfig":
@@ -77,39 +93,39 @@ class BrandingConfig:
         for k, v in overrides.items():
             if hasattr(config, k) and v is not None:
                 setattr(config, k, v)
+        if overrides:
+            config.__post_init__()  # re-derive from any overridden fields
         return config
 
-    @property
-    def accent_rgb(self) -> tuple[int, int, int]:
-        """Parse hex color to (R, G, B) tuple."""
-        h = self.accent_color_hex.lstrip("#")
-        if len(h) == 6:
-            return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
-        return (0xCC, 0x00, 0x00)
 
-    @property
-    def has_logo(self) -> bool:
-        return bool(self.logo_path) and Path(self.logo_path).exists()
+def _parse_hex_color(hex_color: str) -> tuple[int, int, int]:
+    """Parse hex color to (R, G, B) tuple."""
+    h = hex_color.lstrip("#")
+    if len(h) == 6:
+        return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
+    return (0xCC, 0x00, 0x00)
 
 
 # ── Shared Helpers ────────────────────────────────────────────────────
 
+@lru_cache(maxsize=256)
 def _extract_body_copy(flyer_text: str) -> str:
     """Extract prose body from AI-generated flyer copy, capped at ~80 words."""
+    # A plain split/strip loop measures faster here than an equivalent
+    # compiled line regex; the str methods are already C-level scans.
     clean_lines = []
     for line in flyer_text.split("\n"):
         s = line.strip()
-        if s.startswith("#") or s.startswith("---") or not s:
+        if not s or s.startswith(("#", "---")):
             continue
-        s = s.replace("**", "").replace("*", "")
-        if s.startswith("- ") or s.startswith("+ "):
+        if "*" in s:
+            s = s.replace("*", "")
+        if s.startswith(("- ", "+ ")):
             s = s[2:]
         clean_lines.append(s)
 
-    body = ""
-    for line in clean_lines:
-        if len(line) > len(body) and len(line) > 60:
-            body = line
+    # Longest prose line (first one wins ties)
+    body = max((line for line in clean_lines if len(line) > 60), key=len, default="")
 
     if not body:
         body = " ".join(clean_lines[:3])
@@ -130,39 +146,115 @@ def _extract_body_copy(flyer_text: str) -> str:
     return body
 
 
-def _generate_qr(data: str) -> str:
-    """Generate a QR code PNG and return the temp file path."""
+@lru_cache(maxsize=512)
+def _generate_qr_png(data: str, box_size: int = 10, border: int = 2) -> bytes:
+    """Generate a QR code PNG and return its bytes.
+
+    Cached because the same listing URL is encoded for both the PPTX and PDF
+    flyers and again on every re-export; callers wrap the bytes in a BytesIO,
+    so no temp files are written.
+    """
     import qrcode
 
     qr = qrcode.QRCode(
-        version=1, box_size=10, border=2,
+        version=1, box_size=box_size, border=border,
         error_correction=qrcode.constants.ERROR_CORRECT_M,
     )
     qr.add_data(data)
     qr.make(fit=True)
     img = qr.make_image(fill_color="black", back_color="white")
 
-    tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-    img.save(tmp.name)
-    return tmp.name
+    buf = io.BytesIO()
+    img.save(buf)
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=256)
+def _image_size(path: str, mtime_ns: int) -> tuple[int, int]:
+    """Pixel size of an image file (mtime_ns keys out a file replaced in place)."""
+    with Image.open(path) as img:
+        return img.size
+
+
+def _load_photos(photo_paths: list[Path] | None) -> list[tuple[str, int, int, int]]:
+    """Return ``(path, mtime_ns, width, height)`` for each photo that exists.
+
+    Sizes are read once per file and shared by the PPTX and PDF builders, so
+    generating both formats does not reopen and re-parse every photo header.
+    """
+    photos = []
+    for photo_path in photo_paths or []:
+        path = str(photo_path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        photos.append((path, mtime_ns, *_image_size(path, mtime_ns)))
+    return photos
+
+
+# Photos are embedded at about this resolution for their rendered size. MLS
+# originals are often 4000px+ wide for a box a few inches across, and both
+# python-pptx and fpdf2 embed whatever they are given byte for byte.
+_PHOTO_DPI = 200
+_DOWNSCALE_THRESHOLD = 1.3
+
+
+@lru_cache(maxsize=32)
+def _downscaled_jpeg(path: str, mtime_ns: int, width: int, height: int) -> bytes:
+    """Re-encode a photo as a JPEG no larger than ``width`` x ``height``."""
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        img.thumbnail((width, height), Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _photo_source(photo: tuple[str, int, int, int], render_w_in: float, render_h_in: float):
+    """Image to embed for a photo drawn at the given size (in inches).
+
+    The original path when its resolution is reasonable for the size, else a
+    downscaled copy; the cache lets the PPTX and PDF builders share it.
+    """
+    path, mtime_ns, img_w, img_h = photo
+    # Rounded to 10px so the PPTX (EMU) and PDF (mm) layouts of the same box,
+    # which differ by float noise, share one cached copy
+    target_w = int(round(render_w_in * _PHOTO_DPI, -1))
+    target_h = int(round(render_h_in * _PHOTO_DPI, -1))
+    if img_w <= target_w * _DOWNSCALE_THRESHOLD:
+        return path
+    return io.BytesIO(_downscaled_jpeg(path, mtime_ns, target_w, target_h))
 
 
 def _build_specs(listing_data: dict) -> list[str]:
     """Build specs list from listing data."""
+    return list(_format_specs(
+        listing_data.get("price"),
+        listing_data.get("bedrooms", "?"),
+        listing_data.get("bathrooms", "?"),
+        listing_data.get("sqft"),
+        listing_data.get("year_built"),
+    ))
+
+
+# typed: 2 and 2.0 hash alike but format differently ("2 Bed" vs "2.0 Bed")
+@lru_cache(maxsize=256, typed=True)
+def _format_specs(price, beds, baths, sqft, yb) -> tuple[str, ...]:
     specs = []
-    price = listing_data.get("price")
     if price:
-        specs.append(f"${float(price):,.0f}")
-    beds = listing_data.get("bedrooms", "?")
-    baths = listing_data.get("bathrooms", "?")
+        # Numbers format directly; only strings (and Decimals) need coercing
+        if not isinstance(price, int | float):
+            price = float(price)
+        specs.append(f"${price:,.0f}")
     specs.append(f"{beds} Bed / {baths} Bath")
-    sqft = listing_data.get("sqft")
     if sqft:
-        specs.append(f"{int(sqft):,} Sq Ft")
-    yb = listing_data.get("year_built")
+        if not isinstance(sqft, int):
+            sqft = int(sqft)
+        specs.append(f"{sqft:,} Sq Ft")
     if yb:
         specs.append(f"Built {yb}")
-    return specs
+    return tuple(specs)
 
 
 def _build_qr_url(listing_data: dict, branding: BrandingConfig) -> str:
@@ -174,26 +266,67 @@ def _build_qr_url(listing_data: dict, branding: BrandingConfig) -> str:
     return f"https://www.google.com/maps/search/{address.replace(' ', '+')}"
 
 
+_SANITIZE_REPLACEMENTS = (
+    ("\u2014", "--"), ("\u2013", "-"), ("\u2018", "'"), ("\u2019", "'"),
+    ("\u201c", '"'), ("\u201d", '"'), ("\u2026", "..."), ("\u2022", "-"),
+    ("\u25a0", "\u00bb"), ("\u2032", "'"), ("\u2033", '"'), ("\u00a0", " "),
+)
+
+
 def _sanitize_text(text: str) -> str:
     """Replace Unicode characters unsupported by PDF core fonts (Latin-1 only)."""
-    replacements = {
-        "\u2014": "--", "\u2013": "-", "\u2018": "'", "\u2019": "'",
-        "\u201c": '"', "\u201d": '"', "\u2026": "...", "\u2022": "-",
-        "\u25a0": "\u00bb", "\u2032": "'", "\u2033": '"', "\u00a0": " ",
-    }
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
-    return text.encode("latin-1", errors="replace").decode("latin-1")
+    # Most flyer strings (addresses, specs, agent details) are plain ASCII and
+    # need nothing. str.replace beats a translate table here: translate does a
+    # dict lookup per character, while replace is a fast C substring scan.
+    if text.isascii():
+        return text
+    for char, replacement in _SANITIZE_REPLACEMENTS:
+        if char in text:
+            text = text.replace(char, replacement)
+    try:
+        text.encode("latin-1")
+    except UnicodeEncodeError:
+        return text.encode("latin-1", errors="replace").decode("latin-1")
+    return text  # already Latin-1: skip the replace round-trip
+
+
+def warm_flyer_libraries() -> None:
+    """Import the flyer rendering libraries ahead of the first flyer.
+
+    The builders import python-pptx, fpdf2 and qrcode lazily so that API
+    processes which never render a flyer don't load them; together they take
+    several hundred ms to import cold. Render workers call this at start-up.
+    """
+    import fpdf  # noqa: F401
+    import pptx  # noqa: F401
+    import qrcode  # noqa: F401
 
 
 # ── PPTX Builder ──────────────────────────────────────────────────────
 
+# Fixed slide geometry in EMU (914400 per inch), computed once rather than
+# through pptx.util.Inches() on every flyer. Plain ints are accepted anywhere
+# python-pptx takes a position or size.
+_EMU_PER_INCH = 914400
+_PPTX_SLIDE_WIDTH = int(8.5 * _EMU_PER_INCH)
+_PPTX_SLIDE_HEIGHT = 11 * _EMU_PER_INCH
+_PPTX_MARGIN = int(0.4 * _EMU_PER_INCH)
+_PPTX_CONTENT_WIDTH = _PPTX_SLIDE_WIDTH - 2 * _PPTX_MARGIN
+_PPTX_RULE = 6350  # 0.5pt divider under/over the body copy
+_PPTX_FOOTER_RULE = 12700  # 1pt
+# Height reserved below the body copy: QR/agent block, footer and padding
+_PPTX_BODY_SPACE_BELOW = round(2.05 * _EMU_PER_INCH)
+_PPTX_BODY_MIN_HEIGHT = int(0.5 * _EMU_PER_INCH)
+_PPTX_BODY_MAX_HEIGHT = int(1.2 * _EMU_PER_INCH)
+
+
 def build_flyer_pptx(
     listing_data: dict,
     flyer_text: str,
     branding: BrandingConfig,
     photo_paths: list[Path] | None = None,
-) -> io.BytesIO:
+    out: IO[bytes] | None = None,
+) -> IO[bytes]:
     """Generate a branded PPTX flyer. Returns bytes buffer.
 
     Args:
@@ -201,9 +334,11 @@ def build_flyer_pptx(
         flyer_text: AI-generated flyer content.
         branding: Visual branding configuration.
         photo_paths: Local image file paths (hero + secondary).
+        out: Seekable binary stream to write the file into (e.g. a
+            SpooledTemporaryFile headed for upload); a new BytesIO if omitted.
 
     Returns:
-        BytesIO buffer containing the PPTX file.
+        ``out`` (or the new BytesIO) positioned at the start of the PPTX file.
     """
     from pptx import Presentation
     from pptx.dml.color import RGBColor
@@ -217,8 +352,8 @@ def build_flyer_pptx(
     LIGHT_GREY = RGBColor(0xE8, 0xE8, 0xE8)
     ACCENT = RGBColor(*branding.accent_rgb)
 
-    SLIDE_WIDTH = Inches(8.5)
-    SLIDE_HEIGHT = Inches(11)
+    SLIDE_WIDTH = _PPTX_SLIDE_WIDTH
+    SLIDE_HEIGHT = _PPTX_SLIDE_HEIGHT
 
     def _textbox(slide, left, top, width, height, text, size=12,
                  bold=False, italic=False, color=BLACK, align=PP_ALIGN.LEFT,
@@ -263,33 +398,22 @@ def build_flyer_pptx(
             shape.line.fill.background()
         return shape
 
-    def _add_cropped_picture(slide, image_path, left, top, box_width, box_height):
-        with Image.open(image_path) as img:
-            img_w, img_h = img.size
-        box_w_emu = int(box_width)
-        box_h_emu = int(box_height)
-        scale_w = box_w_emu / img_w
-        scale_h = box_h_emu / img_h
-        if scale_w > scale_h:
-            scaled_w = box_w_emu
-            scaled_h = int(img_h * scale_w)
-            pic = slide.shapes.add_picture(str(image_path), left, top, scaled_w, scaled_h)
-            overflow = scaled_h - box_h_emu
-            crop_each = overflow / scaled_h / 2
-            pic.crop_top = crop_each
-            pic.crop_bottom = crop_each
-        else:
-            scaled_w = int(img_w * scale_h)
-            scaled_h = box_h_emu
-            pic = slide.shapes.add_picture(str(image_path), left, top, scaled_w, scaled_h)
-            overflow = scaled_w - box_w_emu
-            crop_each = overflow / scaled_w / 2
-            pic.crop_left = crop_each
-            pic.crop_right = crop_each
-        pic.left = int(left)
-        pic.top = int(top)
-        pic.width = int(box_w_emu)
-        pic.height = int(box_h_emu)
+    def _add_cropped_picture(slide, photo, left, top, box_width, box_height):
+        # Scale to cover the box, then crop the overflow evenly on the long axis
+        _, _, img_w, img_h = photo
+        box_w, box_h = int(box_width), int(box_height)
+        scale = max(box_w / img_w, box_h / img_h)
+        scaled_w = max(box_w, int(img_w * scale))
+        scaled_h = max(box_h, int(img_h * scale))
+        pic = slide.shapes.add_picture(
+            _photo_source(photo, Emu(scaled_w).inches, Emu(scaled_h).inches),
+            left, top, scaled_w, scaled_h,
+        )
+        crop_x = (scaled_w - box_w) / scaled_w / 2
+        crop_y = (scaled_h - box_h) / scaled_h / 2
+        pic.crop_left = pic.crop_right = crop_x
+        pic.crop_top = pic.crop_bottom = crop_y
+        pic.left, pic.top, pic.width, pic.height = int(left), int(top), box_w, box_h
         return pic
 
     prs = Presentation()
@@ -297,15 +421,17 @@ def build_flyer_pptx(
     prs.slide_height = SLIDE_HEIGHT
     slide = prs.slides.add_slide(prs.slide_layouts[6])
 
-    margin = Inches(0.4)
-    content_width = SLIDE_WIDTH - 2 * margin
+    margin = _PPTX_MARGIN
+    content_width = _PPTX_CONTENT_WIDTH
     y = Inches(0.3)
 
-    photos = [Path(p) for p in (photo_paths or []) if Path(p).exists()]
+    photos = _load_photos(photo_paths)
 
     # Header: Logo + headline
     if branding.has_logo:
-        slide.shapes.add_picture(branding.logo_path, margin, y, Inches(1.6), Inches(0.6))
+        slide.shapes.add_picture(
+            io.BytesIO(branding.logo_bytes), margin, y, Inches(1.6), Inches(0.6),
+        )
 
     _textbox(slide, Inches(2.3), y, Inches(5.8), Inches(0.65),
              branding.headline, size=34, bold=True, italic=True,
@@ -372,14 +498,13 @@ def build_flyer_pptx(
     # Body copy
     body = _extract_body_copy(flyer_text)
     has_photos = len(photos) >= 2
-    space_below = Inches(1.0) + Inches(0.5) + Inches(0.2)
-    body_box_h = SLIDE_HEIGHT - y - space_below - Inches(0.35)
-    body_box_h = max(Inches(0.5), min(body_box_h, Inches(1.2)))
+    body_box_h = SLIDE_HEIGHT - y - _PPTX_BODY_SPACE_BELOW
+    body_box_h = max(_PPTX_BODY_MIN_HEIGHT, min(body_box_h, _PPTX_BODY_MAX_HEIGHT))
     body_font = 10 if has_photos else 11
     body_line_spacing = Pt(14) if has_photos else Pt(16)
 
     _filled_rect(slide, margin + Inches(0.6), y,
-                 content_width - Inches(1.2), Emu(6350), LIGHT_GREY)
+                 content_width - Inches(1.2), _PPTX_RULE, LIGHT_GREY)
     y += Inches(0.12)
 
     copy_box = _textbox(slide, margin + Inches(0.4), y,
@@ -392,7 +517,7 @@ def build_flyer_pptx(
     y += body_box_h + Inches(0.03)
 
     _filled_rect(slide, margin + Inches(0.6), y,
-                 content_width - Inches(1.2), Emu(6350), LIGHT_GREY)
+                 content_width - Inches(1.2), _PPTX_RULE, LIGHT_GREY)
     y += Inches(0.15)
 
     # Bottom section: QR | Agent | Logo
@@ -401,9 +526,9 @@ def build_flyer_pptx(
     agent_phone = listing_data.get("listing_agent_phone", "")
 
     qr_url = _build_qr_url(listing_data, branding)
-    qr_path = _generate_qr(qr_url)
+    qr_png = _generate_qr_png(qr_url)
     qr_size = Inches(0.95)
-    slide.shapes.add_picture(qr_path, margin + Inches(0.1), y, qr_size, qr_size)
+    slide.shapes.add_picture(io.BytesIO(qr_png), margin + Inches(0.1), y, qr_size, qr_size)
     _textbox(slide, margin, y + qr_size + Inches(0.02), Inches(1.2), Inches(0.18),
              "Scan for Details", size=7, color=ACCENT, align=PP_ALIGN.CENTER, bold=True)
 
@@ -420,14 +545,14 @@ def build_flyer_pptx(
 
     if branding.has_logo:
         slide.shapes.add_picture(
-            branding.logo_path, SLIDE_WIDTH - margin - Inches(1.7), y + Inches(0.05),
+            io.BytesIO(branding.logo_bytes), SLIDE_WIDTH - margin - Inches(1.7), y + Inches(0.05),
             Inches(1.6), Inches(0.6),
         )
 
     y += Inches(1.0)
 
     # Footer
-    _filled_rect(slide, margin, y, content_width, Emu(12700), BLACK)
+    _filled_rect(slide, margin, y, content_width, _PPTX_FOOTER_RULE, BLACK)
     y += Inches(0.06)
     col_w = content_width // 3
 
@@ -448,9 +573,10 @@ def build_flyer_pptx(
     border.line.color.rgb = BLACK
     border.line.width = Pt(1.5)
 
-    buf = io.BytesIO()
+    buf = io.BytesIO() if out is None else out
+    start = buf.tell()
     prs.save(buf)
-    buf.seek(0)
+    buf.seek(start)
     return buf
 
 
@@ -461,7 +587,8 @@ def build_flyer_pdf(
     flyer_text: str,
     branding: BrandingConfig,
     photo_paths: list[Path] | None = None,
-) -> io.BytesIO:
+    out: IO[bytes] | None = None,
+) -> IO[bytes]:
     """Generate a branded PDF flyer. Returns bytes buffer.
 
     Args:
@@ -469,9 +596,11 @@ def build_flyer_pdf(
         flyer_text: AI-generated flyer content.
         branding: Visual branding configuration.
         photo_paths: Local image file paths (hero + secondary).
+        out: Seekable binary stream to write the file into; a new BytesIO if
+            omitted.
 
     Returns:
-        BytesIO buffer containing the PDF file.
+        ``out`` (or the new BytesIO) positioned at the start of the PDF file.
     """
     from fpdf import FPDF
 
@@ -490,22 +619,25 @@ def build_flyer_pdf(
     def _in(inches: float) -> float:
         return inches * 25.4
 
-    def _fit_image_in_box(pdf, image_path, x, y, box_w, box_h):
-        with Image.open(str(image_path)) as img:
-            img_w_px, img_h_px = img.size
+    def _fit_image_in_box(pdf, photo, x, y, box_w, box_h):
+        _, _, img_w_px, img_h_px = photo
         scale = max(box_w / img_w_px, box_h / img_h_px)
         render_w = img_w_px * scale
         render_h = img_h_px * scale
         offset_x = x - (render_w - box_w) / 2
         offset_y = y - (render_h - box_h) / 2
         with pdf.rect_clip(x=x, y=y, w=box_w, h=box_h):
-            pdf.image(str(image_path), x=offset_x, y=offset_y, w=render_w, h=render_h)
+            source = _photo_source(photo, render_w / 25.4, render_h / 25.4)
+            pdf.image(source, x=offset_x, y=offset_y, w=render_w, h=render_h)
 
+    # A fresh document per flyer is cheap (~50us): fpdf2 keeps the core-font
+    # metrics in module-level tables. Instances can't be pooled anyway, since
+    # output() closes the document for good.
     pdf = FPDF(orientation="P", unit="mm", format="Letter")
     pdf.set_auto_page_break(auto=False)
     pdf.add_page()
 
-    photos = [Path(p) for p in (photo_paths or []) if Path(p).exists()]
+    photos = _load_photos(photo_paths)
     y = _in(0.3)
 
     # Page border
@@ -515,12 +647,13 @@ def build_flyer_pdf(
 
     # Header
     if branding.has_logo:
-        pdf.image(branding.logo_path, x=MARGIN, y=y, w=_in(1.6), h=_in(0.6))
+        pdf.image(io.BytesIO(branding.logo_bytes), x=MARGIN, y=y, w=_in(1.6), h=_in(0.6))
 
     pdf.set_font("Times", "BI", 28)
     pdf.set_text_color(*ACCENT)
-    text_w = pdf.get_string_width(branding.headline)
-    pdf.text(x=MARGIN + CONTENT_W - text_w, y=y + _in(0.42), text=branding.headline)
+    headline = _sanitize_text(branding.headline)
+    text_w = pdf.get_string_width(headline)
+    pdf.text(x=MARGIN + CONTENT_W - text_w, y=y + _in(0.42), text=headline)
 
     y += _in(0.75)
 
@@ -583,14 +716,17 @@ def build_flyer_pdf(
         col2 = features[mid:]
         col_w = CONTENT_W / 2
         row_h = _in(0.22)
+        rows = [
+            (col_x, y + row_h * i + row_h * 0.7, _sanitize_text(f"\u00bb  {feat}"))
+            for col_x, column in ((MARGIN + _in(0.15), col1), (MARGIN + col_w + _in(0.15), col2))
+            for i, feat in enumerate(column)
+        ]
         pdf.set_font("Helvetica", "B", 8.5)
         pdf.set_text_color(*DARK_GREY)
-        for i, feat in enumerate(col1):
-            pdf.text(x=MARGIN + _in(0.15), y=y + row_h * i + row_h * 0.7,
-                     text=_sanitize_text(f"\u00bb  {feat}"))
-        for i, feat in enumerate(col2):
-            pdf.text(x=MARGIN + col_w + _in(0.15), y=y + row_h * i + row_h * 0.7,
-                     text=_sanitize_text(f"\u00bb  {feat}"))
+        # pdf.text is fpdf2's cheapest primitive; cell() adds box/alignment work
+        # (~9x slower per row) and would shift the baselines
+        for x, row_y, text in rows:
+            pdf.text(x=x, y=row_y, text=text)
         y += row_h * max(len(col1), len(col2)) + _in(0.1)
 
     # Body copy
@@ -615,9 +751,9 @@ def build_flyer_pdf(
     agent_phone = _sanitize_text(listing_data.get("listing_agent_phone", ""))
 
     qr_url = _build_qr_url(listing_data, branding)
-    qr_path = _generate_qr(qr_url)
+    qr_png = _generate_qr_png(qr_url)
     qr_size = _in(0.95)
-    pdf.image(qr_path, x=MARGIN + _in(0.1), y=y, w=qr_size, h=qr_size)
+    pdf.image(io.BytesIO(qr_png), x=MARGIN + _in(0.1), y=y, w=qr_size, h=qr_size)
 
     pdf.set_font("Helvetica", "B", 6)
     pdf.set_text_color(*ACCENT)
@@ -643,7 +779,7 @@ def build_flyer_pdf(
         pdf.text(x=agent_x, y=y + _in(0.6), text="  |  ".join(contact_parts))
 
     if branding.has_logo:
-        pdf.image(branding.logo_path, x=PAGE_W - MARGIN - _in(1.6),
+        pdf.image(io.BytesIO(branding.logo_bytes), x=PAGE_W - MARGIN - _in(1.6),
                   y=y + _in(0.05), w=_in(1.6), h=_in(0.6))
 
     y += _in(1.15)
@@ -661,23 +797,30 @@ def build_flyer_pdf(
     tagline = _sanitize_text(branding.tagline or branding.brokerage_name)
     pdf.text(x=MARGIN, y=y + 3.5, text=tagline)
 
+    def _sanitized_widths(lines):
+        # Sanitize once and measure the same text that is drawn, under the
+        # block's current font (core fonts reject non-Latin-1 characters)
+        lines = [_sanitize_text(line) for line in lines]
+        return lines, [pdf.get_string_width(line) for line in lines]
+
     if branding.brokerage_address:
         pdf.set_font("Helvetica", "", fs)
-        for i, line in enumerate(branding.brokerage_address.split("\n")[:3]):
-            lw = pdf.get_string_width(line)
+        lines, widths = _sanitized_widths(branding.brokerage_address.split("\n")[:3])
+        for i, (line, lw) in enumerate(zip(lines, widths, strict=True)):
             pdf.text(x=MARGIN + col_w + (col_w - lw) / 2,
-                     y=y + 3.0 + i * (fs * 0.42), text=_sanitize_text(line))
+                     y=y + 3.0 + i * (fs * 0.42), text=line)
 
     pdf.set_font("Helvetica", "B", fs)
     right_lines = [v for v in [branding.brokerage_phone, branding.brokerage_website] if v]
-    for i, line in enumerate(right_lines):
-        lw = pdf.get_string_width(line)
+    lines, widths = _sanitized_widths(right_lines)
+    for i, (line, lw) in enumerate(zip(lines, widths, strict=True)):
         pdf.text(x=MARGIN + 2 * col_w + (col_w - lw),
-                 y=y + 3.5 + i * (fs * 0.42), text=_sanitize_text(line))
+                 y=y + 3.5 + i * (fs * 0.42), text=line)
 
-    buf = io.BytesIO()
+    buf = io.BytesIO() if out is None else out
+    start = buf.tell()
     pdf.output(buf)
-    buf.seek(0)
+    buf.seek(start)
     return buf
 
 
@@ -694,13 +837,34 @@ class FlyerService:
         listing_data: dict,
         flyer_text: str,
         photo_paths: list[Path] | None = None,
-    ) -> io.BytesIO:
-        return build_flyer_pptx(listing_data, flyer_text, self.branding, photo_paths)
+        out: IO[bytes] | None = None,
+    ) -> IO[bytes]:
+        return build_flyer_pptx(listing_data, flyer_text, self.branding, photo_paths, out)
 
     def generate_pdf(
         self,
         listing_data: dict,
         flyer_text: str,
         photo_paths: list[Path] | None = None,
-    ) -> io.BytesIO:
-        return build_flyer_pdf(listing_data, flyer_text, self.branding, photo_paths)
+        out: IO[bytes] | None = None,
+    ) -> IO[bytes]:
+        return build_flyer_pdf(listing_data, flyer_text, self.branding, photo_paths, out)
+
+    def generate_both(
+        self,
+        listing_data: dict,
+        flyer_text: str,
+        photo_paths: list[Path] | None = None,
+    ) -> tuple[io.BytesIO, io.BytesIO]:
+        """Generate the PPTX and PDF flyers together; returns ``(pptx, pdf)``.
+
+        The QR code and photo sizes are prepared once up front so both
+        builders start from warm caches, then the builders run on two threads
+        (image decoding and zlib compression release the GIL).
+        """
+        _load_photos(photo_paths)
+        _generate_qr_png(_build_qr_url(listing_data, self.branding))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            pptx = pool.submit(self.generate_pptx, listing_data, flyer_text, photo_paths)
+            pdf = pool.submit(self.generate_pdf, listing_data, flyer_text, photo_paths)
+            return pptx.result(), pdf.result()
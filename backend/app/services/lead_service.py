@@ -1,20 +1,58 @@
+import base64
+import binascii
+import json
 from datetime import UTC, datetime
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import String, func, literal, select
+import redis.exceptions as redis_exceptions
+from sqlalchemy import String, func, insert, literal, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
+from app.core.redis import get_redis
 from app.models.agent_page import AgentPage
-from app.models.lead import Lead
+from app.models.lead import PIPELINE_STATUSES, Lead
 from app.models.lead_activity import LeadActivity
 from app.models.page_visit import PageVisit
 from app.models.tenant import Tenant
 from app.models.user import User
 
 
-VALID_STATUSES = {"new", "contacted", "showing", "under_contract", "closed", "lost"}
+VALID_STATUSES = frozenset(PIPELINE_STATUSES)
 
-PIPELINE_ORDER = ["new", "contacted", "showing", "under_contract", "closed", "lost"]
+PIPELINE_ORDER = list(PIPELINE_STATUSES)
+
+# Redis list of JSON-encoded page visits awaiting a batched INSERT by the
+# flush_page_visits task (at-least-once: rows carry their own primary key).
+PAGE_VISIT_BUFFER_KEY = "page_visits:buffer"
+
+_VISIT_UUID_FIELDS = ("id", "tenant_id", "agent_page_id", "listing_id")
+
+_REDIS_ERRORS = (redis_exceptions.RedisError, ConnectionError, OSError, RuntimeError)
+
+
+def _encode_cursor(lead: Lead) -> str:
+    """Opaque keyset cursor pointing just past ``lead`` in list order."""
+    raw = f"{lead.created_at.isoformat()}|{lead.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, lead_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(lead_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def decode_page_visit(raw: str) -> dict:
+    """Column values of a page visit buffered by LeadService.record_visit."""
+    row = json.loads(raw)
+    for field in _VISIT_UUID_FIELDS:
+        if row.get(field) is not None:
+            row[field] = UUID(row[field])
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
 
 
 class LeadService:
@@ -27,25 +65,21 @@ class LeadService:
         self, tenant_slug: str, agent_slug: str,
     ) -> tuple[Tenant, AgentPage] | None:
         """Look up tenant and agent page by slugs. Returns None if not found."""
+        # One round trip on every landing-page hit: both slug lookups are
+        # unique-index probes (tenants.slug, uq_agent_pages_tenant_slug).
         result = await self.db.execute(
-            select(Tenant).where(Tenant.slug == tenant_slug)
-        )
-        tenant = result.scalar_one_or_none()
-        if not tenant:
-            return None
-
-        result = await self.db.execute(
-            select(AgentPage).where(
-                AgentPage.tenant_id == tenant.id,
+            select(Tenant, AgentPage)
+            .join(AgentPage, AgentPage.tenant_id == Tenant.id)
+            .where(
+                Tenant.slug == tenant_slug,
                 AgentPage.slug == agent_slug,
                 AgentPage.is_active.is_(True),
             )
         )
-        agent_page = result.scalar_one_or_none()
-        if not agent_page:
+        row = result.one_or_none()
+        if not row:
             return None
-
-        return tenant, agent_page
+        return row.tuple()
 
     # ── Public: create lead ─────────────────────────────────────
 
@@ -125,25 +159,39 @@ class LeadService:
         landing_url: str | None = None,
         ip_address: str | None = None,
         user_agent: str | None = None,
-    ) -> PageVisit:
-        visit = PageVisit(
-            tenant_id=tenant.id,
-            agent_page_id=agent_page.id,
-            listing_id=listing_id,
-            session_id=session_id,
-            utm_source=utm_source,
-            utm_medium=utm_medium,
-            utm_campaign=utm_campaign,
-            utm_content=utm_content,
-            utm_term=utm_term,
-            referrer_url=referrer_url,
-            landing_url=landing_url,
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
-        self.db.add(visit)
+    ) -> None:
+        """Record a landing-page hit.
+
+        Visits are appended to a Redis buffer that the flush_page_visits task
+        writes to page_visits in batches, so a page hit costs no INSERT. If
+        Redis is unavailable the visit is inserted directly.
+        """
+        row = {
+            "id": uuid4(),
+            "tenant_id": tenant.id,
+            "agent_page_id": agent_page.id,
+            "listing_id": listing_id,
+            "session_id": session_id,
+            "utm_source": utm_source,
+            "utm_medium": utm_medium,
+            "utm_campaign": utm_campaign,
+            "utm_content": utm_content,
+            "utm_term": utm_term,
+            "referrer_url": referrer_url,
+            "landing_url": landing_url,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.now(UTC),
+        }
+        try:
+            redis = await get_redis()
+            await redis.rpush(PAGE_VISIT_BUFFER_KEY, json.dumps(row, default=str))
+            return
+        except _REDIS_ERRORS:
+            pass
+
+        self.db.add(PageVisit(**row))
         await self.db.flush()
-        return visit
 
     # ── Authenticated: list leads ───────────────────────────────
 
@@ -154,11 +202,21 @@ class LeadService:
         agent_id: UUID | None = None,
         pipeline_status: str | None = None,
         utm_source: str | None = None,
+        cursor: str | None = None,
         page: int = 1,
         page_size: int = 20,
+        include_total: bool | None = None,
         user_role: str = "agent",
         current_user_id: UUID | None = None,
-    ) -> tuple[list[Lead], int]:
+    ) -> tuple[list[Lead], int | None, str | None]:
+        """List leads newest first; returns ``(leads, total, next_cursor)``.
+
+        With a ``cursor`` (from a previous call's ``next_cursor``) the page is
+        fetched by keyset on ``(created_at, id)``, which costs the same at any
+        depth. ``page`` is the deprecated OFFSET fallback. The total is counted
+        for page-based calls and for cursor calls only when ``include_total``
+        is set, since the count scans every matching lead.
+        """
         query = select(Lead).where(Lead.tenant_id == tenant_id)
 
         # Agents see only their own leads
@@ -172,18 +230,43 @@ class LeadService:
         if utm_source:
             query = query.where(Lead.utm_source == utm_source)
 
-        # Count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar()
-
-        # Paginate
-        query = query.order_by(Lead.created_at.desc())
-        query = query.offset((page - 1) * page_size).limit(page_size)
-        result = await self.db.execute(query)
-        leads = result.scalars().all()
-
-        return leads, total
+        if include_total is None:
+            include_total = cursor is None
+        filtered = query
+
+        # Paginate, joining in each lead's agent name for the response
+        query = query.options(joinedload(Lead.agent).load_only(User.id, User.full_name))
+        query = query.order_by(Lead.created_at.desc(), Lead.id.desc())
+        if cursor:
+            query = query.where(tuple_(Lead.created_at, Lead.id) < _decode_cursor(cursor))
+        else:
+            query = query.offset((page - 1) * page_size)
+
+        # On offset pages the total rides along with every row: the window
+        # count runs over the filtered set before OFFSET/LIMIT apply.
+        windowed = include_total and not cursor
+        if windowed:
+            query = query.add_columns(func.count().over())
+        result = await self.db.execute(query.limit(page_size))
+        total = None
+        if windowed:
+            rows = result.all()
+            leads = [row[0] for row in rows]
+            if rows:
+                total = rows[0][1]
+            elif page == 1:
+                total = 0
+        else:
+            leads = result.scalars().all()
+
+        # Keyset pages (and offset pages past the end) never see the whole set
+        if include_total and total is None:
+            count_query = select(func.count()).select_from(filtered.subquery())
+            total_result = await self.db.execute(count_query)
+            total = total_result.scalar()
+
+        next_cursor = _encode_cursor(leads[-1]) if len(leads) == page_size else None
+        return leads, total, next_cursor
 
     # ── Authenticated: update lead ──────────────────────────────
 
@@ -236,6 +319,72 @@ class LeadService:
         self.db.add(lead)
         return lead
 
+    async def bulk_transition(
+        self,
+        user: User,
+        lead_ids: list[UUID],
+        pipeline_status: str,
+    ) -> list[UUID]:
+        """Move many leads to ``pipeline_status`` without loading them.
+
+        One UPDATE moves every lead of the user's tenant in ``lead_ids`` that
+        isn't already in that status (only their own leads for agents), and
+        one multi-row INSERT logs a status_change activity per moved lead.
+        Leads already loaded into the session are not refreshed.
+
+        Returns:
+            IDs of the leads that changed status.
+        """
+        if pipeline_status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status: {pipeline_status}")
+        if not lead_ids:
+            return []
+
+        # Lock the target rows while reading their current status, so the
+        # activity log records what each UPDATE actually replaced.
+        previous = (
+            select(Lead.id, Lead.pipeline_status)
+            .where(
+                Lead.tenant_id == user.tenant_id,
+                Lead.id.in_(lead_ids),
+                Lead.pipeline_status != pipeline_status,
+            )
+            .with_for_update()
+        )
+        if user.role == "agent":
+            previous = previous.where(Lead.agent_id == user.id)
+        previous = previous.subquery()
+
+        values = {"pipeline_status": pipeline_status}
+        # Also stamped by the trg_leads_closed_at trigger; set here too so
+        # the service behaves the same against a schema without it.
+        if pipeline_status == "closed":
+            values["closed_at"] = datetime.now(UTC)
+
+        result = await self.db.execute(
+            update(Lead)
+            .where(Lead.id == previous.c.id)
+            .values(values)
+            .returning(Lead.id, previous.c.pipeline_status)
+            .execution_options(synchronize_session=False)
+        )
+        moved = result.all()
+        if moved:
+            await self.db.execute(
+                insert(LeadActivity),
+                [
+                    {
+                        "lead_id": lead_id,
+                        "user_id": user.id,
+                        "activity_type": "status_change",
+                        "old_value": old_status,
+                        "new_value": pipeline_status,
+                    }
+                    for lead_id, old_status in moved
+                ],
+            )
+        return [lead_id for lead_id, _ in moved]
+
     # ── Authenticated: add activity ─────────────────────────────
 
     async def add_activity(
@@ -259,58 +408,48 @@ class LeadService:
     # ── Analytics ───────────────────────────────────────────────
 
     async def get_summary(self, tenant_id: UUID) -> dict:
-        # Total leads
-        total_result = await self.db.execute(
-            select(func.count(Lead.id)).where(Lead.tenant_id == tenant_id)
-        )
-        total = total_result.scalar()
-
-        # By status
-        status_result = await self.db.execute(
-            select(Lead.pipeline_status, func.count(Lead.id))
-            .where(Lead.tenant_id == tenant_id)
-            .group_by(Lead.pipeline_status)
-        )
-        by_status = {row[0]: row[1] for row in status_result.all()}
-
-        # By source
-        direct_label = literal("direct", String)
-        source_result = await self.db.execute(
-            select(
-                func.coalesce(Lead.utm_source, direct_label),
-                func.count(Lead.id),
-            )
-            .where(Lead.tenant_id == tenant_id)
-            .group_by(func.coalesce(Lead.utm_source, direct_label))
-        )
-        by_source = {row[0]: row[1] for row in source_result.all()}
-
-        # By agent
-        agent_result = await self.db.execute(
+        # One pass over the tenant's leads: GROUPING SETS returns the status,
+        # source and agent breakdowns as rows of a single result, tagged by
+        # grouping() (1 = status row, 2 = source row, 3 = agent row).
+        source = func.coalesce(Lead.utm_source, literal("direct", String))
+        result = await self.db.execute(
             select(
-                User.full_name,
+                func.grouping(Lead.pipeline_status, source),
+                Lead.pipeline_status,
+                source,
                 User.id,
+                User.full_name,
                 func.count(Lead.id),
+                func.sum(Lead.closed_value),
             )
-            .join(User, Lead.agent_id == User.id)
+            .outerjoin(User, Lead.agent_id == User.id)
             .where(Lead.tenant_id == tenant_id)
-            .group_by(User.id, User.full_name)
-            .order_by(func.count(Lead.id).desc())
-        )
-        by_agent = [
-            {"agent_name": row[0], "agent_id": str(row[1]), "count": row[2]}
-            for row in agent_result.all()
-        ]
-
-        # Total closed value
-        closed_result = await self.db.execute(
-            select(func.sum(Lead.closed_value))
-            .where(Lead.tenant_id == tenant_id, Lead.pipeline_status == "closed")
+            .group_by(func.grouping_sets(
+                Lead.pipeline_status, source, tuple_(User.id, User.full_name),
+            ))
         )
-        total_closed = closed_result.scalar()
+
+        by_status = {}
+        by_source = {}
+        by_agent = []
+        total_closed = None
+        # Column rows, not entities: iterate the result directly rather than
+        # materializing a list of them first
+        for grouping, status, src, agent_id, agent_name, count, value in result:
+            if grouping == 1:
+                by_status[status] = count
+                if status == "closed":
+                    total_closed = value
+            elif grouping == 2:
+                by_source[src] = count
+            elif agent_id is not None:
+                by_agent.append(
+                    {"agent_name": agent_name, "agent_id": str(agent_id), "count": count}
+                )
+        by_agent.sort(key=lambda agent: agent["count"], reverse=True)
 
         return {
-            "total_leads": total,
+            "total_leads": sum(by_status.values()),
             "by_status": by_status,
             "by_source": by_source,
             "by_agent": by_agent,
@@ -318,17 +457,14 @@ class LeadService:
         }
 
     async def get_funnel(self, tenant_id: UUID) -> tuple[list[dict], int]:
-        total_result = await self.db.execute(
-            select(func.count(Lead.id)).where(Lead.tenant_id == tenant_id)
-        )
-        total = total_result.scalar() or 0
-
         status_result = await self.db.execute(
             select(Lead.pipeline_status, func.count(Lead.id))
             .where(Lead.tenant_id == tenant_id)
             .group_by(Lead.pipeline_status)
         )
-        counts = {row[0]: row[1] for row in status_result.all()}
+        counts = {status: count for status, count in status_result}
+        # pipeline_status is NOT NULL, so the status counts cover every lead
+        total = sum(counts.values())
 
         funnel = []
         for status in PIPELINE_ORDER:
@@ -1,10 +1,51 @@
+from datetime import UTC, datetime
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.listing import Listing
 
+# Rows per multi-row upsert statement (~30 bind params per row keeps this
+# well under asyncpg's 32767-parameter limit)
+BULK_UPSERT_CHUNK_SIZE = 500
+
+# xmax is 0 on a freshly inserted row and non-zero on one ON CONFLICT updated
+_IS_NEW = literal_column("xmax = 0").label("is_new")
+
+
+def _mls_upsert(tenant_id: UUID, mls_connection_id: UUID, rows: list[dict]):
+    """INSERT ... ON CONFLICT statement upserting rows that share one key set.
+
+    The unique (tenant_id, mls_listing_id) index detects existing listings.
+    Updates coalesce each incoming value with the stored one, so a field the
+    feed sent as None keeps its current value; mls_listing_id and
+    mls_connection_id are never rewritten.
+    """
+    columns = Listing.__table__.c
+    stmt = pg_insert(Listing).values([
+        {"tenant_id": tenant_id, "mls_connection_id": mls_connection_id, **row}
+        for row in rows
+    ])
+    updates = {
+        key: func.coalesce(stmt.excluded[key], columns[key])
+        for key in rows[0]
+        if key != "mls_listing_id"
+    }
+    # Core upserts bypass the ORM's onupdate hook
+    updates["updated_at"] = datetime.now(UTC)
+    return stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "mls_listing_id"],
+        index_where=columns.mls_listing_id.is_not(None),
+        set_=updates,
+    )
+
+
+def _listing_columns(mls_data: dict) -> dict:
+    columns = Listing.__table__.c
+    return {key: value for key, value in mls_data.items() if key in columns}
+
 
 class ListingService:
     def __init__(self, db: AsyncSession):
@@ -22,32 +63,56 @@ class ListingService:
             Tuple of (listing, is_new) where is_new is True if the listing
             was created (not just updated).
         """
-        mls_listing_id = mls_data.get("mls_listing_id")
-
-        # Check for existing listing
+        stmt = _mls_upsert(tenant_id, mls_connection_id, [_listing_columns(mls_data)])
         result = await self.db.execute(
-            select(Listing).where(
-                Listing.tenant_id == tenant_id,
-                Listing.mls_listing_id == mls_listing_id,
-            )
+            stmt.returning(Listing, _IS_NEW),
+            execution_options={"populate_existing": True},
         )
-        listing = result.scalar_one_or_none()
-
-        if listing:
-            # Update existing
-            for key, value in mls_data.items():
-                if hasattr(listing, key) and value is not None:
-                    setattr(listing, key, value)
-            is_new = False
-        else:
-            # Create new
-            listing = Listing(
-                tenant_id=tenant_id,
-                mls_connection_id=mls_connection_id,
-                **mls_data,
-            )
-            self.db.add(listing)
-            is_new = True
-
-        await self.db.flush()
+        listing, is_new = result.one()
         return listing, is_new
+
+    async def bulk_upsert_from_mls(
+        self,
+        tenant_id: UUID,
+        mls_connection_id: UUID,
+        rows: list[dict],
+    ) -> list[tuple[UUID, bool]]:
+        """Upsert many normalized MLS listings in as few statements as possible.
+
+        Same semantics as upsert_from_mls, but rows are written with multi-row
+        INSERT ... ON CONFLICT statements (grouped by key set, since one
+        statement needs uniform columns) and no ORM objects are built. A
+        listing repeated within ``rows`` is merged into one row first, later
+        non-None values winning, because one statement can't update a row
+        twice.
+
+        Returns:
+            ``(listing_id, is_new)`` per distinct listing written.
+        """
+        merged: dict[str, dict] = {}
+        unkeyed: list[dict] = []
+        for mls_data in rows:
+            values = _listing_columns(mls_data)
+            mls_listing_id = values.get("mls_listing_id")
+            if mls_listing_id is None:
+                unkeyed.append(values)
+            elif mls_listing_id in merged:
+                previous = merged[mls_listing_id]
+                previous.update((k, v) for k, v in values.items() if v is not None)
+                for key in values.keys() - previous.keys():
+                    previous[key] = None
+            else:
+                merged[mls_listing_id] = values
+
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for values in (*merged.values(), *unkeyed):
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+
+        written: list[tuple[UUID, bool]] = []
+        for group in groups.values():
+            for start in range(0, len(group), BULK_UPSERT_CHUNK_SIZE):
+                chunk = group[start:start + BULK_UPSERT_CHUNK_SIZE]
+                stmt = _mls_upsert(tenant_id, mls_connection_id, chunk)
+                result = await self.db.execute(stmt.returning(Listing.id, _IS_NEW))
+                written.extend(result.tuples())
+        return written
@@ -53,30 +53,79 @@ def lookup(listing_data: dict, market_areas: list[dict]) -> dict | None:
     zip_code = (listing_data.get("address_zip") or "").strip()
     county = (listing_data.get("county") or "").strip().lower()
 
-    by_zip: dict[str, dict] = {}
-    by_city: dict[str, dict] = {}
-    by_county: dict[str, dict] = {}
-    default = None
-
-    for area in market_areas:
-        if not isinstance(area, dict):
-            continue
-        for z in area.get("zip_codes", []):
-            by_zip[str(z)] = area
-        for c in area.get("cities", []):
-            by_city[c.lower()] = area
-        for cn in area.get("counties", []):
-            by_county[cn.lower()] = area
-        if area.get("name", "").lower() == "default":
-            default = area
-
-    if zip_code and zip_code in by_zip:
-        return by_zip[zip_code]
-    if city and city in by_city:
-        return by_city[city]
-    if county and county in by_county:
-        return by_county[county]
-    return default
+    # Scan per criterion instead of indexing every area up front: the areas
+    # are reloaded from tenant settings for each generation, so an index (or
+    # a cache key built from the areas) costs more than the scan it replaces.
+    # Scanning from the end keeps the later-area-wins precedence of
+    # overlapping entries.
+    if zip_code:
+        area = _last_zip_match(market_areas, zip_code)
+        if area:
+            return area
+    if city:
+        area = _last_name_match(market_areas, "cities", city)
+        if area:
+            return area
+    if county:
+        area = _last_name_match(market_areas, "counties", county)
+        if area:
+            return area
+    for area in reversed(market_areas):
+        if isinstance(area, dict) and area.get("name", "").lower() == "default":
+            return area
+    return None
+
+
+def _last_zip_match(market_areas: list[dict], zip_code: str) -> dict | None:
+    """Return the last area listing ``zip_code``, as a string or a JSON number."""
+    # Membership tests run in C; only the numeric form of a canonical zip
+    # needs a second probe (str(33308) == "33308", but "02134" has none).
+    as_number = int(zip_code) if zip_code.isdecimal() and zip_code[0] != "0" else None
+    for area in reversed(market_areas):
+        if isinstance(area, dict):
+            zip_codes = area.get("zip_codes", ())
+            if zip_code in zip_codes or (as_number is not None and as_number in zip_codes):
+                return area
+    return None
+
+
+def _last_name_match(market_areas: list[dict], key: str, name: str) -> dict | None:
+    """Return the last area whose ``key`` list contains ``name`` case-insensitively."""
+    for area in reversed(market_areas):
+        if isinstance(area, dict):
+            for candidate in area.get(key, ()):
+                if candidate.lower() == name:
+                    return area
+    return None
+
+
+def _price_trend(yoy) -> str:
+    direction = "up" if yoy > 0 else "down"
+    return f"Price Trend: {direction} {abs(yoy):.1f}% year-over-year"
+
+
+def _months_supply(months) -> str:
+    if months < 4:
+        market_type = "seller's market"
+    elif months > 6:
+        market_type = "buyer's market"
+    else:
+        market_type = "balanced market"
+    return f"Months of Supply: {months:.1f} ({market_type})"
+
+
+# (stat key, line renderer) in prompt order; stats that are missing or zero
+# are left out.
+_STAT_RENDERERS = (
+    ("median_price", lambda v: f"Median Sale Price: ${v:,.0f}"),
+    ("median_price_yoy", _price_trend),
+    ("median_dom", lambda v: f"Median Days on Market: {v}"),
+    ("active_inventory", lambda v: f"Active Inventory: {v:,} listings"),
+    ("months_supply", _months_supply),
+    ("avg_price_per_sqft", lambda v: f"Avg Price/Sqft: ${v:,.0f}"),
+    ("sale_to_list_ratio", lambda v: f"Sale-to-List Ratio: {v:.1f}%"),
+    ("note", lambda v: f"Note: {v}"),
+)
 
 
 def build_market_section(listing_data: dict, market_areas: list[dict]) -> str:
@@ -92,42 +141,12 @@ def build_market_section(listing_data: dict, market_areas: list[dict]) -> str:
     area = lookup(listing_data, market_areas)
     if not area:
         return ""
-
-    parts = ["MARKET CONTEXT:"]
-    name = area.get("name", "Local Market")
-    parts.append(f"Area: {name}")
-
     stats = area.get("stats", {})
     if not stats:
         return ""
 
-    if stats.get("median_price"):
-        parts.append(f"Median Sale Price: ${stats['median_price']:,.0f}")
-    if stats.get("median_price_yoy"):
-        direction = "up" if stats["median_price_yoy"] > 0 else "down"
-        yoy = abs(stats['median_price_yoy'])
-        parts.append(
-            f"Price Trend: {direction} {yoy:.1f}%"
-            " year-over-year"
-        )
-    if stats.get("median_dom"):
-        parts.append(f"Median Days on Market: {stats['median_dom']}")
-    if stats.get("active_inventory"):
-        parts.append(f"Active Inventory: {stats['active_inventory']:,} listings")
-    if stats.get("months_supply"):
-        ms = stats["months_supply"]
-        if ms < 4:
-            market_type = "seller's market"
-        elif ms > 6:
-            market_type = "buyer's market"
-        else:
-            market_type = "balanced market"
-        parts.append(f"Months of Supply: {ms:.1f} ({market_type})")
-    if stats.get("avg_price_per_sqft"):
-        parts.append(f"Avg Price/Sqft: ${stats['avg_price_per_sqft']:,.0f}")
-    if stats.get("sale_to_list_ratio"):
-        parts.append(f"Sale-to-List Ratio: {stats['sale_to_list_ratio']:.1f}%")
-    if stats.get("note"):
-        parts.append(f"Note: {stats['note']}")
-
-    return "\n".join(parts) if len(parts) > 2 else ""
+    lines = [render(stats[key]) for key, render in _STAT_RENDERERS if stats.get(key)]
+    if not lines:
+        return ""
+    name = area.get("name", "Local Market")
+    return "\n".join(["MARKET CONTEXT:", f"Area: {name}", *lines])
@@ -1,57 +1,198 @@
+import asyncio
+import functools
+import hashlib
+import json
+import tempfile
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO
 
 import boto3
+import botocore.config
 import botocore.exceptions
+import redis.asyncio as aioredis
+import redis.exceptions as redis_exceptions
 import structlog
 from fastapi import UploadFile
 
 from app.config import get_settings
+from app.core.redis import get_redis
 
 logger = structlog.get_logger()
 
+# Downloads up to this size stay in memory while spooling; larger spill to disk
+_SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Redis map of media_id -> S3 key, so presigning needn't LIST the bucket to
+# recover the extension. Keys never change once written; the TTL only bounds
+# how long entries for deleted objects linger.
+MEDIA_KEY_TTL_SECONDS = 30 * 24 * 3600
+
+# Signed GET URLs, reused until halfway through their lifetime so a client
+# always gets at least PRESIGN_TTL_SECONDS / 2 of validity. Signing is pure
+# HMAC work, but photo-heavy pages presign the same set over and over.
+PRESIGN_TTL_SECONDS = 3600
+_PRESIGN_CACHE_SIZE = 4096
+_presign_cache: OrderedDict[tuple[str, str], tuple[float, dict]] = OrderedDict()
+
+_REDIS_ERRORS = (redis_exceptions.RedisError, ConnectionError, OSError, RuntimeError)
+
+# boto3 is synchronous, so S3 network calls run in threads. A dedicated pool
+# caps concurrent transfers per process and keeps a burst of slow uploads
+# from occupying the event loop's default executor.
+_s3_pool: ThreadPoolExecutor | None = None
+
+
+def _s3_executor() -> ThreadPoolExecutor:
+    global _s3_pool
+    if _s3_pool is None:
+        _s3_pool = ThreadPoolExecutor(
+            max_workers=get_settings().s3_transfer_workers, thread_name_prefix="s3",
+        )
+    return _s3_pool
+
+
+def shutdown_s3_pool() -> None:
+    """Stop the S3 transfer threads (called on app shutdown)."""
+    global _s3_pool
+    if _s3_pool is not None:
+        _s3_pool.shutdown(wait=False, cancel_futures=True)
+        _s3_pool = None
+
+
+async def _run_in_s3_pool(fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(
+        _s3_executor(), functools.partial(fn, *args, **kwargs),
+    )
+
+
+@functools.cache
+def _s3_client():
+    """Process-wide S3 client.
+
+    boto3 clients are thread-safe, and building one resolves credentials and
+    endpoints each time. Sharing it also shares its HTTP connection pool, so
+    requests reuse warm TLS connections instead of opening their own.
+    """
+    settings = get_settings()
+    return boto3.client(
+        "s3",
+        endpoint_url=settings.s3_endpoint_url,
+        aws_access_key_id=settings.s3_access_key,
+        aws_secret_access_key=settings.s3_secret_key,
+        region_name=settings.s3_region,
+        config=botocore.config.Config(max_pool_connections=settings.s3_max_pool_connections),
+    )
+
+
+def media_key_cache_key(tenant_id: str, media_id: str) -> str:
+    """Redis key holding the S3 object key for an uploaded media item."""
+    return f"media_key:{tenant_id}:{media_id}"
+
+
+def media_digest_cache_key(tenant_id: str, digest: str) -> str:
+    """Redis key mapping a downloaded file's SHA-256 to the media item storing it."""
+    return f"media_sha:{tenant_id}:{digest}"
+
+
+def _stream_size(fileobj: IO[bytes]) -> int:
+    """Byte length of a seekable stream, leaving it rewound to the start."""
+    size = fileobj.seek(0, 2)
+    fileobj.seek(0)
+    return size
+
 
 class MediaService:
-    def __init__(self):
-        settings = get_settings()
-        self.s3 = boto3.client(
-            "s3",
-            endpoint_url=settings.s3_endpoint_url,
-            aws_access_key_id=settings.s3_access_key,
-            aws_secret_access_key=settings.s3_secret_key,
-            region_name=settings.s3_region,
+    def __init__(self, redis: aioredis.Redis | None = None):
+        self.s3 = _s3_client()
+        self.bucket = get_settings().s3_bucket_name
+        # Celery tasks pass their own client; requests use the app's pool
+        self._redis_client = redis
+
+    async def _redis(self) -> aioredis.Redis:
+        if self._redis_client is not None:
+            return self._redis_client
+        return await get_redis()
+
+    async def _upload_stream(self, fileobj: IO[bytes], key: str, content_type: str) -> None:
+        """Stream a file object to S3 without blocking the event loop.
+
+        upload_fileobj reads the stream in parts (multipart for large files)
+        rather than needing the whole payload as one bytes object.
+        """
+        await _run_in_s3_pool(
+            self.s3.upload_fileobj, fileobj, self.bucket, key,
+            ExtraArgs={"ContentType": content_type},
         )
-        self.bucket = settings.s3_bucket_name
+
+    # --- media_id -> S3 key cache (fails open to a LIST if Redis is unavailable) ---
+
+    async def _remember_key(self, tenant_id: str, media_id: str, key: str) -> None:
+        try:
+            redis = await self._redis()
+            await redis.set(
+                media_key_cache_key(tenant_id, media_id), key, ex=MEDIA_KEY_TTL_SECONDS,
+            )
+        except _REDIS_ERRORS:
+            await logger.adebug("media_key_cache_unavailable", media_id=media_id)
+
+    async def _cached_key(self, tenant_id: str, media_id: str) -> str | None:
+        try:
+            redis = await self._redis()
+            return await redis.get(media_key_cache_key(tenant_id, media_id))
+        except _REDIS_ERRORS:
+            return None
+
+    # --- content digest -> stored media (fails open to uploading again) ---
+
+    async def _remember_digest(self, tenant_id: str, digest: str, stored: dict) -> None:
+        try:
+            redis = await self._redis()
+            await redis.set(
+                media_digest_cache_key(tenant_id, digest), json.dumps(stored),
+                ex=MEDIA_KEY_TTL_SECONDS,
+            )
+        except _REDIS_ERRORS:
+            await logger.adebug("media_digest_cache_unavailable", digest=digest)
+
+    async def _stored_for_digest(self, tenant_id: str, digest: str) -> dict | None:
+        try:
+            redis = await self._redis()
+            stored = await redis.get(media_digest_cache_key(tenant_id, digest))
+        except _REDIS_ERRORS:
+            return None
+        return json.loads(stored) if stored else None
 
     async def upload(self, file: UploadFile, tenant_id: str) -> dict:
         file_id = str(uuid.uuid4())
         ext = file.filename.split(".")[-1] if file.filename else "bin"
         key = f"{tenant_id}/{file_id}.{ext}"
 
-        contents = await file.read()
+        size = _stream_size(file.file)
         try:
-            self.s3.put_object(
-                Bucket=self.bucket,
-                Key=key,
-                Body=contents,
-                ContentType=file.content_type or "application/octet-stream",
+            await self._upload_stream(
+                file.file, key, file.content_type or "application/octet-stream",
             )
         except botocore.exceptions.ClientError:
             logger.error("s3_upload_failed", key=key, exc_info=True)
             raise
+        await self._remember_key(tenant_id, file_id, key)
 
         return {
             "media_id": file_id,
             "key": key,
             "filename": file.filename,
             "content_type": file.content_type,
-            "size": len(contents),
+            "size": size,
         }
 
     async def upload_validated(
-        self, contents: bytes, filename: str,
+        self, contents: IO[bytes], filename: str,
         content_type: str, tenant_id: str,
     ) -> dict:
-        """Upload pre-validated file contents to S3."""
+        """Upload a pre-validated, seekable file stream to S3."""
         ext_map = {
             "image/jpeg": "jpg",
             "image/png": "png",
@@ -61,82 +202,112 @@ class MediaService:
         ext = ext_map.get(content_type, "bin")
         key = f"{tenant_id}/{filename}.{ext}"
 
+        size = _stream_size(contents)
         try:
-            self.s3.put_object(
-                Bucket=self.bucket,
-                Key=key,
-                Body=contents,
-                ContentType=content_type,
-            )
+            await self._upload_stream(contents, key, content_type)
         except botocore.exceptions.ClientError:
             logger.error("s3_upload_validated_failed", key=key, exc_info=True)
             raise
+        await self._remember_key(tenant_id, filename, key)
 
         return {
             "media_id": filename,
             "key": key,
             "content_type": content_type,
-            "size": len(contents),
+            "size": size,
         }
 
     async def get_presigned_url(self, media_id: str, tenant_id: str) -> dict:
-        # List objects with prefix to find the file
-        prefix = f"{tenant_id}/{media_id}"
-        response = self.s3.list_objects_v2(Bucket=self.bucket, Prefix=prefix, MaxKeys=1)
+        cache_key = (tenant_id, media_id)
+        cached = _presign_cache.get(cache_key)
+        if cached is not None:
+            reuse_until, result = cached
+            if time.monotonic() < reuse_until:
+                _presign_cache.move_to_end(cache_key)
+                return dict(result)
+            del _presign_cache[cache_key]
+
+        key = await self._cached_key(tenant_id, media_id)
+        if key is None:
+            # Uploaded before the key cache (or evicted): list objects with
+            # prefix to find the file, then remember its key
+            prefix = f"{tenant_id}/{media_id}"
+            response = await _run_in_s3_pool(
+                self.s3.list_objects_v2, Bucket=self.bucket, Prefix=prefix, MaxKeys=1,
+            )
 
-        if not response.get("Contents"):
-            return {"error": "File not found"}
+            if not response.get("Contents"):
+                return {"error": "File not found"}
 
-        key = response["Contents"][0]["Key"]
-        url = self.s3.generate_presigned_url(
+            key = response["Contents"][0]["Key"]
+            await self._remember_key(tenant_id, media_id, key)
+
+        # Signing is local HMAC work (~200us), not I/O: keep it off the loop
+        # but out of the S3 pool, where it could queue behind slow uploads
+        url = await asyncio.to_thread(
+            self.s3.generate_presigned_url,
             "get_object",
             Params={"Bucket": self.bucket, "Key": key},
-            ExpiresIn=3600,
+            ExpiresIn=PRESIGN_TTL_SECONDS,
         )
 
-        return {"url": url, "media_id": media_id, "key": key}
+        result = {"url": url, "media_id": media_id, "key": key}
+        _presign_cache[cache_key] = (time.monotonic() + PRESIGN_TTL_SECONDS / 2, result)
+        while len(_presign_cache) > _PRESIGN_CACHE_SIZE:
+            _presign_cache.popitem(last=False)
+        return dict(result)
 
     _MAX_DOWNLOAD_SIZE = 20 * 1024 * 1024  # 20 MB
 
     async def download_from_url(self, url: str, tenant_id: str, filename: str) -> dict:
-        """Download a file from URL and store in S3 (used for MLS photo sync)."""
+        """Download a file from URL and store in S3 (used for MLS photo sync).
+
+        MLS feeds serve the same photos again on every re-sync, so each file
+        is hashed while it streams in; bytes already stored for the tenant
+        return the existing media item instead of being uploaded again.
+        """
         import httpx
 
         timeout = httpx.Timeout(connect=10.0, read=30.0, write=10.0, pool=10.0)
-        async with (
-            httpx.AsyncClient(timeout=timeout) as client,
-            client.stream("GET", url) as response,
-        ):
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY) as spool:
+            async with (
+                httpx.AsyncClient(timeout=timeout) as client,
+                client.stream("GET", url) as response,
+            ):
                 response.raise_for_status()
 
                 content_length = response.headers.get("content-length")
                 if content_length and int(content_length) > self._MAX_DOWNLOAD_SIZE:
                     raise ValueError(f"File too large: {content_length} bytes")
 
-                chunks = []
                 total = 0
+                # SHA-256 is hardware-accelerated (SHA-NI), outrunning blake2b
+                hasher = hashlib.sha256()
                 async for chunk in response.aiter_bytes(8192):
                     total += len(chunk)
                     if total > self._MAX_DOWNLOAD_SIZE:
                         raise ValueError(f"File exceeds {self._MAX_DOWNLOAD_SIZE} byte limit")
-                    chunks.append(chunk)
+                    hasher.update(chunk)
+                    spool.write(chunk)
 
-                content = b"".join(chunks)
                 content_type = response.headers.get("content-type", "image/jpeg")
 
-        file_id = str(uuid.uuid4())
-        ext = filename.split(".")[-1] if filename else "jpg"
-        key = f"{tenant_id}/mls/{file_id}.{ext}"
+            digest = hasher.hexdigest()
+            existing = await self._stored_for_digest(tenant_id, digest)
+            if existing:
+                return existing
 
-        try:
-            self.s3.put_object(
-                Bucket=self.bucket,
-                Key=key,
-                Body=content,
-                ContentType=content_type,
-            )
-        except botocore.exceptions.ClientError:
-            logger.error("s3_download_upload_failed", key=key, url=url, exc_info=True)
-            raise
+            file_id = str(uuid.uuid4())
+            ext = filename.split(".")[-1] if filename else "jpg"
+            key = f"{tenant_id}/mls/{file_id}.{ext}"
+
+            spool.seek(0)
+            try:
+                await self._upload_stream(spool, key, content_type)
+            except botocore.exceptions.ClientError:
+                logger.error("s3_download_upload_failed", key=key, url=url, exc_info=True)
+                raise
 
-        return {"media_id": file_id, "key": key}
+        stored = {"media_id": file_id, "key": key}
+        await self._remember_digest(tenant_id, digest, stored)
+        return stored
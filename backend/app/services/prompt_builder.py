@@ -1,3 +1,6 @@
+import re
+from functools import lru_cache
+
 from app.models.brand_profile import BrandProfile
 from app.models.listing import Listing
 from app.services.market_data import build_market_section
@@ -39,6 +42,46 @@ SYSTEM_PROMPTS = {
 }
 
 
+@lru_cache(maxsize=512)
+def _render_system(content_type: str, tone: str, event_details: str = "") -> str:
+    """System prompt for a content type with its placeholders filled in.
+
+    Batches render the same few (type, tone) pairs over and over, so the
+    template substitution is done once per combination. For templates this
+    size, str.replace is as fast as precompiled %-format templates.
+    """
+    system = SYSTEM_PROMPTS.get(content_type, LISTING_DESCRIPTION_SYSTEM)
+    return system.replace("{tone}", tone).replace("{event_details}", event_details)
+
+
+# Header opening each piece of a batched response. The position guards
+# against the model reordering, merging, or repeating pieces.
+BATCH_SECTION_HEADER = "=== [{position}] {content_type} ==="
+_BATCH_SECTION_RE = re.compile(r"^=== \[(\d+)\] ([a-z_]+) ===[ \t]*$", re.MULTILINE)
+
+
+def split_batch_response(text: str, content_types: list[str]) -> dict[str, str]:
+    """Split a response to PromptBuilder.build_batch into per-type bodies.
+
+    A section counts only if both its position and its type match the
+    request; types with no usable section are left out of the result.
+    """
+    headers = list(_BATCH_SECTION_RE.finditer(text))
+    sections: dict[str, str] = {}
+    for i, header in enumerate(headers):
+        position = int(header.group(1))
+        if not 1 <= position <= len(content_types):
+            continue
+        content_type = content_types[position - 1]
+        if header.group(2) != content_type or content_type in sections:
+            continue
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        body = text[header.end():end].strip()
+        if body:
+            sections[content_type] = body
+    return sections
+
+
 class PromptBuilder:
     """Three-layer prompt assembly: System + Brand Voice + Listing Data."""
 
@@ -53,19 +96,64 @@ class PromptBuilder:
         market_areas: list[dict] | None = None,
     ) -> tuple[str, str]:
         # Layer 1: System prompt (per content type)
-        system = SYSTEM_PROMPTS.get(content_type, LISTING_DESCRIPTION_SYSTEM)
-        system = system.replace("{tone}", tone)
-        system = system.replace("{event_details}", event_details)
+        system = _render_system(content_type, tone, event_details)
 
         # Layer 2: Brand voice injection
         if brand_profile:
             brand_section = self._build_brand_section(brand_profile)
             system += f"\n\n{brand_section}"
 
-        # Layer 3: Listing data + user instructions
+        # Layers 3-4: Listing data, market data, user instructions
+        user_prompt = self._build_user_prompt(listing, market_areas, instructions)
+        user_prompt += "\n\nGenerate the content now."
+
+        return system, user_prompt
+
+    def build_batch(
+        self,
+        listing: Listing,
+        content_types: list[str],
+        tone: str,
+        brand_profile: BrandProfile | None = None,
+        market_areas: list[dict] | None = None,
+    ) -> tuple[str, str]:
+        """Prompts for several content types about one listing in one call.
+
+        Each type's system prompt becomes a numbered task; the brand voice and
+        listing data are sent once for all of them. The model answers each
+        task under its BATCH_SECTION_HEADER line (see split_batch_response).
+        """
+        tasks = []
+        for position, content_type in enumerate(content_types, 1):
+            rules = _render_system(content_type, tone)
+            header = BATCH_SECTION_HEADER.format(position=position, content_type=content_type)
+            tasks.append(f"{header}\n{rules}")
+
+        system = (
+            f"Write {len(content_types)} separate pieces of marketing content for the "
+            "listing provided. Each task below has its own role and rules; apply them "
+            "to that piece only.\n\n"
+            "Answer the tasks in order. Start each piece with its header line exactly "
+            "as shown (e.g. the line beginning \"=== [1]\"), followed by the content "
+            "only. Write nothing before the first header.\n\n"
+        )
+        system += "\n\n".join(tasks)
+        if brand_profile:
+            system += f"\n\n{self._build_brand_section(brand_profile)}"
+
+        user_prompt = self._build_user_prompt(listing, market_areas)
+        user_prompt += f"\n\nGenerate all {len(content_types)} pieces now."
+        return system, user_prompt
+
+    def _build_user_prompt(
+        self,
+        listing: Listing,
+        market_areas: list[dict] | None,
+        instructions: str | None = None,
+    ) -> str:
         user_prompt = self._build_listing_section(listing)
 
-        # Layer 4: Market data enrichment
+        # Market data enrichment
         if market_areas:
             listing_dict = {
                 "address_city": getattr(listing, "address_city", None),
@@ -78,10 +166,7 @@ class PromptBuilder:
 
         if instructions:
             user_prompt += f"\n\nADDITIONAL INSTRUCTIONS:\n{instructions}"
-
-        user_prompt += "\n\nGenerate the content now."
-
-        return system, user_prompt
+        return user_prompt
 
     def _build_brand_section(self, profile: BrandProfile) -> str:
         parts = ["BRAND VOICE:"]
@@ -96,6 +181,7 @@ class PromptBuilder:
         return "\n".join(parts)
 
     def _build_listing_section(self, listing: Listing) -> str:
+        # list + join measured faster here than io.StringIO writes or += (CPython 3.11)
         parts = ["LISTING DATA:"]
         if listing.address_full:
             parts.append(f"Address: {listing.address_full}")
@@ -18,19 +18,41 @@ Supports:
 - Structured logging for observability
 """
 
+import asyncio
+import time
+from collections import OrderedDict
 from uuid import UUID
 
 import httpx
 import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.http_client import SharedHttpClient
 from app.models.social_post import SocialPost
 
 logger = structlog.get_logger()
 
 GRAPH_API_BASE = "https://graph.facebook.com/v21.0"
 
-_IMAGE_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+_IMAGE_CONTENT_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp"})
+
+# Photo URLs that recently validated, with when to check again. A listing's
+# hero image is validated on every post and retry; failures are never cached
+# so a fixed URL or a transient outage is rechecked immediately.
+PHOTO_URL_CACHE_TTL_SECONDS = 900
+_PHOTO_URL_CACHE_SIZE = 10_000
+_valid_photo_urls: OrderedDict[str, float] = OrderedDict()
+
+# HEAD responses some CDNs give even though GET works
+_HEAD_REJECTED = {403, 405}
+
+# Shared pooled client: one post is a photo HEAD plus up to three Graph API
+# calls, which reuse kept-alive connections instead of a handshake each.
+# Per-call timeouts override the default.
+_GRAPH_TIMEOUT = httpx.Timeout(30.0)
+_GRAPH_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_http_client = SharedHttpClient(timeout=_GRAPH_TIMEOUT, limits=_GRAPH_LIMITS)
 
 
 async def validate_photo_url(url: str) -> dict:
@@ -38,6 +60,8 @@ async def validate_photo_url(url: str) -> dict:
 
     Performs a lightweight HEAD request to check accessibility and content type
     before sending to the Meta Graph API, which gives opaque errors on bad URLs.
+    Servers that reject HEAD are asked for a one-byte ranged GET instead, and
+    URLs that pass are not rechecked for PHOTO_URL_CACHE_TTL_SECONDS.
 
     Returns:
         {"valid": bool, "error": str | None}
@@ -53,12 +77,25 @@ async def validate_photo_url(url: str) -> dict:
             ),
         }
 
+    checked_until = _valid_photo_urls.get(url)
+    if checked_until is not None:
+        if time.monotonic() < checked_until:
+            _valid_photo_urls.move_to_end(url)
+            return {"valid": True, "error": None}
+        del _valid_photo_urls[url]
+
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.head(url, follow_redirects=True, timeout=10.0)
+        client = _http_client.client
+        resp = await client.head(url, follow_redirects=True, timeout=10.0)
+        if resp.status_code in _HEAD_REJECTED:
+            # Ask for a single byte instead; only the headers are read
+            async with client.stream(
+                "GET", url, headers={"Range": "bytes=0-0"}, follow_redirects=True, timeout=10.0,
+            ) as resp:
+                pass
         if resp.status_code >= 400:
             return {"valid": False, "error": f"Photo URL returned HTTP {resp.status_code}"}
-        content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+        content_type = resp.headers.get("content-type", "").partition(";")[0].strip().lower()
         if content_type and content_type not in _IMAGE_CONTENT_TYPES:
             return {
                 "valid": False,
@@ -67,6 +104,9 @@ async def validate_photo_url(url: str) -> dict:
                     f" '{content_type}', expected an image"
                 ),
             }
+        _valid_photo_urls[url] = time.monotonic() + PHOTO_URL_CACHE_TTL_SECONDS
+        while len(_valid_photo_urls) > _PHOTO_URL_CACHE_SIZE:
+            _valid_photo_urls.popitem(last=False)
         return {"valid": True, "error": None}
     except httpx.TimeoutException:
         return {"valid": False, "error": "Photo URL validation timed out"}
@@ -124,35 +164,35 @@ class SocialService:
             {"success": bool, "post_id": str | None, "error": str | None}
         """
         try:
-            async with httpx.AsyncClient() as client:
-                if photo_url:
-                    resp = await client.post(
-                        f"{GRAPH_API_BASE}/{self.page_id}/photos",
-                        data={
-                            "caption": message,
-                            "url": photo_url,
-                            "access_token": self.token,
-                        },
-                        timeout=60.0,
-                    )
-                else:
-                    data = {
-                        "message": message,
+            client = _http_client.client
+            if photo_url:
+                resp = await client.post(
+                    f"{GRAPH_API_BASE}/{self.page_id}/photos",
+                    data={
+                        "caption": message,
+                        "url": photo_url,
                         "access_token": self.token,
-                    }
-                    if link:
-                        data["link"] = link
-                    resp = await client.post(
-                        f"{GRAPH_API_BASE}/{self.page_id}/feed",
-                        data=data,
-                        timeout=30.0,
-                    )
-
-                body = resp.json()
-                if "id" in body:
-                    return {"success": True, "post_id": body["id"], "error": None}
-                error = body.get("error", {}).get("message", str(body))
-                return {"success": False, "post_id": None, "error": error}
+                    },
+                    timeout=60.0,
+                )
+            else:
+                data = {
+                    "message": message,
+                    "access_token": self.token,
+                }
+                if link:
+                    data["link"] = link
+                resp = await client.post(
+                    f"{GRAPH_API_BASE}/{self.page_id}/feed",
+                    data=data,
+                    timeout=30.0,
+                )
+
+            body = resp.json()
+            if "id" in body:
+                return {"success": True, "post_id": body["id"], "error": None}
+            error = body.get("error", {}).get("message", str(body))
+            return {"success": False, "post_id": None, "error": error}
         except httpx.TimeoutException:
             return {"success": False, "post_id": None, "error": "Facebook API request timed out"}
         except httpx.ConnectError as e:
@@ -179,40 +219,40 @@ class SocialService:
                     "error": "Instagram user ID not configured"}
 
         try:
-            async with httpx.AsyncClient() as client:
-                # Step 1: Create media container
-                resp = await client.post(
-                    f"{GRAPH_API_BASE}/{self.ig_user_id}/media",
-                    data={
-                        "image_url": image_url,
-                        "caption": caption,
-                        "access_token": self.token,
-                    },
-                    timeout=30.0,
-                )
-                body = resp.json()
+            client = _http_client.client
+            # Step 1: Create media container
+            resp = await client.post(
+                f"{GRAPH_API_BASE}/{self.ig_user_id}/media",
+                data={
+                    "image_url": image_url,
+                    "caption": caption,
+                    "access_token": self.token,
+                },
+                timeout=30.0,
+            )
+            body = resp.json()
 
-                if "id" not in body:
-                    error = body.get("error", {}).get("message", str(body))
-                    return {"success": False, "post_id": None, "error": error}
+            if "id" not in body:
+                error = body.get("error", {}).get("message", str(body))
+                return {"success": False, "post_id": None, "error": error}
 
-                container_id = body["id"]
+            container_id = body["id"]
 
-                # Step 2: Publish the container
-                resp = await client.post(
-                    f"{GRAPH_API_BASE}/{self.ig_user_id}/media_publish",
-                    data={
-                        "creation_id": container_id,
-                        "access_token": self.token,
-                    },
-                    timeout=30.0,
-                )
-                body = resp.json()
+            # Step 2: Publish the container
+            resp = await client.post(
+                f"{GRAPH_API_BASE}/{self.ig_user_id}/media_publish",
+                data={
+                    "creation_id": container_id,
+                    "access_token": self.token,
+                },
+                timeout=30.0,
+            )
+            body = resp.json()
 
-                if "id" in body:
-                    return {"success": True, "post_id": body["id"], "error": None}
-                error = body.get("error", {}).get("message", str(body))
-                return {"success": False, "post_id": None, "error": error}
+            if "id" in body:
+                return {"success": True, "post_id": body["id"], "error": None}
+            error = body.get("error", {}).get("message", str(body))
+            return {"success": False, "post_id": None, "error": error}
         except httpx.TimeoutException:
             return {"success": False, "post_id": None, "error": "Instagram API request timed out"}
         except httpx.ConnectError as e:
@@ -246,22 +286,22 @@ class SocialService:
                 logger.warning("photo_url_invalid", url=photo_url[:100], error=check["error"])
                 validated_photo = None
 
-        results = {}
+        # Keys fixed up front so results keep facebook-then-instagram order
+        results: dict = {"facebook": None, "instagram": None}
+        pending = {}
 
         if fb_text:
-            results["facebook"] = await self.post_to_facebook(
+            pending["facebook"] = self.post_to_facebook(
                 message=fb_text,
                 link=listing_link,
                 photo_url=validated_photo,
             )
-            if photo_url and not validated_photo and results["facebook"]["success"]:
-                results["facebook"]["warning"] = f"Photo skipped: {check['error']}"
         else:
             results["facebook"] = {"success": False, "post_id": None,
                                    "error": "No Facebook content"}
 
         if ig_text and validated_photo and self.ig_user_id:
-            results["instagram"] = await self.post_to_instagram(
+            pending["instagram"] = self.post_to_instagram(
                 caption=ig_text,
                 image_url=validated_photo,
             )
@@ -278,6 +318,23 @@ class SocialService:
             results["instagram"] = {"success": False, "post_id": None,
                                     "error": "No Instagram content"}
 
+        # The platforms share nothing past the photo check, so post to both at
+        # once. An unexpected error on one must not lose the other's result,
+        # which may already be live and needs tracking.
+        done = await asyncio.gather(*pending.values(), return_exceptions=True)
+        for platform, result in zip(pending, done, strict=True):
+            if isinstance(result, Exception):
+                logger.error("social_post_error", platform=platform, exc_info=result)
+                result = {"success": False, "post_id": None,
+                          "error": f"{platform.title()} post failed: {result}"}
+            elif isinstance(result, BaseException):
+                raise result
+            results[platform] = result
+
+        if (fb_text and photo_url and not validated_photo
+                and results["facebook"]["success"]):
+            results["facebook"]["warning"] = f"Photo skipped: {check['error']}"
+
         return results
 
     async def post_and_track(
@@ -294,6 +351,9 @@ class SocialService:
     ) -> list[SocialPost]:
         """Post to all platforms and persist SocialPost records.
 
+        The records are only added to the session: the caller's commit writes
+        them together in a single multi-row INSERT.
+
         Returns:
             List of created SocialPost records.
         """
@@ -319,7 +379,6 @@ class SocialService:
                 platform_post_id=result.get("post_id"),
                 error=result.get("error"),
             )
-            db.add(post)
             posts.append(post)
 
             log = logger.bind(platform=platform, tenant_id=str(tenant_id))
@@ -328,4 +387,5 @@ class SocialService:
             elif result["error"]:
                 log.warning("social_post_failed", error=result["error"])
 
+        db.add_all(posts)
         return posts
@@ -16,6 +16,9 @@ celery_app = Celery(
         "app.workers.tasks.content_batch",
         "app.workers.tasks.content_auto_gen",
         "app.workers.tasks.media_process",
+        "app.workers.tasks.usage_reconcile",
+        "app.workers.tasks.visit_flush",
+        "app.workers.tasks.notify_flush",
     ],
 )
 
@@ -43,6 +46,18 @@ celery_app.conf.beat_schedule = {
         "task": "app.workers.tasks.mls_sync.sync_all_tenants",
         "schedule": crontab(minute=f"*/{settings.mls_sync_interval_minutes}"),
     },
+    "reconcile-usage-counters": {
+        "task": "app.workers.tasks.usage_reconcile.reconcile_usage_counters",
+        "schedule": crontab(hour=3, minute=15),
+    },
+    "flush-page-visits": {
+        "task": "app.workers.tasks.visit_flush.flush_page_visits",
+        "schedule": 5.0,
+    },
+    "flush-agent-notifications": {
+        "task": "app.workers.tasks.notify_flush.flush_agent_notifications",
+        "schedule": 30.0,
+    },
 }
 
 
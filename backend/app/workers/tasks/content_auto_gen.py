@@ -1,9 +1,29 @@
 import asyncio
+import time
+from uuid import UUID
 
+import redis.exceptions as redis_exceptions
 import structlog
 import structlog.contextvars
+from celery import group
 from celery.exceptions import SoftTimeLimitExceeded
+from sqlalchemy import and_, select
 
+from app.config import get_settings
+from app.core.database import worker_session_factory
+from app.core.redis import RedisPool
+from app.middleware.tenant_context import set_tenant_context
+from app.models.brand_profile import BrandProfile
+from app.models.listing import Listing
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.services.ai_service import AIService
+from app.services.content_service import ContentService
+from app.services.email_service import (
+    AGENT_NOTIFY_QUEUE_KEY,
+    AgentNotification,
+    encode_agent_notification,
+)
 from app.workers.celery_app import celery_app
 
 logger = structlog.get_logger()
@@ -36,9 +56,52 @@ def auto_generate_for_new_listings(
     listing_ids: list[str],
     correlation_id: str | None = None,
 ):
-    """Auto-generate all marketing content for newly detected listings."""
+    """Auto-generate all marketing content for newly detected listings.
+
+    A sync can surface many listings at once; they are fanned out as one
+    task per listing so the whole worker fleet shares them and a failure
+    retries only the listing it hit.
+    """
+    if correlation_id:
+        structlog.contextvars.bind_contextvars(correlation_id=correlation_id)
+    if len(listing_ids) <= 1:
+        _run_auto_generate(self, tenant_id, listing_ids)
+        return
+
+    try:
+        group(
+            auto_generate_for_listing.s(tenant_id, listing_id, correlation_id)
+            for listing_id in listing_ids
+        ).apply_async()
+    except Exception as exc:
+        logger.error("auto_gen_dispatch_error", tenant_id=tenant_id, error=str(exc))
+        raise self.retry(exc=exc) from exc
+    logger.info("auto_gen_dispatched", tenant_id=tenant_id, listing_count=len(listing_ids))
+
+
+@celery_app.task(
+    bind=True,
+    name="app.workers.tasks.content_auto_gen.auto_generate_for_listing",
+    max_retries=2,
+    retry_backoff=True,
+    retry_backoff_max=900,
+    retry_jitter=True,
+    soft_time_limit=600,
+    time_limit=720,
+)
+def auto_generate_for_listing(
+    self,
+    tenant_id: str,
+    listing_id: str,
+    correlation_id: str | None = None,
+):
+    """Auto-generate all marketing content for one new listing."""
     if correlation_id:
         structlog.contextvars.bind_contextvars(correlation_id=correlation_id)
+    _run_auto_generate(self, tenant_id, [listing_id])
+
+
+def _run_auto_generate(task, tenant_id: str, listing_ids: list[str]):
     try:
         asyncio.run(_auto_generate(tenant_id, listing_ids))
     except SoftTimeLimitExceeded:
@@ -50,38 +113,38 @@ def auto_generate_for_new_listings(
         raise
     except Exception as exc:
         logger.error("auto_gen_error", tenant_id=tenant_id, error=str(exc))
-        raise self.retry(exc=exc) from exc
+        raise task.retry(exc=exc) from exc
 
 
 async def _auto_generate(tenant_id: str, listing_ids: list[str]):
-    import time
-    from uuid import UUID
-
-    from sqlalchemy import select
-
-    from app.core.database import async_session_factory
-    from app.middleware.tenant_context import set_tenant_context
-    from app.models.brand_profile import BrandProfile
-    from app.models.listing import Listing
-    from app.models.tenant import Tenant
-    from app.models.user import User
-    from app.services.ai_service import AIService
-    from app.services.content_service import ContentService
-
     ai_service = AIService()
     tid = UUID(tenant_id)
 
-    async with async_session_factory() as session:
+    async with worker_session_factory() as session:
         await set_tenant_context(session, tenant_id)
 
-        # Load tenant settings to check if auto-gen is enabled
-        tenant_result = await session.execute(
-            select(Tenant).where(Tenant.id == tid)
+        # One round trip for the tenant settings (is auto-gen enabled?), its
+        # default brand profile, and an admin/owner to own the generated content.
+        # Read fresh each run rather than cached per worker: it is one indexed
+        # query next to seconds of LLM calls, and a stale copy would keep
+        # generating after a tenant turns auto-gen off or removes the owner.
+        context_result = await session.execute(
+            select(Tenant, BrandProfile.id, User.id)
+            .outerjoin(
+                BrandProfile,
+                and_(BrandProfile.tenant_id == Tenant.id, BrandProfile.is_default.is_(True)),
+            )
+            .outerjoin(
+                User, and_(User.tenant_id == Tenant.id, User.role.in_(["owner", "admin"])),
+            )
+            .where(Tenant.id == tid)
+            .limit(1)
         )
-        tenant = tenant_result.scalar_one_or_none()
-        if not tenant:
+        context = context_result.first()
+        if not context:
             await logger.aerror("auto_gen_tenant_not_found", tenant_id=tenant_id)
             return
+        tenant, default_brand_profile_id, system_user_id = context
 
         settings = tenant.settings or {}
         if not settings.get("auto_generate_on_new_listing", True):
@@ -89,30 +152,15 @@ async def _auto_generate(tenant_id: str, listing_ids: list[str]):
             return
 
         # Determine which content types to generate
-        content_types = settings.get(
+        content_types = list(dict.fromkeys(settings.get(
             "auto_generate_content_types", AUTO_GEN_CONTENT_TYPES
-        )
+        )))
         tone = settings.get("auto_generate_tone", "professional")
+        notify_agents = settings.get("auto_generate_notify_agents", True)
 
-        # Get default brand profile
-        bp_result = await session.execute(
-            select(BrandProfile).where(
-                BrandProfile.tenant_id == tid,
-                BrandProfile.is_default.is_(True),
-            )
-        )
-        brand_profile = bp_result.scalar_one_or_none()
-        brand_profile_id = str(brand_profile.id) if brand_profile else None
-
-        # Get first admin/owner user as the system user for auto-gen
-        user_result = await session.execute(
-            select(User).where(
-                User.tenant_id == tid,
-                User.role.in_(["owner", "admin"]),
-            ).limit(1)
-        )
-        system_user = user_result.scalar_one_or_none()
-        if not system_user:
+        brand_profile_id = str(default_brand_profile_id) if default_brand_profile_id else None
+
+        if not system_user_id:
             await logger.aerror("auto_gen_no_system_user", tenant_id=tenant_id)
             return
 
@@ -120,38 +168,91 @@ async def _auto_generate(tenant_id: str, listing_ids: list[str]):
         generated = 0
         errors = 0
 
-        for listing_id in listing_ids:
-            result = await session.execute(
-                select(Listing).where(
-                    Listing.id == UUID(listing_id),
-                    Listing.tenant_id == tid,
-                )
+        result = await session.execute(
+            select(Listing).where(
+                Listing.id.in_([UUID(listing_id) for listing_id in listing_ids]),
+                Listing.tenant_id == tid,
             )
-            listing = result.scalar_one_or_none()
+        )
+        found = {listing.id: listing for listing in result.scalars()}
+
+        listings = []
+        for listing_id in listing_ids:
+            listing = found.get(UUID(listing_id))
             if not listing:
                 await logger.awarning(
                     "auto_gen_listing_not_found", listing_id=listing_id
                 )
                 continue
+            listings.append((listing_id, listing))
 
-            for content_type in content_types:
-                try:
+        semaphore = asyncio.Semaphore(get_settings().ai_concurrency)
+
+        async def _generate(listing):
+            # generate() reads prompt context through the session it is
+            # given, and a session can't run overlapping queries, so each
+            # concurrent listing gets its own; content rows go through `session`.
+            async with semaphore, worker_session_factory() as read_session:
+                await set_tenant_context(read_session, tenant_id)
+                outcomes = {}
+                if len(content_types) > 1:
+                    # One call for every type: the listing data and brand
+                    # voice are sent once instead of once per type.
                     start = time.time()
-                    ai_result = await ai_service.generate(
+                    batch = await ai_service.generate_batch(
                         listing=listing,
-                        content_type=content_type,
+                        content_types=content_types,
                         tone=tone,
                         brand_profile_id=brand_profile_id,
-                        instructions=None,
                         tenant_id=tenant_id,
-                        db=session,
+                        db=read_session,
                     )
                     generation_time_ms = int((time.time() - start) * 1000)
+                    outcomes = {t: (r, generation_time_ms) for t, r in batch.items()}
+
+                # A single type, or one the batched response left out
+                for content_type in content_types:
+                    if content_type in outcomes:
+                        continue
+                    start = time.time()
+                    try:
+                        ai_result = await ai_service.generate(
+                            listing=listing,
+                            content_type=content_type,
+                            tone=tone,
+                            brand_profile_id=brand_profile_id,
+                            instructions=None,
+                            tenant_id=tenant_id,
+                            db=read_session,
+                        )
+                    except Exception as e:
+                        outcomes[content_type] = e
+                        continue
+                    outcomes[content_type] = (ai_result, int((time.time() - start) * 1000))
+                return outcomes
+
+        # Listings are independent LLM work, so they overlap (bounded by
+        # ai_concurrency) and their content is written in order after.
+        listing_outcomes = await asyncio.gather(
+            *(_generate(listing) for _, listing in listings), return_exceptions=True,
+        )
+
+        notifications = []
+        for (listing_id, listing), outcomes in zip(listings, listing_outcomes, strict=True):
+            created = []
+            for content_type in content_types:
+                try:
+                    if isinstance(outcomes, BaseException):
+                        raise outcomes
+                    outcome = outcomes[content_type]
+                    if isinstance(outcome, BaseException):
+                        raise outcome
+                    ai_result, generation_time_ms = outcome
 
                     await content_service.create(
                         tenant_id=tid,
                         listing_id=listing.id,
-                        user_id=system_user.id,
+                        user_id=system_user_id,
                         content_type=content_type,
                         tone=tone,
                         brand_profile_id=(
@@ -165,6 +266,7 @@ async def _auto_generate(tenant_id: str, listing_ids: list[str]):
                         generation_time_ms=generation_time_ms,
                     )
                     generated += 1
+                    created.append(content_type)
 
                 except Exception as e:
                     errors += 1
@@ -175,8 +277,20 @@ async def _auto_generate(tenant_id: str, listing_ids: list[str]):
                         error=str(e),
                     )
 
+            if notify_agents and created and listing.listing_agent_email:
+                notifications.append(AgentNotification(
+                    agent_email=listing.listing_agent_email,
+                    agent_name=listing.listing_agent_name or "",
+                    address=listing.address_full or "",
+                    content_types=created,
+                    listing_id=listing.id,
+                ))
+
         await session.commit()
 
+    if notifications:
+        await _queue_agent_notifications(tid, notifications)
+
     await logger.ainfo(
         "auto_gen_complete",
         tenant_id=tenant_id,
@@ -184,3 +298,28 @@ async def _auto_generate(tenant_id: str, listing_ids: list[str]):
         generated=generated,
         errors=errors,
     )
+
+
+async def _queue_agent_notifications(
+    tenant_id: UUID, notifications: list[AgentNotification],
+) -> None:
+    """Queue "materials ready" emails for flush_agent_notifications to send.
+
+    A sync fans out one task per listing, so each queues its own agent and
+    the flush coalesces the whole import into one SendGrid request.
+    """
+    # Workers don't run the FastAPI lifespan, so open a pool for this run only
+    pool = RedisPool()
+    await pool.initialize()
+    try:
+        await pool.client.rpush(
+            AGENT_NOTIFY_QUEUE_KEY,
+            *(encode_agent_notification(tenant_id, n) for n in notifications),
+        )
+    except (redis_exceptions.RedisError, ConnectionError, OSError) as e:
+        # The content is already committed; a missed email isn't worth a retry
+        await logger.awarning(
+            "auto_gen_notify_queue_error", tenant_id=str(tenant_id), error=str(e),
+        )
+    finally:
+        await pool.close()
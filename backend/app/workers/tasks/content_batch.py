@@ -1,9 +1,18 @@
 import asyncio
+import time
+from uuid import UUID
 
 import structlog
 import structlog.contextvars
 from celery.exceptions import SoftTimeLimitExceeded
-
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.core.database import worker_session_factory
+from app.middleware.tenant_context import set_tenant_context
+from app.models.listing import Listing
+from app.services.ai_service import AIService
+from app.services.content_service import ContentService
 from app.workers.celery_app import celery_app
 
 logger = structlog.get_logger()
@@ -66,58 +75,69 @@ async def _batch_generate(
     tone: str,
     brand_profile_id: str | None,
 ):
-    import time
-    from uuid import UUID
-
-    from sqlalchemy import select
-
-    from app.core.database import async_session_factory
-    from app.middleware.tenant_context import set_tenant_context
-    from app.models.listing import Listing
-    from app.services.ai_service import AIService
-    from app.services.content_service import ContentService
-
     ai_service = AIService()
+    semaphore = asyncio.Semaphore(get_settings().ai_concurrency)
+
+    async def _generate(listing):
+        # generate() reads prompt context through the session it is given,
+        # and a session can't run overlapping queries, so each concurrent
+        # call gets its own; content rows go through the batch session.
+        async with semaphore, worker_session_factory() as read_session:
+            await set_tenant_context(read_session, tenant_id)
+            start = time.time()
+            ai_result = await ai_service.generate(
+                listing=listing,
+                content_type=content_type,
+                tone=tone,
+                brand_profile_id=brand_profile_id,
+                instructions=None,
+                tenant_id=tenant_id,
+                db=read_session,
+            )
+            return ai_result, int((time.time() - start) * 1000)
 
     succeeded = 0
     failed = 0
     skipped = 0
 
-    async with async_session_factory() as session:
+    async with worker_session_factory() as session:
         await set_tenant_context(session, tenant_id)
 
         content_service = ContentService(session)
 
+        result = await session.execute(
+            select(Listing).where(
+                Listing.id.in_([UUID(listing_id) for listing_id in listing_ids]),
+                Listing.tenant_id == UUID(tenant_id),
+            )
+        )
+        by_id = {listing.id: listing for listing in result.scalars()}
+
+        found = []
         for idx, listing_id in enumerate(listing_ids):
-            try:
-                result = await session.execute(
-                    select(Listing).where(
-                        Listing.id == UUID(listing_id),
-                        Listing.tenant_id == UUID(tenant_id),
-                    )
-                )
-                listing = result.scalar_one_or_none()
-                if not listing:
-                    skipped += 1
-                    await logger.awarning(
-                        "batch_listing_not_found",
-                        listing_id=listing_id,
-                        index=idx,
-                        tenant_id=tenant_id,
-                    )
-                    continue
-
-                start = time.time()
-                ai_result = await ai_service.generate(
-                    listing=listing,
-                    content_type=content_type,
-                    tone=tone,
-                    brand_profile_id=brand_profile_id,
-                    instructions=None,
+            listing = by_id.get(UUID(listing_id))
+            if not listing:
+                skipped += 1
+                await logger.awarning(
+                    "batch_listing_not_found",
+                    listing_id=listing_id,
+                    index=idx,
                     tenant_id=tenant_id,
-                    db=session,
                 )
-                generation_time_ms = int((time.time() - start) * 1000)
+                continue
+            found.append((idx, listing_id, listing))
+
+        # The LLM calls dominate the batch, so they overlap (bounded by
+        # ai_concurrency); results are then written in listing order.
+        outcomes = await asyncio.gather(
+            *(_generate(listing) for _, _, listing in found), return_exceptions=True,
+        )
+
+        for (idx, listing_id, listing), outcome in zip(found, outcomes, strict=True):
+            try:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                ai_result, generation_time_ms = outcome
 
                 await content_service.create(
                     tenant_id=UUID(tenant_id),
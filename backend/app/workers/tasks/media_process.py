@@ -6,13 +6,17 @@ import structlog.contextvars
 from celery.exceptions import SoftTimeLimitExceeded
 from sqlalchemy import select
 
-from app.core.database import async_session_factory
+from app.core.database import worker_session_factory
+from app.core.redis import RedisPool
 from app.middleware.tenant_context import set_tenant_context
 from app.models.listing import Listing
 from app.workers.celery_app import celery_app
 
 logger = structlog.get_logger()
 
+# Photos of one listing downloaded and uploaded at the same time
+PHOTO_DOWNLOAD_CONCURRENCY = 6
+
 
 @celery_app.task(
     bind=True,
@@ -56,33 +60,47 @@ def download_listing_photos(
 async def _download_photos(tenant_id: str, listing_id: str, photo_urls: list[dict]):
     from app.services.media_service import MediaService
 
-    media_service = MediaService()
-    stored = []
+    # Workers don't run the FastAPI lifespan, so open a pool for this run only;
+    # without it the digest lookups fail open and every photo is re-uploaded
+    pool = RedisPool()
+    await pool.initialize()
+    try:
+        await _store_photos(MediaService(redis=pool.client), tenant_id, listing_id, photo_urls)
+    finally:
+        await pool.close()
 
-    for photo in photo_urls:
-        try:
-            url = photo.get("url")
-            if not url:
-                continue
 
-            result = await media_service.download_from_url(
-                url=url,
-                tenant_id=tenant_id,
-                filename=f"listing-{listing_id}-{photo.get('order', 0)}.jpg",
-            )
-            stored.append(result)
+async def _store_photos(media_service, tenant_id: str, listing_id: str, photo_urls: list[dict]):
+    # Photos are fetched and stored concurrently (each is mostly waiting on the
+    # MLS host and S3), bounded so one listing can't open dozens of connections.
+    semaphore = asyncio.Semaphore(PHOTO_DOWNLOAD_CONCURRENCY)
 
-        except Exception as e:
-            await logger.aerror(
-                "photo_download_error",
-                listing_id=listing_id,
-                url=photo.get("url"),
-                error=str(e),
-            )
+    async def _store(photo: dict) -> dict | None:
+        url = photo.get("url")
+        if not url:
+            return None
+        async with semaphore:
+            try:
+                return await media_service.download_from_url(
+                    url=url,
+                    tenant_id=tenant_id,
+                    filename=f"listing-{listing_id}-{photo.get('order', 0)}.jpg",
+                )
+            except Exception as e:
+                await logger.aerror(
+                    "photo_download_error",
+                    listing_id=listing_id,
+                    url=url,
+                    error=str(e),
+                )
+                return None
+
+    results = await asyncio.gather(*(_store(photo) for photo in photo_urls))
+    stored = [result for result in results if result is not None]
 
     # Update the listing's photos JSONB field with stored S3 URLs
     if stored:
-        async with async_session_factory() as db:
+        async with worker_session_factory() as db:
             await set_tenant_context(db, tenant_id)
             result = await db.execute(
                 select(Listing).where(
@@ -58,10 +58,10 @@ def sync_all_tenants(self, correlation_id: str | None = None):
 
 
 async def _sync_tenant(tenant_id: str):
-    from app.core.database import async_session_factory
+    from app.core.database import worker_session_factory
     from app.integrations.mls.sync_engine import SyncEngine
 
-    async with async_session_factory() as session:
+    async with worker_session_factory() as session:
         engine = SyncEngine(session)
         results = await engine.sync_tenant(tenant_id)
         await session.commit()
@@ -71,10 +71,10 @@ async def _sync_tenant(tenant_id: str):
 async def _sync_all():
     from sqlalchemy import select
 
-    from app.core.database import async_session_factory
+    from app.core.database import worker_session_factory
     from app.models.mls_connection import MLSConnection
 
-    async with async_session_factory() as session:
+    async with worker_session_factory() as session:
         result = await session.execute(
             select(MLSConnection.tenant_id)
             .where(MLSConnection.sync_enabled.is_(True))
@@ -0,0 +1,117 @@
+import asyncio
+
+import structlog
+import structlog.contextvars
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.workers.celery_app import celery_app
+
+logger = structlog.get_logger()
+
+# Notifications taken from the queue per pass; SendGrid accepts up to 1000
+# personalizations in one request
+FLUSH_BATCH_SIZE = 1000
+
+# Held while draining: overlapping runs would split batches across requests
+FLUSH_LOCK_KEY = "agent_notify:flush_lock"
+FLUSH_LOCK_TTL_SECONDS = 60
+
+
+@celery_app.task(
+    bind=True,
+    name="app.workers.tasks.notify_flush.flush_agent_notifications",
+    max_retries=2,
+    retry_backoff=True,
+    retry_backoff_max=60,
+    retry_jitter=True,
+    soft_time_limit=50,
+    time_limit=60,
+)
+def flush_agent_notifications(self, correlation_id: str | None = None):
+    """Periodic task: send queued agent notifications, one request per tenant batch."""
+    if correlation_id:
+        structlog.contextvars.bind_contextvars(correlation_id=correlation_id)
+    try:
+        asyncio.run(_flush())
+    except SoftTimeLimitExceeded:
+        logger.error("notify_flush_timeout")
+        raise
+    except Exception as exc:
+        logger.error("notify_flush_error", error=str(exc))
+        raise self.retry(exc=exc) from exc
+
+
+async def _flush() -> int:
+    from app.core.database import worker_session_factory
+    from app.core.redis import RedisPool
+    from app.services.email_service import AGENT_NOTIFY_QUEUE_KEY
+
+    # Workers don't run the FastAPI lifespan, so open a pool for this run only
+    pool = RedisPool()
+    await pool.initialize()
+    sent = 0
+    try:
+        redis = pool.client
+        if not await redis.set(FLUSH_LOCK_KEY, "1", nx=True, ex=FLUSH_LOCK_TTL_SECONDS):
+            return 0
+        try:
+            sent = await _drain(redis, worker_session_factory, AGENT_NOTIFY_QUEUE_KEY)
+        finally:
+            await redis.delete(FLUSH_LOCK_KEY)
+    finally:
+        await pool.close()
+
+    if sent:
+        await logger.ainfo("notify_flush_complete", notifications=sent)
+    return sent
+
+
+async def _drain(redis, session_factory, key: str) -> int:
+    sent = 0
+    while True:
+        # Popped before sending (at-most-once): a crash mid-send drops the
+        # batch rather than emailing every agent in it twice.
+        raw = await redis.lpop(key, FLUSH_BATCH_SIZE)
+        if not raw:
+            break
+        sent += await _send_batch(session_factory, raw)
+        if len(raw) < FLUSH_BATCH_SIZE:
+            break
+    return sent
+
+
+async def _send_batch(session_factory, raw: list[str]) -> int:
+    """Send one popped batch, a SendGrid request per tenant; returns entries sent."""
+    from sqlalchemy import select
+
+    from app.middleware.tenant_context import set_tenant_context
+    from app.models.tenant import Tenant
+    from app.services.email_service import EmailService, decode_agent_notification
+
+    by_tenant: dict = {}
+    for item in raw:
+        try:
+            tenant_id, notification = decode_agent_notification(item)
+        except (ValueError, KeyError, TypeError) as e:
+            await logger.awarning("notify_flush_bad_entry", error=str(e))
+            continue
+        by_tenant.setdefault(tenant_id, []).append(notification)
+
+    email_service = EmailService()
+    sent = 0
+    for tenant_id, notifications in by_tenant.items():
+        async with session_factory() as session:
+            # email_campaigns is under RLS; the context is transaction-local
+            await set_tenant_context(session, str(tenant_id))
+            brokerage_name = await session.scalar(
+                select(Tenant.name).where(Tenant.id == tenant_id)
+            )
+            campaign = await email_service.send_agent_notifications(
+                db=session,
+                tenant_id=tenant_id,
+                notifications=notifications,
+                brokerage_name=brokerage_name,
+            )
+            await session.commit()
+        sent += campaign.sent if campaign else 0
+    return sent
@@ -0,0 +1,86 @@
+import asyncio
+
+import structlog
+import structlog.contextvars
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.workers.celery_app import celery_app
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(
+    bind=True,
+    name="app.workers.tasks.usage_reconcile.reconcile_usage_counters",
+    max_retries=2,
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    soft_time_limit=300,
+    time_limit=360,
+)
+def reconcile_usage_counters(self, correlation_id: str | None = None):
+    """Periodic task: re-sync Redis monthly usage counters from usage_events."""
+    if correlation_id:
+        structlog.contextvars.bind_contextvars(correlation_id=correlation_id)
+    try:
+        asyncio.run(_reconcile())
+    except SoftTimeLimitExceeded:
+        logger.error("usage_reconcile_timeout")
+        raise
+    except Exception as exc:
+        logger.error("usage_reconcile_error", error=str(exc))
+        raise self.retry(exc=exc) from exc
+
+
+async def _reconcile():
+    from datetime import UTC, datetime
+    from uuid import UUID
+
+    from sqlalchemy import select
+
+    from app.core.database import worker_session_factory
+    from app.core.redis import RedisPool
+    from app.middleware.tenant_context import set_tenant_context
+    from app.models.usage_event import UsageEvent
+    from app.services.content_service import ContentService, current_month_start
+
+    now = datetime.now(UTC)
+
+    async with worker_session_factory() as session:
+        result = await session.execute(
+            select(UsageEvent.tenant_id)
+            .where(
+                UsageEvent.event_type == "content_generation",
+                UsageEvent.created_at >= current_month_start(),
+            )
+            .distinct()
+        )
+        tenant_ids = set(result.scalars())
+
+    # Workers don't run the FastAPI lifespan, so open a pool for this run only
+    pool = RedisPool()
+    await pool.initialize()
+    try:
+        redis = pool.client
+        # Counters with no backing events this month (e.g. rolled-back
+        # generations) are rewritten to zero along with the rest
+        async for key in redis.scan_iter(match=f"usage:*:{now:%Y%m}"):
+            try:
+                tenant_ids.add(UUID(key.split(":")[1]))
+            except ValueError:
+                continue
+
+        for tenant_id in tenant_ids:
+            # The locked read /generate uses: the tenant row lock keeps
+            # generations from committing between the aggregate and the rewrite
+            async with worker_session_factory() as session:
+                await set_tenant_context(session, str(tenant_id))
+                await ContentService(session, redis=redis).get_monthly_usage(
+                    tenant_id, lock=True,
+                )
+                await session.commit()
+    finally:
+        await pool.close()
+
+    await logger.ainfo("usage_reconcile_complete", tenants=len(tenant_ids))
@@ -0,0 +1,204 @@
+import asyncio
+
+import structlog
+import structlog.contextvars
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.workers.celery_app import celery_app
+
+logger = structlog.get_logger()
+
+# Visits read from the buffer per transaction (15 columns each, so even a
+# single-tenant batch stays well under asyncpg's parameter limit)
+FLUSH_BATCH_SIZE = 1000
+
+# Held while draining: overlapping runs would each trim the other's batch
+FLUSH_LOCK_KEY = "page_visits:flush_lock"
+FLUSH_LOCK_TTL_SECONDS = 60
+
+
+@celery_app.task(
+    bind=True,
+    name="app.workers.tasks.visit_flush.flush_page_visits",
+    max_retries=2,
+    retry_backoff=True,
+    retry_backoff_max=60,
+    retry_jitter=True,
+    soft_time_limit=50,
+    time_limit=60,
+)
+def flush_page_visits(self, correlation_id: str | None = None):
+    """Periodic task: write buffered page visits to Postgres in batches."""
+    if correlation_id:
+        structlog.contextvars.bind_contextvars(correlation_id=correlation_id)
+    try:
+        asyncio.run(_flush())
+    except SoftTimeLimitExceeded:
+        logger.error("visit_flush_timeout")
+        raise
+    except Exception as exc:
+        logger.error("visit_flush_error", error=str(exc))
+        raise self.retry(exc=exc) from exc
+
+
+async def _flush() -> int:
+    from app.core.database import worker_session_factory
+    from app.core.redis import RedisPool
+    from app.services.lead_service import PAGE_VISIT_BUFFER_KEY
+
+    # Workers don't run the FastAPI lifespan, so open a pool for this run only
+    pool = RedisPool()
+    await pool.initialize()
+    flushed = 0
+    try:
+        redis = pool.client
+        if not await redis.set(FLUSH_LOCK_KEY, "1", nx=True, ex=FLUSH_LOCK_TTL_SECONDS):
+            return 0
+        try:
+            flushed = await _drain(redis, worker_session_factory, PAGE_VISIT_BUFFER_KEY)
+        finally:
+            await redis.delete(FLUSH_LOCK_KEY)
+    finally:
+        await pool.close()
+
+    if flushed:
+        await logger.ainfo("visit_flush_complete", visits=flushed)
+    return flushed
+
+
+async def _drain(redis, session_factory, key: str) -> int:
+    flushed = 0
+    while True:
+        # Read, insert, then trim: a crash before the trim replays the
+        # batch, and the insert skips rows whose id already landed.
+        raw = await redis.lrange(key, 0, FLUSH_BATCH_SIZE - 1)
+        if not raw:
+            break
+        async with session_factory() as session:
+            flushed += await _insert_visits(session, raw)
+            await session.commit()
+        await redis.ltrim(key, len(raw), -1)
+        if len(raw) < FLUSH_BATCH_SIZE:
+            break
+    return flushed
+
+
+async def _insert_visits(session, raw: list[str]) -> int:
+    """Insert one batch of buffered visits; returns the number written."""
+    from app.services.lead_service import decode_page_visit
+
+    rows = []
+    for item in raw:
+        try:
+            row = decode_page_visit(item)
+        except (ValueError, KeyError, TypeError) as e:
+            await logger.awarning("visit_flush_bad_entry", error=str(e))
+            continue
+        row["updated_at"] = row["created_at"]
+        rows.append(row)
+    if not rows:
+        return 0
+
+    connection = await session.connection()
+    driver = (await connection.get_raw_connection()).driver_connection
+    if hasattr(driver, "copy_records_to_table"):
+        return await _copy_visits(session, driver, rows)
+    return await _insert_visit_values(session, rows)
+
+
+def _by_tenant(rows: list[dict]) -> dict:
+    by_tenant: dict = {}
+    for row in rows:
+        by_tenant.setdefault(row["tenant_id"], []).append(row)
+    return by_tenant
+
+
+async def _copy_visits(session, driver, rows: list[dict]) -> int:
+    """Binary-COPY the batch into a staging table, then insert from it.
+
+    COPY has no ON CONFLICT, so it loads a transaction-scoped temp table and
+    an INSERT ... SELECT per tenant applies the replay and foreign-key rules:
+    joining agent_pages drops visits to deleted pages, and taking listing_id
+    from the listings join unlinks deleted listings.
+    """
+    from sqlalchemy import column, select, table, text
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    from app.middleware.tenant_context import set_tenant_context
+    from app.models.agent_page import AgentPage
+    from app.models.listing import Listing
+    from app.models.page_visit import PageVisit
+
+    columns = [col.name for col in PageVisit.__table__.columns]
+    await session.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS page_visits_incoming "
+        "(LIKE page_visits INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    await session.execute(text("TRUNCATE page_visits_incoming"))
+    await driver.copy_records_to_table(
+        "page_visits_incoming",
+        records=[tuple(row.get(name) for name in columns) for row in rows],
+        columns=columns,
+    )
+
+    staging = table("page_visits_incoming", *(column(name) for name in columns))
+    from_staging = (
+        select(*(Listing.id if name == "listing_id" else staging.c[name] for name in columns))
+        .select_from(staging)
+        .join(AgentPage, AgentPage.id == staging.c.agent_page_id)
+        .outerjoin(Listing, Listing.id == staging.c.listing_id)
+    )
+    written = 0
+    for tenant_id in _by_tenant(rows):
+        # page_visits and the joined tables are under RLS; the context is
+        # transaction-local, so each tenant's rows get their own.
+        await set_tenant_context(session, str(tenant_id))
+        result = await session.execute(
+            pg_insert(PageVisit.__table__)
+            .from_select(columns, from_staging.where(staging.c.tenant_id == tenant_id))
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+        written += result.rowcount
+    return written
+
+
+async def _insert_visit_values(session, rows: list[dict]) -> int:
+    """Multi-row INSERT fallback for drivers without COPY support."""
+    from sqlalchemy import select
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    from app.middleware.tenant_context import set_tenant_context
+    from app.models.agent_page import AgentPage
+    from app.models.listing import Listing
+    from app.models.page_visit import PageVisit
+
+    written = 0
+    for tenant_id, tenant_rows in _by_tenant(rows).items():
+        # page_visits (and the lookups below) are under RLS; the context is
+        # transaction-local, so each tenant's rows get their own.
+        await set_tenant_context(session, str(tenant_id))
+
+        # Pages or listings deleted since the hit would fail the whole batch
+        # on their foreign keys: drop visits to gone pages, unlink listings.
+        page_ids = {row["agent_page_id"] for row in tenant_rows}
+        listing_ids = {row["listing_id"] for row in tenant_rows if row["listing_id"]}
+        result = await session.execute(select(AgentPage.id).where(AgentPage.id.in_(page_ids)))
+        live_pages = set(result.scalars())
+        live_listings = set()
+        if listing_ids:
+            result = await session.execute(select(Listing.id).where(Listing.id.in_(listing_ids)))
+            live_listings = set(result.scalars())
+
+        values = []
+        for row in tenant_rows:
+            if row["agent_page_id"] not in live_pages:
+                continue
+            if row["listing_id"] not in live_listings:
+                row["listing_id"] = None
+            values.append(row)
+        if values:
+            result = await session.execute(
+                pg_insert(PageVisit).values(values).on_conflict_do_nothing(index_elements=["id"])
+            )
+            written += result.rowcount
+    return written
@@ -0,0 +1,43 @@
+"""replace usage_events credit index with a covering index
+
+Revision ID: k1l2m3n4o5p6
+Revises: j0k1l2m3n4o5
+Create Date: 2026-03-02 10:00:00.000000
+
+The monthly usage aggregate (ContentService.get_monthly_usage, shared by the
+billing usage endpoint and every credit check) sums credits_consumed and
+tokens_used for one tenant's content_generation events this month.  Adding
+those two columns as INCLUDE payload lets PostgreSQL answer the aggregate
+with an index-only scan instead of visiting heap pages per event.
+
+Supersedes ix_usage_events_tenant_type_created (same key columns).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "k1l2m3n4o5p6"
+down_revision: Union[str, None] = "j0k1l2m3n4o5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_usage_events_tenant_type_created_covering",
+        "usage_events",
+        ["tenant_id", "event_type", sa.text("created_at DESC")],
+        postgresql_include=["credits_consumed", "tokens_used"],
+    )
+    op.drop_index("ix_usage_events_tenant_type_created", table_name="usage_events")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_usage_events_tenant_type_created",
+        "usage_events",
+        ["tenant_id", "event_type", sa.text("created_at DESC")],
+    )
+    op.drop_index("ix_usage_events_tenant_type_created_covering", table_name="usage_events")
@@ -0,0 +1,37 @@
+"""index leads for keyset pagination
+
+Revision ID: l2m3n4o5p6q7
+Revises: k1l2m3n4o5p6
+Create Date: 2026-03-09 10:00:00.000000
+
+LeadService.list_leads pages with a keyset on (created_at, id), newest
+first, instead of OFFSET. Keying the tenant index on both columns in that
+order lets PostgreSQL seek straight to the cursor and read one page, at
+any depth.
+
+Supersedes ix_leads_tenant_created (a prefix of the new key).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "l2m3n4o5p6q7"
+down_revision: Union[str, None] = "k1l2m3n4o5p6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_leads_tenant_created_id",
+        "leads",
+        ["tenant_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.drop_index("ix_leads_tenant_created", table_name="leads")
+
+
+def downgrade() -> None:
+    op.create_index("ix_leads_tenant_created", "leads", ["tenant_id", "created_at"])
+    op.drop_index("ix_leads_tenant_created_id", table_name="leads")
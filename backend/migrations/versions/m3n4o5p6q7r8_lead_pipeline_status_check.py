@@ -0,0 +1,54 @@
+"""enforce lead pipeline status and closed_at in the database
+
+Revision ID: m3n4o5p6q7r8
+Revises: l2m3n4o5p6q7
+Create Date: 2026-03-10 10:00:00.000000
+
+LeadService.update_lead validates pipeline_status and stamps closed_at in
+Python, which only covers changes made through the ORM. Set-based updates
+(LeadService.bulk_transition, ad-hoc SQL) need the same rules server-side:
+
+- ck_leads_pipeline_status restricts pipeline_status to the pipeline stages
+  (source of truth: app.models.lead.PIPELINE_STATUSES).
+- trg_leads_closed_at stamps closed_at when a lead moves into 'closed'.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "m3n4o5p6q7r8"
+down_revision: Union[str, None] = "l2m3n4o5p6q7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_check_constraint(
+        "ck_leads_pipeline_status", "leads",
+        "pipeline_status IN ('new','contacted','showing','under_contract','closed','lost')")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION leads_set_closed_at() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.pipeline_status = 'closed'
+                    AND OLD.pipeline_status IS DISTINCT FROM 'closed' THEN
+                NEW.closed_at := now();
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER trg_leads_closed_at "
+        "BEFORE UPDATE OF pipeline_status ON leads "
+        "FOR EACH ROW EXECUTE FUNCTION leads_set_closed_at()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_leads_closed_at ON leads")
+    op.execute("DROP FUNCTION IF EXISTS leads_set_closed_at()")
+    op.drop_constraint("ck_leads_pipeline_status", "leads", type_="check")
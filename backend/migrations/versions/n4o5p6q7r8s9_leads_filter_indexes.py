@@ -0,0 +1,68 @@
+"""index lead list filters in list order and cover the summary columns
+
+Revision ID: n4o5p6q7r8s9
+Revises: m3n4o5p6q7r8
+Create Date: 2026-03-11 10:00:00.000000
+
+LeadService.list_leads filters by agent (always, for agent users), status or
+utm_source and pages newest first by keyset on (created_at, id). Extending
+each filter index with that order turns a filtered page into one index range
+read instead of a bitmap scan plus sort:
+
+- ix_leads_tenant_agent  (tenant_id, agent_id, created_at DESC, id DESC),
+  partial on agent_id IS NOT NULL (filters are always by a given agent)
+- ix_leads_tenant_status (tenant_id, pipeline_status, created_at DESC, id DESC)
+- ix_leads_tenant_source (tenant_id, utm_source, created_at DESC, id DESC),
+  partial on utm_source IS NOT NULL (new)
+
+ix_leads_tenant_created_id gains INCLUDE (agent_id, pipeline_status,
+utm_source, closed_value), the columns LeadService.get_summary aggregates,
+so the summary can run as an index-only scan of the tenant's leads.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "n4o5p6q7r8s9"
+down_revision: Union[str, None] = "m3n4o5p6q7r8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIST_ORDER = [sa.text("created_at DESC"), sa.text("id DESC")]
+
+
+def upgrade() -> None:
+    op.drop_index("ix_leads_tenant_agent", table_name="leads")
+    op.create_index(
+        "ix_leads_tenant_agent", "leads",
+        ["tenant_id", "agent_id", *LIST_ORDER],
+        postgresql_where=sa.text("agent_id IS NOT NULL"),
+    )
+    op.drop_index("ix_leads_tenant_status", table_name="leads")
+    op.create_index(
+        "ix_leads_tenant_status", "leads",
+        ["tenant_id", "pipeline_status", *LIST_ORDER],
+    )
+    op.create_index(
+        "ix_leads_tenant_source", "leads",
+        ["tenant_id", "utm_source", *LIST_ORDER],
+        postgresql_where=sa.text("utm_source IS NOT NULL"),
+    )
+    op.drop_index("ix_leads_tenant_created_id", table_name="leads")
+    op.create_index(
+        "ix_leads_tenant_created_id", "leads",
+        ["tenant_id", *LIST_ORDER],
+        postgresql_include=["agent_id", "pipeline_status", "utm_source", "closed_value"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leads_tenant_created_id", table_name="leads")
+    op.create_index("ix_leads_tenant_created_id", "leads", ["tenant_id", *LIST_ORDER])
+    op.drop_index("ix_leads_tenant_source", table_name="leads")
+    op.drop_index("ix_leads_tenant_status", table_name="leads")
+    op.create_index("ix_leads_tenant_status", "leads", ["tenant_id", "pipeline_status"])
+    op.drop_index("ix_leads_tenant_agent", table_name="leads")
+    op.create_index("ix_leads_tenant_agent", "leads", ["tenant_id", "agent_id"])
@@ -7,7 +7,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.brand_profile import BrandProfile
 from app.models.listing import Listing
 from app.models.tenant import Tenant
-from app.services.ai_service import AIService, _CircuitBreaker
+from app.services.ai_service import (
+    AIService,
+    _CircuitBreaker,
+    _get_anthropic_client,
+    close_anthropic_client,
+)
 from app.services.prompt_builder import PromptBuilder
 
 
@@ -120,7 +125,7 @@ class TestAIServiceGenerate:
             # Reset circuit breaker
             from app.services.ai_service import _circuit
             _circuit._state = "closed"
-            _circuit._failure_count = 0
+            _circuit._reset_window()
 
             result = await service.generate(
                 listing=listing,
@@ -135,6 +140,43 @@ class TestAIServiceGenerate:
         assert result["body"] == "Generated content here"
         assert result["prompt_tokens"] == 100
 
+    @pytest.mark.asyncio
+    async def test_system_prompt_cached_and_cached_tokens_counted(
+        self, db_session: AsyncSession, test_tenant: Tenant
+    ):
+        listing = self._mock_listing()
+        mock_resp = self._mock_response()
+        mock_resp.usage = MagicMock(
+            input_tokens=20, output_tokens=50,
+            cache_creation_input_tokens=None, cache_read_input_tokens=900,
+        )
+
+        with patch("app.services.ai_service.get_settings") as mock_settings:
+            mock_settings.return_value.anthropic_api_key = "sk-test"
+            service = AIService()
+            service.client = MagicMock()
+            service.client.messages = MagicMock()
+            service.client.messages.create = AsyncMock(return_value=mock_resp)
+
+            from app.services.ai_service import _circuit
+            _circuit._state = "closed"
+            _circuit._reset_window()
+
+            result = await service.generate(
+                listing=listing,
+                content_type="listing_description",
+                tone="professional",
+                brand_profile_id=None,
+                instructions=None,
+                tenant_id=str(test_tenant.id),
+                db=db_session,
+            )
+
+        (system_block,) = service.client.messages.create.call_args.kwargs["system"]
+        assert system_block["cache_control"] == {"type": "ephemeral"}
+        assert "professional" in system_block["text"]
+        assert result["prompt_tokens"] == 920
+
     @pytest.mark.asyncio
     async def test_generate_api_connection_error(
         self, db_session: AsyncSession, test_tenant: Tenant
@@ -152,7 +194,7 @@ class TestAIServiceGenerate:
 
             from app.services.ai_service import _circuit
             _circuit._state = "closed"
-            _circuit._failure_count = 0
+            _circuit._reset_window()
 
             with pytest.raises(anthropic.APIConnectionError):
                 await service.generate(
@@ -189,7 +231,7 @@ class TestAIServiceGenerate:
 
             from app.services.ai_service import _circuit
             _circuit._state = "closed"
-            _circuit._failure_count = 0
+            _circuit._reset_window()
 
             with pytest.raises(anthropic.APIStatusError):
                 await service.generate(
@@ -229,7 +271,7 @@ class TestAIServiceGenerate:
 
             from app.services.ai_service import _circuit
             _circuit._state = "closed"
-            _circuit._failure_count = 0
+            _circuit._reset_window()
 
             with pytest.raises(anthropic.APIStatusError):
                 await service.generate(
@@ -246,6 +288,175 @@ class TestAIServiceGenerate:
             assert _circuit._failure_count == 0
 
 
+class TestSharedAnthropicClient:
+    @pytest.mark.asyncio
+    async def test_instances_share_one_client(self):
+        with patch("app.services.ai_service.get_settings") as mock_settings:
+            mock_settings.return_value.anthropic_api_key = "sk-test"
+            first = AIService()
+            second = AIService()
+        try:
+            assert first.client is second.client
+        finally:
+            await close_anthropic_client()
+
+    @pytest.mark.asyncio
+    async def test_close_resets_client(self):
+        first = _get_anthropic_client("sk-test")
+        await close_anthropic_client()
+        assert first.is_closed()
+        second = _get_anthropic_client("sk-test")
+        try:
+            assert second is not first
+        finally:
+            await close_anthropic_client()
+
+    @pytest.mark.asyncio
+    async def test_new_client_when_api_key_changes(self):
+        try:
+            assert _get_anthropic_client("sk-a") is not _get_anthropic_client("sk-b")
+        finally:
+            await close_anthropic_client()
+
+
+class TestModelSelection:
+    def test_only_short_types_are_overridden(self):
+        with patch("app.services.ai_service.get_settings") as mock_settings:
+            mock_settings.return_value.anthropic_api_key = "sk-test"
+            mock_settings.return_value.claude_model_default = "model-default"
+            mock_settings.return_value.claude_model_short = "model-short"
+            service = AIService()
+
+        assert service._model_overrides == {"social_x": "model-short"}
+        assert service._default_model == "model-default"
+
+
+class TestGenerateBatch:
+    def _service(self, text):
+        with patch("app.services.ai_service.get_settings") as mock_settings:
+            mock_settings.return_value.anthropic_api_key = "sk-test"
+            mock_settings.return_value.claude_model_default = "model-default"
+            mock_settings.return_value.claude_model_short = "model-short"
+            service = AIService()
+        resp = MagicMock()
+        resp.content = [MagicMock(text=text)]
+        resp.usage = MagicMock(input_tokens=1001, output_tokens=300)
+        service.client = MagicMock()
+        service.client.messages.create = AsyncMock(return_value=resp)
+        service._load_context = AsyncMock(return_value=(None, None))
+        self.listing = MagicMock(spec=Listing, address_full="1 Ocean Dr", price=None, sqft=None)
+
+        from app.services.ai_service import _circuit
+        _circuit._state = "closed"
+        _circuit._reset_window()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_one_call_split_per_type(self):
+        service = self._service(
+            "=== [1] social_x ===\nShort #listing\n=== [2] flyer ===\nFlyer copy"
+        )
+
+        results = await service.generate_batch(
+            listing=self.listing, content_types=["social_x", "flyer"],
+            tone="professional", brand_profile_id=None, tenant_id="t", db=MagicMock(),
+        )
+
+        service.client.messages.create.assert_awaited_once()
+        call_kwargs = service.client.messages.create.call_args.kwargs
+        # flyer needs the default model, so the whole call uses it
+        assert call_kwargs["model"] == "model-default"
+        assert call_kwargs["max_tokens"] == 4096
+        assert results["social_x"]["body"] == "Short #listing"
+        assert results["social_x"]["metadata"]["hashtags"] == ["#listing"]
+        assert results["flyer"]["body"] == "Flyer copy"
+        # Usage is split across pieces and still sums to the call's total
+        assert [r["prompt_tokens"] for r in results.values()] == [501, 500]
+        assert sum(r["completion_tokens"] for r in results.values()) == 300
+
+    @pytest.mark.asyncio
+    async def test_missing_sections_are_left_out(self):
+        service = self._service("=== [1] social_x ===\nOnly this one")
+
+        results = await service.generate_batch(
+            listing=self.listing, content_types=["social_x", "flyer"],
+            tone="professional", brand_profile_id=None, tenant_id="t", db=MagicMock(),
+        )
+
+        assert list(results) == ["social_x"]
+        assert results["social_x"]["prompt_tokens"] == 1001
+
+
+class TestGenerateVariants:
+    def _service(self, *outcomes):
+        with patch("app.services.ai_service.get_settings") as mock_settings:
+            mock_settings.return_value.anthropic_api_key = "sk-test"
+            mock_settings.return_value.claude_model_default = "model-default"
+            mock_settings.return_value.claude_model_short = "model-short"
+            service = AIService()
+        responses = []
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                responses.append(outcome)
+                continue
+            resp = MagicMock()
+            resp.content = [MagicMock(text=outcome)]
+            resp.usage = MagicMock(input_tokens=100, output_tokens=20)
+            responses.append(resp)
+        service.client = MagicMock()
+        service.client.messages.create = AsyncMock(side_effect=responses)
+        service._load_context = AsyncMock(return_value=(None, None))
+        self.listing = MagicMock(spec=Listing, address_full="1 Ocean Dr", price=None, sqft=None)
+
+        from app.services.ai_service import _circuit
+        _circuit._state = "closed"
+        _circuit._reset_window()
+        return service
+
+    async def _generate(self, service, count):
+        return await service.generate_variants(
+            listing=self.listing, content_type="social_x", tone="professional",
+            brand_profile_id=None, instructions=None, tenant_id="t", db=MagicMock(),
+            count=count,
+        )
+
+    @pytest.mark.asyncio
+    async def test_prompt_built_once_for_all_variants(self):
+        service = self._service("First #a", "Second #b", "Third #c")
+
+        with patch.object(
+            service.prompt_builder, "build", wraps=service.prompt_builder.build,
+        ) as build:
+            results = await self._generate(service, 3)
+
+        build.assert_called_once()
+        service._load_context.assert_awaited_once()
+        assert service.client.messages.create.await_count == 3
+        prompts = {
+            str(call.kwargs["messages"]) for call in service.client.messages.create.call_args_list
+        }
+        assert len(prompts) == 1
+        assert [r["body"] for r in results] == ["First #a", "Second #b", "Third #c"]
+        assert results[0]["model"] == "model-short"
+        assert results[0]["metadata"]["hashtags"] == ["#a"]
+
+    @pytest.mark.asyncio
+    async def test_failed_variants_left_out(self):
+        service = self._service("First", anthropic.APIConnectionError(request=MagicMock()))
+
+        results = await self._generate(service, 2)
+
+        assert [r["body"] for r in results] == ["First"]
+
+    @pytest.mark.asyncio
+    async def test_raises_when_every_variant_fails(self):
+        error = anthropic.APIConnectionError(request=MagicMock())
+        service = self._service(error, error)
+
+        with pytest.raises(anthropic.APIConnectionError):
+            await self._generate(service, 2)
+
+
 class TestExtractMetadata:
     def test_word_count(self):
         with patch("app.services.ai_service.get_settings") as mock_settings:
@@ -277,6 +488,16 @@ class TestExtractMetadata:
         meta = service._extract_metadata("Body with #tag", "listing_description")
         assert "hashtags" not in meta
 
+    def test_matches_str_split_on_mixed_whitespace(self):
+        with patch("app.services.ai_service.get_settings") as mock_settings:
+            mock_settings.return_value.anthropic_api_key = "sk-test"
+            service = AIService()
+
+        body = "  Sunny\tcondo\n\n#Beach  #Miami\u00a0view #  \n"
+        meta = service._extract_metadata(body, "social_x")
+        assert meta["word_count"] == len(body.split())
+        assert meta["hashtags"] == [w for w in body.split() if w.startswith("#")]
+
 
 class TestMarketDataInGenerate:
     """Test that tenant market data flows through AIService.generate into prompts."""
@@ -342,7 +563,7 @@ class TestMarketDataInGenerate:
 
             from app.services.ai_service import _circuit
             _circuit._state = "closed"
-            _circuit._failure_count = 0
+            _circuit._reset_window()
 
             # Spy on prompt builder to verify market_areas is passed
             original_build = service.prompt_builder.build
@@ -398,7 +619,7 @@ class TestMarketDataInGenerate:
 
             from app.services.ai_service import _circuit
             _circuit._state = "closed"
-            _circuit._failure_count = 0
+            _circuit._reset_window()
 
             result = await service.generate(
                 listing=listing,
@@ -437,7 +658,7 @@ class TestMarketDataInGenerate:
 
             from app.services.ai_service import _circuit
             _circuit._state = "closed"
-            _circuit._failure_count = 0
+            _circuit._reset_window()
 
             result = await service.generate(
                 listing=listing,
@@ -454,7 +675,54 @@ class TestMarketDataInGenerate:
 
 class TestCircuitBreakerHalfOpen:
     def test_half_open_blocks_second_request(self):
-        cb = _CircuitBreaker(threshold=2, recovery=1)
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
         cb._set_state("half_open")
-        # Half-open should return False (only one probe allowed)
-        assert cb.allow_request() is False
+        assert cb.allow_request() is not None  # takes the single probe slot
+        # Half-open should reject (only one probe allowed)
+        assert cb.allow_request() is None
+
+    @pytest.mark.asyncio
+    async def test_stale_call_finishing_in_half_open_keeps_probe_slot(self):
+        import asyncio
+        import time
+
+        from app.services import ai_service
+        from app.services.ai_service import CircuitBreakerOpenError
+
+        cb = _CircuitBreaker(min_calls=1, recovery=1)
+        stale_release = asyncio.Event()
+        probe_release = asyncio.Event()
+        releases = [stale_release, probe_release]
+
+        async def _create(**kwargs):
+            await releases.pop(0).wait()
+            return MagicMock()
+
+        with (
+            patch("app.services.ai_service.get_settings") as mock_settings,
+            patch.object(ai_service, "_circuit", cb),
+        ):
+            mock_settings.return_value.anthropic_api_key = "sk-test"
+            service = AIService()
+            service.client = MagicMock()
+            service.client.messages.create = _create
+
+            # Admitted while closed, still waiting on the API
+            stale = asyncio.create_task(service._create_message("m", "s", "u"))
+            await asyncio.sleep(0)
+            cb.record_failure(cb.allow_request())  # another call trips the breaker
+            cb._last_failure_time = time.monotonic() - 2
+            probe = asyncio.create_task(service._create_message("m", "s", "u"))
+            await asyncio.sleep(0)
+            assert cb._state == "half_open"
+
+            stale_release.set()
+            await stale
+            # The stale success neither closed the breaker nor freed the slot
+            assert cb._state == "half_open"
+            with pytest.raises(CircuitBreakerOpenError):
+                await service._create_message("m", "s", "u")
+
+            probe_release.set()
+            await probe
+            assert cb._state == "closed"
@@ -1,4 +1,6 @@
 """Tests for billing service."""
+import threading
+from datetime import UTC, datetime, timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -46,6 +48,29 @@ class TestGetCurrentUsage:
         assert result["tokens_used"] == 500
         assert result["total_events"] == 1
 
+    @pytest.mark.asyncio
+    async def test_excludes_previous_month_usage(
+        self, db_session: AsyncSession, test_tenant: Tenant, test_user
+    ):
+        last_month = datetime.now(UTC).replace(day=1) - timedelta(days=1)
+        db_session.add(
+            UsageEvent(
+                tenant_id=test_tenant.id,
+                user_id=test_user.id,
+                event_type="content_generation",
+                content_type="listing_description",
+                tokens_used=900,
+                credits_consumed=9,
+                created_at=last_month,
+            )
+        )
+        await db_session.flush()
+
+        result = await BillingService(db_session).get_current_usage(test_tenant.id)
+
+        assert result["credits_used"] == 0
+        assert result["total_events"] == 0
+
 
 class TestCreateOrUpdateSubscription:
     @pytest.mark.asyncio
@@ -85,6 +110,40 @@ class TestCreateOrUpdateSubscription:
         assert result["monthly_limit"] == 1000
         assert test_tenant.stripe_customer_id == "cus_test123"
 
+    @pytest.mark.asyncio
+    async def test_stripe_calls_run_off_event_loop_thread(
+        self, db_session: AsyncSession, test_tenant: Tenant
+    ):
+        loop_thread = threading.get_ident()
+        call_threads = []
+
+        def fake_create(**kwargs):
+            call_threads.append(threading.get_ident())
+            obj = MagicMock()
+            obj.id = "stripe_obj"
+            return obj
+
+        with (
+            patch(
+                "app.services.billing_service.stripe.Customer.create",
+                side_effect=fake_create,
+            ),
+            patch(
+                "app.services.billing_service"
+                ".stripe.Subscription.create",
+                side_effect=fake_create,
+            ),
+            patch(
+                "app.services.billing_service.get_settings",
+            ) as mock_settings,
+        ):
+            mock_settings.return_value.stripe_secret_key = "sk_test"  # noqa: S105
+            service = BillingService(db_session)
+            await service.create_or_update_subscription(test_tenant.id, "price_other")
+
+        assert len(call_threads) == 2
+        assert loop_thread not in call_threads
+
     @pytest.mark.asyncio
     async def test_existing_customer(self, db_session: AsyncSession, test_tenant: Tenant):
         test_tenant.stripe_customer_id = "cus_existing"
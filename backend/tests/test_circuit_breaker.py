@@ -1,6 +1,7 @@
 """Tests for the AI service circuit breaker."""
+import asyncio
 import time
-
+from concurrent.futures import ThreadPoolExecutor
 
 from app.services.ai_service import (
     CircuitBreakerOpenError,
@@ -8,54 +9,184 @@ from app.services.ai_service import (
 )
 
 
+def _fail(cb: _CircuitBreaker) -> None:
+    cb.record_failure(cb.allow_request())
+
+
+def _succeed(cb: _CircuitBreaker) -> None:
+    cb.record_success(cb.allow_request())
+
+
 class TestCircuitBreaker:
     def test_starts_closed(self):
-        cb = _CircuitBreaker(threshold=3, recovery=10)
-        assert cb.allow_request() is True
-
-    def test_opens_after_threshold_failures(self):
-        cb = _CircuitBreaker(threshold=3, recovery=10)
-        cb.record_failure()
-        cb.record_failure()
-        assert cb.allow_request() is True  # still closed at 2
-        cb.record_failure()
-        assert cb.allow_request() is False  # opened at 3
-
-    def test_success_resets_count(self):
-        cb = _CircuitBreaker(threshold=3, recovery=10)
-        cb.record_failure()
-        cb.record_failure()
-        cb.record_success()
-        cb.record_failure()
-        cb.record_failure()
-        assert cb.allow_request() is True  # only 2 consecutive failures
+        cb = _CircuitBreaker(min_calls=3, recovery=10)
+        assert cb.allow_request() is not None
+
+    def test_stays_closed_below_min_calls(self):
+        cb = _CircuitBreaker(window_size=10, min_calls=5, recovery=10)
+        for _ in range(4):
+            _fail(cb)
+        assert cb.allow_request() is not None  # 100% failures, but only 4 calls seen
+        _fail(cb)
+        assert cb.allow_request() is None  # opened at the 5th call
+
+    def test_interleaved_successes_still_trip(self):
+        cb = _CircuitBreaker(window_size=10, min_calls=10, recovery=10)
+        for _ in range(5):
+            _succeed(cb)
+            _fail(cb)
+        assert cb.allow_request() is None  # 50% failure rate over 10 calls
+
+    def test_stays_closed_below_failure_rate(self):
+        cb = _CircuitBreaker(window_size=10, min_calls=10, recovery=10)
+        for _ in range(4):
+            _fail(cb)
+        for _ in range(6):
+            _succeed(cb)
+        assert cb.allow_request() is not None  # 40% failure rate
+
+    def test_old_outcomes_slide_out_of_window(self):
+        cb = _CircuitBreaker(window_size=4, min_calls=4, recovery=10)
+        _fail(cb)
+        for _ in range(4):
+            _succeed(cb)
+        assert cb._failure_count == 0  # the failure was evicted
+        _fail(cb)
+        assert cb.allow_request() is not None  # 1 of 4
 
     def test_half_open_after_recovery(self):
-        cb = _CircuitBreaker(threshold=2, recovery=1)
-        cb.record_failure()
-        cb.record_failure()
-        assert cb.allow_request() is False  # open, recovery not yet elapsed
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        _fail(cb)
+        _fail(cb)
+        assert cb.allow_request() is None  # open, recovery not yet elapsed
         # Simulate time passing by backdating the last failure
         cb._last_failure_time = time.monotonic() - 2
-        assert cb.allow_request() is True  # recovery elapsed → half_open probe
+        assert cb.allow_request() is not None  # recovery elapsed → half_open probe
 
     def test_success_in_half_open_closes(self):
-        cb = _CircuitBreaker(threshold=2, recovery=1)
-        cb.record_failure()
-        cb.record_failure()
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        _fail(cb)
+        _fail(cb)
         cb._last_failure_time = time.monotonic() - 2
-        assert cb.allow_request() is True  # half_open probe
-        cb.record_success()
-        assert cb.allow_request() is True  # back to closed
+        probe = cb.allow_request()  # half_open probe
+        assert probe is not None
+        cb.record_success(probe)
+        assert cb.allow_request() is not None  # back to closed
+        _fail(cb)
+        assert cb.allow_request() is not None  # window was reset on close
 
     def test_failure_in_half_open_reopens(self):
-        cb = _CircuitBreaker(threshold=2, recovery=1)
-        cb.record_failure()
-        cb.record_failure()
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        _fail(cb)
+        _fail(cb)
+        cb._last_failure_time = time.monotonic() - 2
+        probe = cb.allow_request()  # transition to half_open
+        cb.record_failure(probe)  # probe failed → reopens
+        assert cb.allow_request() is None  # reopened, recovery not yet elapsed
+
+    def test_only_one_probe_after_recovery(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        _fail(cb)
+        _fail(cb)
+        cb._last_failure_time = time.monotonic() - 2
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cb.allow_request(), range(32)))
+        assert sum(permit is not None for permit in results) == 1
+
+    def test_released_probe_frees_slot(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        _fail(cb)
+        _fail(cb)
         cb._last_failure_time = time.monotonic() - 2
-        cb.allow_request()  # transition to half_open
-        cb.record_failure()  # probe failed → reopens
-        assert cb.allow_request() is False  # reopened, recovery not yet elapsed
+        probe = cb.allow_request()
+        assert probe is not None
+        assert cb.allow_request() is None
+        cb.release_probe(probe)  # probe ended without a health signal (e.g. 4xx)
+        assert cb.allow_request() is not None
+
+    def test_release_probe_is_noop_when_closed(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        cb.release_probe(cb.allow_request())
+        assert cb.allow_request() is not None
+
+    def test_stale_call_cannot_release_probe_slot(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        stale = cb.allow_request()  # admitted while closed, still in flight
+        _fail(cb)
+        _fail(cb)
+        cb._last_failure_time = time.monotonic() - 2
+        assert cb.allow_request() is not None  # the probe
+        cb.release_probe(stale)  # stale call finishes without an outcome
+        assert cb.allow_request() is None  # slot still held by the probe
+
+    def test_stale_success_does_not_close_half_open(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        stale = cb.allow_request()
+        _fail(cb)
+        _fail(cb)
+        cb._last_failure_time = time.monotonic() - 2
+        probe = cb.allow_request()
+        cb.record_success(stale)  # finishes during half_open
+        cb.release_probe(stale)
+        assert cb._state == "half_open"
+        assert cb.allow_request() is None  # no second probe
+        cb.record_failure(probe)  # only the probe's outcome decides
+        assert cb._state == "open"
+
+    def test_stale_failure_does_not_reopen_or_free_slot(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        stale = cb.allow_request()
+        _fail(cb)
+        _fail(cb)
+        cb._last_failure_time = time.monotonic() - 2
+        probe = cb.allow_request()
+        cb.record_failure(stale)
+        assert cb._state == "half_open"
+        assert cb.allow_request() is None
+        cb.record_success(probe)
+        assert cb._state == "closed"
+
+    def test_finished_probe_cannot_release_next_probe(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=1)
+        _fail(cb)
+        _fail(cb)
+        cb._last_failure_time = time.monotonic() - 2
+        first = cb.allow_request()
+        cb.record_failure(first)  # reopens
+        cb._last_failure_time = time.monotonic() - 2
+        assert cb.allow_request() is not None  # the next probe
+        cb.release_probe(first)  # first probe's cleanup runs late
+        assert cb.allow_request() is None
+
+    async def test_timer_moves_open_to_half_open_without_traffic(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=0.01)
+        _fail(cb)
+        _fail(cb)
+        assert cb._state == "open"
+        await asyncio.sleep(0.05)
+        assert cb._state == "half_open"
+        assert cb.allow_request() is not None  # probe slot still available
+        assert cb.allow_request() is None
+
+    async def test_failed_probe_rearms_timer(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=10)
+        _fail(cb)
+        _fail(cb)
+        first = cb._recovery_timer
+        cb._set_state("half_open")
+        _fail(cb)
+        assert first.cancelled()
+        assert cb._recovery_timer is not first
+
+    async def test_timer_does_not_override_closed_state(self):
+        cb = _CircuitBreaker(min_calls=2, recovery=0.01)
+        _fail(cb)
+        _fail(cb)
+        cb._set_state("half_open")
+        _succeed(cb)
+        assert cb._recovery_timer is None
+        cb._on_recovery_elapsed()  # late callback must not reopen anything
+        assert cb._state == "closed"
 
     def test_circuit_breaker_open_exception(self):
         exc = CircuitBreakerOpenError()
@@ -7,6 +7,17 @@ import pytest
 from celery.exceptions import SoftTimeLimitExceeded
 
 
+@pytest.fixture(autouse=True)
+def mock_redis_pool():
+    """Agent notifications are queued through a per-run pool; keep it off Redis."""
+    pool = MagicMock()
+    pool.initialize = AsyncMock()
+    pool.close = AsyncMock()
+    pool.client.rpush = AsyncMock()
+    with patch("app.workers.tasks.content_auto_gen.RedisPool", return_value=pool):
+        yield pool
+
+
 # ── Celery wrapper tests ─────────────────────────────────────────
 
 
@@ -89,6 +100,47 @@ class TestAutoGenerateTask:
 
         mock_retry.assert_called_once()
 
+    def test_fans_out_one_task_per_listing(self):
+        """Several listings are dispatched as a group instead of run inline."""
+        from app.workers.tasks.content_auto_gen import (
+            auto_generate_for_listing,
+            auto_generate_for_new_listings,
+        )
+
+        tid = str(uuid4())
+        lids = [str(uuid4()), str(uuid4()), str(uuid4())]
+
+        with (
+            patch("app.workers.tasks.content_auto_gen.asyncio.run") as mock_run,
+            patch("app.workers.tasks.content_auto_gen.group") as mock_group,
+        ):
+            auto_generate_for_new_listings(tid, lids, correlation_id="req-abc")
+
+        mock_run.assert_not_called()
+        signatures = list(mock_group.call_args.args[0])
+        assert [sig.task for sig in signatures] == [auto_generate_for_listing.name] * 3
+        assert [sig.args for sig in signatures] == [(tid, lid, "req-abc") for lid in lids]
+        mock_group.return_value.apply_async.assert_called_once()
+
+    def test_single_listing_task_runs_generation(self):
+        """The per-listing task generates for just its listing."""
+        from app.workers.tasks.content_auto_gen import auto_generate_for_listing
+
+        tid = str(uuid4())
+        lid = str(uuid4())
+
+        with (
+            patch("app.workers.tasks.content_auto_gen.asyncio.run") as mock_run,
+            patch(
+                "app.workers.tasks.content_auto_gen._auto_generate",
+                new=MagicMock(return_value="coro"),
+            ) as mock_auto_generate,
+        ):
+            auto_generate_for_listing(tid, lid)
+
+        mock_auto_generate.assert_called_once_with(tid, [lid])
+        mock_run.assert_called_once_with("coro")
+
 
 # ── Async helper tests ───────────────────────────────────────────
 
@@ -103,14 +155,14 @@ class TestAutoGenerateHelper:
         mock_session.__aenter__ = AsyncMock(return_value=mock_session)
         mock_session.__aexit__ = AsyncMock(return_value=None)
 
-        # Tenant query returns None
+        # Tenant query returns no row
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = None
+        mock_result.first.return_value = None
         mock_session.execute = AsyncMock(return_value=mock_result)
 
         tid = str(uuid4())
         with patch(
-            "app.core.database.async_session_factory",
+            "app.workers.tasks.content_auto_gen.worker_session_factory",
             return_value=mock_session,
         ):
             await _auto_generate(tid, [str(uuid4())])
@@ -132,11 +184,11 @@ class TestAutoGenerateHelper:
         mock_tenant.settings = {"auto_generate_on_new_listing": False}
 
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = mock_tenant
+        mock_result.first.return_value = (mock_tenant, None, uuid4())
         mock_session.execute = AsyncMock(return_value=mock_result)
 
         with patch(
-            "app.core.database.async_session_factory",
+            "app.workers.tasks.content_auto_gen.worker_session_factory",
             return_value=mock_session,
         ):
             await _auto_generate(str(mock_tenant.id), [str(uuid4())])
@@ -156,7 +208,7 @@ class TestAutoGenerateHelper:
         mock_tenant.id = uuid4()
         mock_tenant.settings = {}
 
-        # First call: tenant, second: brand profile, third: system user
+        # Tenant context, then the tenant/brand profile/system user row
         call_count = 0
 
         def side_effect(*args, **kwargs):
@@ -167,20 +219,14 @@ class TestAutoGenerateHelper:
                 # set_tenant_context
                 return result
             if call_count == 2:
-                # tenant
-                result.scalar_one_or_none.return_value = mock_tenant
-            elif call_count == 3:
-                # brand profile
-                result.scalar_one_or_none.return_value = None
-            elif call_count == 4:
-                # system user
-                result.scalar_one_or_none.return_value = None
+                # tenant, no brand profile, no system user
+                result.first.return_value = (mock_tenant, None, None)
             return result
 
         mock_session.execute = AsyncMock(side_effect=side_effect)
 
         with patch(
-            "app.core.database.async_session_factory",
+            "app.workers.tasks.content_auto_gen.worker_session_factory",
             return_value=mock_session,
         ):
             await _auto_generate(str(mock_tenant.id), [str(uuid4())])
@@ -214,19 +260,15 @@ class TestAutoGenerateHelper:
             if call_count == 1:
                 return result  # set_tenant_context
             if call_count == 2:
-                result.scalar_one_or_none.return_value = mock_tenant
+                result.first.return_value = (mock_tenant, None, mock_user.id)
             elif call_count == 3:
-                result.scalar_one_or_none.return_value = None  # no brand profile
-            elif call_count == 4:
-                result.scalar_one_or_none.return_value = mock_user
-            elif call_count >= 5:
-                result.scalar_one_or_none.return_value = None  # listing not found
+                result.scalars.return_value = []  # listing not found
             return result
 
         mock_session.execute = AsyncMock(side_effect=side_effect)
 
         with patch(
-            "app.core.database.async_session_factory",
+            "app.workers.tasks.content_auto_gen.worker_session_factory",
             return_value=mock_session,
         ):
             await _auto_generate(str(tenant_id), [str(uuid4())])
@@ -272,13 +314,9 @@ class TestAutoGenerateHelper:
             if call_count == 1:
                 return result  # set_tenant_context
             if call_count == 2:
-                result.scalar_one_or_none.return_value = mock_tenant
+                result.first.return_value = (mock_tenant, mock_bp.id, mock_user.id)
             elif call_count == 3:
-                result.scalar_one_or_none.return_value = mock_bp
-            elif call_count == 4:
-                result.scalar_one_or_none.return_value = mock_user
-            elif call_count == 5:
-                result.scalar_one_or_none.return_value = mock_listing
+                result.scalars.return_value = [mock_listing]
             return result
 
         mock_session.execute = AsyncMock(side_effect=side_effect)
@@ -297,15 +335,15 @@ class TestAutoGenerateHelper:
 
         with (
             patch(
-                "app.core.database.async_session_factory",
+                "app.workers.tasks.content_auto_gen.worker_session_factory",
                 return_value=mock_session,
             ),
             patch(
-                "app.services.ai_service.AIService",
+                "app.workers.tasks.content_auto_gen.AIService",
                 return_value=mock_ai,
             ),
             patch(
-                "app.services.content_service.ContentService",
+                "app.workers.tasks.content_auto_gen.ContentService",
                 return_value=mock_content_service,
             ),
         ):
@@ -345,13 +383,9 @@ class TestAutoGenerateHelper:
             if call_count == 1:
                 return result  # set_tenant_context
             if call_count == 2:
-                result.scalar_one_or_none.return_value = mock_tenant
+                result.first.return_value = (mock_tenant, None, mock_user.id)  # no brand profile
             elif call_count == 3:
-                result.scalar_one_or_none.return_value = None  # no brand profile
-            elif call_count == 4:
-                result.scalar_one_or_none.return_value = mock_user
-            elif call_count == 5:
-                result.scalar_one_or_none.return_value = mock_listing
+                result.scalars.return_value = [mock_listing]
             return result
 
         mock_session.execute = AsyncMock(side_effect=side_effect)
@@ -361,19 +395,89 @@ class TestAutoGenerateHelper:
 
         with (
             patch(
-                "app.core.database.async_session_factory",
+                "app.workers.tasks.content_auto_gen.worker_session_factory",
                 return_value=mock_session,
             ),
             patch(
-                "app.services.ai_service.AIService",
+                "app.workers.tasks.content_auto_gen.AIService",
                 return_value=mock_ai,
             ),
         ):
             # Should not raise — errors are caught and counted
-            await _auto_generate(str(tenant_id), [str(uuid4())])
+            await _auto_generate(str(tenant_id), [str(mock_listing.id)])
 
         mock_session.commit.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_multiple_types_share_one_batched_call(self):
+        """Several content types go out in one call; a type it misses falls back."""
+        from app.workers.tasks.content_auto_gen import _auto_generate
+
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+        mock_session.commit = AsyncMock()
+
+        mock_tenant = MagicMock()
+        mock_tenant.id = uuid4()
+        mock_tenant.settings = {
+            "auto_generate_content_types": ["listing_description", "social_x", "flyer"],
+        }
+        mock_user = MagicMock()
+        mock_user.id = uuid4()
+        mock_listing = MagicMock()
+        mock_listing.id = uuid4()
+
+        call_count = 0
+
+        def side_effect(*args, **kwargs):
+            nonlocal call_count
+            call_count += 1
+            result = MagicMock()
+            if call_count == 2:
+                result.first.return_value = (mock_tenant, None, mock_user.id)  # no brand profile
+            elif call_count == 3:
+                result.scalars.return_value = [mock_listing]
+            return result
+
+        mock_session.execute = AsyncMock(side_effect=side_effect)
+
+        def ai_result(body):
+            return {"body": body, "model": "m", "prompt_tokens": 1, "completion_tokens": 1}
+
+        mock_ai = MagicMock()
+        mock_ai.generate_batch = AsyncMock(return_value={
+            "listing_description": ai_result("Description"),
+            "flyer": ai_result("Flyer"),
+        })
+        mock_ai.generate = AsyncMock(return_value=ai_result("Tweet"))
+
+        mock_content_service = MagicMock()
+        mock_content_service.create = AsyncMock()
+
+        with (
+            patch(
+                "app.workers.tasks.content_auto_gen.worker_session_factory",
+                return_value=mock_session,
+            ),
+            patch("app.workers.tasks.content_auto_gen.AIService", return_value=mock_ai),
+            patch(
+                "app.workers.tasks.content_auto_gen.ContentService",
+                return_value=mock_content_service,
+            ),
+        ):
+            await _auto_generate(str(mock_tenant.id), [str(mock_listing.id)])
+
+        mock_ai.generate_batch.assert_awaited_once()
+        assert mock_ai.generate_batch.call_args.kwargs["content_types"] == [
+            "listing_description", "social_x", "flyer",
+        ]
+        mock_ai.generate.assert_awaited_once()
+        assert mock_ai.generate.call_args.kwargs["content_type"] == "social_x"
+        created = [c.kwargs["content_type"] for c in mock_content_service.create.call_args_list]
+        assert created == ["listing_description", "social_x", "flyer"]
+        mock_session.commit.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_custom_tone_from_settings(self):
         """Tenant settings override default tone."""
@@ -407,13 +511,9 @@ class TestAutoGenerateHelper:
             if call_count == 1:
                 return result
             if call_count == 2:
-                result.scalar_one_or_none.return_value = mock_tenant
+                result.first.return_value = (mock_tenant, None, mock_user.id)  # no brand profile
             elif call_count == 3:
-                result.scalar_one_or_none.return_value = None
-            elif call_count == 4:
-                result.scalar_one_or_none.return_value = mock_user
-            elif call_count == 5:
-                result.scalar_one_or_none.return_value = mock_listing
+                result.scalars.return_value = [mock_listing]
             return result
 
         mock_session.execute = AsyncMock(side_effect=side_effect)
@@ -431,20 +531,113 @@ class TestAutoGenerateHelper:
 
         with (
             patch(
-                "app.core.database.async_session_factory",
+                "app.workers.tasks.content_auto_gen.worker_session_factory",
                 return_value=mock_session,
             ),
             patch(
-                "app.services.ai_service.AIService",
+                "app.workers.tasks.content_auto_gen.AIService",
                 return_value=mock_ai,
             ),
             patch(
-                "app.services.content_service.ContentService",
+                "app.workers.tasks.content_auto_gen.ContentService",
                 return_value=mock_content_service,
             ),
         ):
-            await _auto_generate(str(tenant_id), [str(uuid4())])
+            await _auto_generate(str(tenant_id), [str(mock_listing.id)])
 
         # Verify tone was passed through
         call_kwargs = mock_ai.generate.call_args
         assert call_kwargs.kwargs["tone"] == "luxury"
+
+
+class TestAgentNotificationQueue:
+    async def _run(self, listing, settings: dict | None = None, fail: bool = False):
+        from app.workers.tasks.content_auto_gen import _auto_generate
+
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+
+        tenant_id = uuid4()
+        mock_tenant = MagicMock()
+        mock_tenant.settings = {
+            "auto_generate_content_types": ["listing_description"], **(settings or {}),
+        }
+        results = [
+            MagicMock(first=MagicMock(return_value=(mock_tenant, None, uuid4()))),
+            MagicMock(scalars=MagicMock(return_value=[listing])),
+        ]
+        mock_session.execute = AsyncMock(side_effect=results)
+
+        mock_ai = MagicMock()
+        mock_ai.generate = AsyncMock(
+            side_effect=RuntimeError("AI down") if fail else None,
+            return_value={"body": "Copy", "model": "m"},
+        )
+        with (
+            patch(
+                "app.workers.tasks.content_auto_gen.worker_session_factory",
+                return_value=mock_session,
+            ),
+            patch("app.workers.tasks.content_auto_gen.AIService", return_value=mock_ai),
+            patch(
+                "app.workers.tasks.content_auto_gen.ContentService",
+                return_value=MagicMock(create=AsyncMock()),
+            ),
+            patch("app.workers.tasks.content_auto_gen.set_tenant_context", new=AsyncMock()),
+        ):
+            await _auto_generate(str(tenant_id), [str(listing.id)])
+        return tenant_id
+
+    def _listing(self, agent_email: str | None = "agent@example.com"):
+        listing = MagicMock()
+        listing.id = uuid4()
+        listing.listing_agent_email = agent_email
+        listing.listing_agent_name = "Pat Agent"
+        listing.address_full = "1 Ocean Dr"
+        return listing
+
+    @pytest.mark.asyncio
+    async def test_queues_notification_for_listing_agent(self, mock_redis_pool):
+        from app.services.email_service import (
+            AGENT_NOTIFY_QUEUE_KEY,
+            AgentNotification,
+            decode_agent_notification,
+        )
+
+        listing = self._listing()
+        tenant_id = await self._run(listing)
+
+        key, raw = mock_redis_pool.client.rpush.await_args.args
+        assert key == AGENT_NOTIFY_QUEUE_KEY
+        assert decode_agent_notification(raw) == (tenant_id, AgentNotification(
+            agent_email="agent@example.com",
+            agent_name="Pat Agent",
+            address="1 Ocean Dr",
+            content_types=["listing_description"],
+            listing_id=listing.id,
+        ))
+        mock_redis_pool.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_no_notification_without_agent_email(self, mock_redis_pool):
+        await self._run(self._listing(agent_email=None))
+        mock_redis_pool.client.rpush.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_no_notification_when_nothing_generated(self, mock_redis_pool):
+        await self._run(self._listing(), fail=True)
+        mock_redis_pool.client.rpush.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_tenant_can_turn_notifications_off(self, mock_redis_pool):
+        await self._run(self._listing(), settings={"auto_generate_notify_agents": False})
+        mock_redis_pool.client.rpush.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_queue_error_does_not_fail_generation(self, mock_redis_pool):
+        import redis.exceptions
+
+        mock_redis_pool.client.rpush.side_effect = redis.exceptions.ConnectionError("down")
+        await self._run(self._listing())  # content already committed; no raise
+        mock_redis_pool.close.assert_awaited_once()
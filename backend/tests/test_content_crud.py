@@ -185,9 +185,9 @@ class TestGenerateContent:
             "completion_tokens": 50,
         }
         with patch(
-            "app.api.v1.content.AIService.generate",
+            "app.api.v1.content.AIService.generate_variants",
             new_callable=AsyncMock,
-            return_value=mock_result,
+            return_value=[mock_result],
         ):
             resp = await client.post(
                 "/api/v1/content/generate",
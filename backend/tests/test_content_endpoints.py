@@ -82,7 +82,7 @@ class TestGenerateContent:
         headers = _auth_token(test_user, test_tenant)
 
         mock_ai = MagicMock()
-        mock_ai.generate = AsyncMock(return_value=_mock_ai_result())
+        mock_ai.generate_variants = AsyncMock(return_value=[_mock_ai_result()])
 
         with patch("app.api.v1.content.AIService", return_value=mock_ai):
             response = await client.post(
@@ -114,7 +114,9 @@ class TestGenerateContent:
         headers = _auth_token(test_user, test_tenant)
 
         mock_ai = MagicMock()
-        mock_ai.generate = AsyncMock(return_value=_mock_ai_result())
+        mock_ai.generate_variants = AsyncMock(
+            side_effect=lambda **kwargs: [_mock_ai_result()] * kwargs["count"],
+        )
 
         with patch("app.api.v1.content.AIService", return_value=mock_ai):
             response = await client.post(
@@ -158,7 +160,7 @@ class TestRegenerateContent:
         headers = _auth_token(test_user, test_tenant)
 
         mock_ai = MagicMock()
-        mock_ai.generate = AsyncMock(return_value=_mock_ai_result())
+        mock_ai.generate_variants = AsyncMock(return_value=[_mock_ai_result()])
 
         with patch("app.api.v1.content.AIService", return_value=mock_ai):
             response = await client.post(
@@ -1,17 +1,21 @@
 """Tests for content generation endpoint including credit enforcement and AI service."""
+import asyncio
+from datetime import UTC, datetime
 from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import create_access_token
+from app.models.content_version import ContentVersion
 from app.models.listing import Listing
 from app.models.tenant import Tenant
 from app.models.user import User
-from app.services.content_service import ContentService
+from app.services.content_service import ContentService, usage_counter_key
 
 
 class TestContentService:
@@ -63,6 +67,37 @@ class TestContentService:
         assert content.body == "A beautiful property"
         assert content.content_type == "listing_description"
         assert content.prompt_tokens == 100
+        assert content.status == "draft"
+        assert content.version == 1
+
+    @pytest.mark.asyncio
+    async def test_create_content_writes_initial_version(
+        self, db_session: AsyncSession, test_tenant: Tenant, test_user: User
+    ):
+        service = ContentService(db_session)
+        content = await service.create(
+            tenant_id=test_tenant.id,
+            listing_id=None,
+            user_id=test_user.id,
+            content_type="social_instagram",
+            tone="luxury",
+            body="Sunset views",
+            metadata={"word_count": 2},
+            ai_model="claude-sonnet-4-5-20250929",
+            prompt_tokens=10,
+            completion_tokens=5,
+            generation_time_ms=100,
+        )
+
+        versions = (
+            await db_session.scalars(
+                select(ContentVersion).where(ContentVersion.content_id == content.id)
+            )
+        ).all()
+        assert len(versions) == 1
+        assert versions[0].version == 1
+        assert versions[0].body == "Sunset views"
+        assert versions[0].content_metadata == {"word_count": 2}
 
     @pytest.mark.asyncio
     async def test_track_usage(
@@ -85,6 +120,146 @@ class TestContentService:
         assert remaining == 995  # 1000 - 5
 
 
+class TestUsageCounter:
+    @pytest.mark.asyncio
+    async def test_counter_hit_skips_usage_aggregate(self):
+        tenant_row = MagicMock(credits_limit=50, plan="free")
+        result = MagicMock()
+        result.one_or_none.return_value = tenant_row
+        db = AsyncMock()
+        db.execute.return_value = result
+        mock_redis = AsyncMock()
+        mock_redis.hgetall.return_value = {"credits": "8", "tokens": "900", "events": "8"}
+
+        with patch("app.services.content_service.get_redis", return_value=mock_redis):
+            usage = await ContentService(db).get_monthly_usage(uuid4())
+
+        assert usage["credits_remaining"] == 42
+        assert usage["tokens_used"] == 900
+        assert usage["total_events"] == 8
+        # Only the tenant primary-key lookup, no usage_events aggregate
+        assert db.execute.await_count == 1
+        mock_redis.eval.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_locked_read_aggregates_after_lock_and_seeds(self):
+        row = MagicMock(credits_limit=10, plan="starter", credits_used=3,
+                        tokens_used=100, total_events=3)
+        result = MagicMock()
+        result.one_or_none.return_value = row
+        db = AsyncMock()
+        db.execute.return_value = result
+        db.info = {}
+        mock_redis = AsyncMock()
+        mock_redis.hgetall.return_value = {"credits": "0", "tokens": "0", "events": "0"}
+        tenant_id = uuid4()
+
+        with patch("app.services.content_service.get_redis", return_value=mock_redis):
+            remaining = await ContentService(db).get_remaining_credits(tenant_id, lock=True)
+
+        assert remaining == 7
+        # A locked read never trusts the counter: row lock, then the aggregate
+        mock_redis.hgetall.assert_not_called()
+        assert db.execute.await_count == 2
+        assert "FOR UPDATE" in str(db.execute.await_args_list[0].args[0])
+        seed_args = mock_redis.eval.await_args.args
+        assert seed_args[2] == usage_counter_key(tenant_id, datetime.now(UTC))
+        assert seed_args[3:6] == (3, 100, 3)
+        assert db.info["usage_counter_seeds"] == {seed_args[2]: seed_args[6]}
+
+    @pytest.mark.asyncio
+    async def test_unlocked_miss_does_not_seed(self):
+        row = MagicMock(credits_limit=10, plan="starter", credits_used=3,
+                        tokens_used=100, total_events=3)
+        result = MagicMock()
+        result.one_or_none.return_value = row
+        db = AsyncMock()
+        db.execute.return_value = result
+        mock_redis = AsyncMock()
+        mock_redis.hgetall.return_value = {}
+
+        with patch("app.services.content_service.get_redis", return_value=mock_redis):
+            remaining = await ContentService(db).get_remaining_credits(uuid4())
+
+        assert remaining == 7
+        # Without the lock a generation could commit between the aggregate
+        # and the write, so the counter is left for the next locked read
+        mock_redis.eval.assert_not_called()
+
+    @staticmethod
+    async def _locked_generation(db_session, tenant, user, mock_redis):
+        with patch("app.services.content_service.get_redis", return_value=mock_redis):
+            service = ContentService(db_session)
+            await service.get_remaining_credits(tenant.id, lock=True)
+            await service.track_usage(
+                tenant_id=tenant.id, user_id=user.id,
+                content_type="listing_description", count=1, tokens=10,
+            )
+        return mock_redis.eval.await_args.args[6]
+
+    @pytest.mark.asyncio
+    async def test_increment_applied_after_commit(
+        self, db_session: AsyncSession, test_tenant: Tenant, test_user: User
+    ):
+        from app.services import content_service
+
+        mock_redis = AsyncMock()
+        seed = await self._locked_generation(db_session, test_tenant, test_user, mock_redis)
+        # Seeded, but nothing incremented before the transaction commits
+        assert mock_redis.eval.await_count == 1
+
+        await db_session.commit()
+        await asyncio.gather(*content_service._counter_updates)
+
+        args = mock_redis.eval.await_args.args
+        key = usage_counter_key(test_tenant.id, datetime.now(UTC))
+        assert args[0] == content_service._INCR_COUNTER_SCRIPT
+        assert args[1:] == (1, key, seed, 1, 10)
+        assert "usage_counter_seeds" not in db_session.info
+
+    @pytest.mark.asyncio
+    async def test_rollback_discards_increment(
+        self, db_session: AsyncSession, test_tenant: Tenant, test_user: User
+    ):
+        mock_redis = AsyncMock()
+        await self._locked_generation(db_session, test_tenant, test_user, mock_redis)
+
+        await db_session.rollback()
+
+        assert mock_redis.eval.await_count == 1
+        assert "usage_counter_increments" not in db_session.info
+
+    @pytest.mark.asyncio
+    async def test_track_usage_without_locked_read_skips_counter(self):
+        db = MagicMock()
+        db.info = {}
+
+        await ContentService(db).track_usage(
+            tenant_id=uuid4(), user_id=uuid4(),
+            content_type="listing_description", count=1, tokens=10,
+        )
+
+        db.add.assert_called_once()
+        assert db.info == {}
+
+    @pytest.mark.asyncio
+    async def test_redis_unavailable_falls_back_to_database(self):
+        row = MagicMock(credits_limit=50, plan="free", credits_used=5,
+                        tokens_used=0, total_events=5)
+        result = MagicMock()
+        result.one_or_none.return_value = row
+        db = AsyncMock()
+        db.execute.return_value = result
+
+        with patch(
+            "app.services.content_service.get_redis",
+            side_effect=RuntimeError("Redis pool not initialized"),
+        ):
+            remaining = await ContentService(db).get_remaining_credits(uuid4())
+
+        assert remaining == 45
+
+
 class TestCreditEnforcement:
     @pytest.mark.asyncio
     async def test_generate_rejected_when_over_limit(
@@ -170,7 +345,7 @@ class TestAIService:
             from app.services.prompt_builder import PromptBuilder
             service.prompt_builder = PromptBuilder()
             service._default_model = "claude-sonnet-4-5-20250929"
-            service._model_map = {"listing_description": service._default_model}
+            service._model_overrides = {}
 
             # Also reset circuit breaker for clean test
             from app.services import ai_service
@@ -199,8 +374,8 @@ class TestAIService:
         from app.services import ai_service
 
         # Force circuit open
-        cb = _CircuitBreaker(threshold=1, recovery=300)
-        cb.record_failure()
+        cb = _CircuitBreaker(min_calls=1, recovery=300)
+        cb.record_failure(cb.allow_request())
         ai_service._circuit = cb
 
         listing = MagicMock()
@@ -217,7 +392,7 @@ class TestAIService:
             service.prompt_builder.build = MagicMock(return_value=("system", "user"))
             service.client = AsyncMock()
             service._default_model = "claude-sonnet-4-5-20250929"
-            service._model_map = {}
+            service._model_overrides = {}
 
             with pytest.raises(CircuitBreakerOpenError):
                 await service.generate(
@@ -160,7 +160,7 @@ class TestE2EPipeline:
 
         with patch("app.api.v1.content.AIService") as mock_ai_cls:
             mock_ai_instance = AsyncMock()
-            mock_ai_instance.generate = AsyncMock(return_value=ai_result)
+            mock_ai_instance.generate_variants = AsyncMock(return_value=[ai_result])
             mock_ai_cls.return_value = mock_ai_instance
 
             gen_resp = await client.post(
@@ -385,8 +385,8 @@ class TestE2EPipeline:
 
         with patch("app.api.v1.content.AIService") as mock_ai_cls:
             mock_ai_instance = AsyncMock()
-            mock_ai_instance.generate = AsyncMock(
-                side_effect=[variant_a, variant_b]
+            mock_ai_instance.generate_variants = AsyncMock(
+                return_value=[variant_a, variant_b]
             )
             mock_ai_cls.return_value = mock_ai_instance
 
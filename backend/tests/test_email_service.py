@@ -1,11 +1,30 @@
 """Tests for EmailService (SendGrid integration)."""
 
+import gzip
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
 
 import httpx
 import pytest
 
-from app.services.email_service import EmailService, _canspam_footer, parse_subject_from_email
+from app.services.email_service import (
+    AgentNotification,
+    EmailService,
+    _canspam_footer,
+    _http_client,
+    decode_agent_notification,
+    encode_agent_notification,
+    parse_subject_from_email,
+)
+
+
+def _sent_payload(post_kwargs: dict) -> dict:
+    """Decode the JSON body EmailService.send passed to client.post."""
+    body = post_kwargs["content"]
+    if post_kwargs["headers"].get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body)
 
 
 class TestParseSubjectFromEmail:
@@ -21,6 +40,14 @@ class TestParseSubjectFromEmail:
         text = "SUBJECT: Great Deal\nPreheader: Check it out"
         assert parse_subject_from_email(text) == "Great Deal"
 
+    def test_subject_after_leading_lines_and_crlf(self):
+        text = "Preheader: Hi\r\n   subject:  Price Drop on Elm St \r\nBody"
+        assert parse_subject_from_email(text) == "Price Drop on Elm St"
+
+    def test_empty_subject_does_not_take_next_line(self):
+        text = "Subject:\nBody text here."
+        assert parse_subject_from_email(text) == ""
+
 
 class TestCanspamFooter:
     def test_includes_physical_address(self):
@@ -43,6 +70,11 @@ class TestCanspamFooter:
         footer = _canspam_footer("123 Main St")
         assert "mailto:" in footer
 
+    def test_footer_is_cached(self):
+        first = _canspam_footer("1 Cached Way", brokerage_name="Cache Realty")
+        second = _canspam_footer("1 Cached Way", brokerage_name="Cache Realty")
+        assert first is second
+
 
 class TestEmailServiceInit:
     def test_defaults_from_settings(self):
@@ -155,8 +187,8 @@ class TestEmailServiceSend:
         mock_response.status_code = 202
         captured_payload = {}
 
-        async def capture_post(url, json=None, **kwargs):
-            captured_payload.update(json)
+        async def capture_post(url, **kwargs):
+            captured_payload.update(_sent_payload(kwargs))
             return mock_response
 
         with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=capture_post):
@@ -170,3 +202,264 @@ class TestEmailServiceSend:
         html = captured_payload["content"][0]["value"]
         assert "123 Main St" in html
         assert "Unsubscribe" in html
+
+    @pytest.mark.asyncio
+    async def test_canspam_footer_inserted_before_uppercase_body_close(self):
+        with patch("app.services.email_service.get_settings") as mock:
+            mock.return_value.sendgrid_api_key = "sg-key"
+            mock.return_value.sendgrid_default_from_email = "from@test.com"
+            mock.return_value.sendgrid_default_from_name = "Test"
+            service = EmailService()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        captured_payload = {}
+
+        async def capture_post(url, **kwargs):
+            captured_payload.update(_sent_payload(kwargs))
+            return mock_response
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=capture_post):
+            await service.send(
+                ["user@test.com"],
+                "Subject",
+                "<HTML><BODY><p>Hello</p></BODY ></HTML>",
+                physical_address="123 Main St",
+            )
+
+        html = captured_payload["content"][0]["value"]
+        assert html.index("123 Main St") < html.index("</BODY >")
+        assert html.endswith("</BODY ></HTML>")
+
+
+    @pytest.mark.asyncio
+    async def test_batches_sent_concurrently_and_counts_merged(self):
+        import asyncio
+
+        from app.services import email_service
+
+        with patch("app.services.email_service.get_settings") as mock:
+            mock.return_value.sendgrid_api_key = "sg-key"
+            mock.return_value.sendgrid_default_from_email = "from@test.com"
+            mock.return_value.sendgrid_default_from_name = "Test"
+            service = EmailService()
+
+        in_flight = 0
+        peak = 0
+
+        async def post(url, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            if _sent_payload(kwargs)["personalizations"][0]["to"][0]["email"] == "u2000@t.com":
+                raise httpx.TimeoutException("timeout")
+            return MagicMock(status_code=202)
+
+        recipients = [f"u{i}@t.com" for i in range(5500)]
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=post):
+            result = await service.send(recipients, "Subject", "<p>Hi</p>")
+        await _http_client.close()
+
+        assert peak == email_service._SENDGRID_BATCH_CONCURRENCY
+        assert result["sent"] == 4500
+        assert result["failed"] == 1000
+        assert result["errors"] == ["SendGrid request timed out"]
+
+    @pytest.mark.asyncio
+    async def test_unexpected_error_fails_only_its_batch(self):
+        with patch("app.services.email_service.get_settings") as mock:
+            mock.return_value.sendgrid_api_key = "sg-key"
+            mock.return_value.sendgrid_default_from_email = "from@test.com"
+            mock.return_value.sendgrid_default_from_name = "Test"
+            service = EmailService()
+
+        with patch(
+            "httpx.AsyncClient.post",
+            new_callable=AsyncMock,
+            side_effect=[MagicMock(status_code=202), httpx.RemoteProtocolError("reset")],
+        ):
+            result = await service.send(
+                [f"u{i}@t.com" for i in range(1200)], "Subject", "<p>Hi</p>",
+            )
+        await _http_client.close()
+
+        assert result["sent"] == 1000
+        assert result["failed"] == 200
+        assert "reset" in result["errors"][0]
+
+
+class TestPayloadCompression:
+    @pytest.mark.asyncio
+    async def test_large_batch_is_gzipped(self):
+        with patch("app.services.email_service.get_settings") as mock:
+            mock.return_value.sendgrid_api_key = "sg-key"
+            mock.return_value.sendgrid_default_from_email = "from@test.com"
+            mock.return_value.sendgrid_default_from_name = "Test"
+            service = EmailService()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        recipients = [f"user{i}@test.com" for i in range(200)]
+        with patch(
+            "httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response,
+        ) as post:
+            result = await service.send(recipients, "Subject", "<p>Hi</p>")
+        await _http_client.close()
+
+        assert result["sent"] == 200
+        kwargs = post.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        payload = _sent_payload(kwargs)
+        assert len(payload["personalizations"]) == 200
+        assert payload["subject"] == "Subject"
+        assert len(kwargs["content"]) < len(json.dumps(payload))
+
+    @pytest.mark.asyncio
+    async def test_small_body_sent_uncompressed(self):
+        with patch("app.services.email_service.get_settings") as mock:
+            mock.return_value.sendgrid_api_key = "sg-key"
+            mock.return_value.sendgrid_default_from_email = "from@test.com"
+            mock.return_value.sendgrid_default_from_name = "Test"
+            service = EmailService()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        with patch(
+            "httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response,
+        ) as post:
+            await service.send(["user@test.com"], "Subject", "<p>Hi</p>")
+        await _http_client.close()
+
+        kwargs = post.call_args.kwargs
+        assert "Content-Encoding" not in kwargs["headers"]
+        assert json.loads(kwargs["content"])["personalizations"] == [
+            {"to": [{"email": "user@test.com"}]}
+        ]
+
+
+class TestSendAgentNotification:
+    @staticmethod
+    def _service():
+        with patch("app.services.email_service.get_settings") as mock:
+            mock.return_value.sendgrid_api_key = "sg-test-key"
+            mock.return_value.sendgrid_default_from_email = "from@test.com"
+            mock.return_value.sendgrid_default_from_name = "TestApp"
+            return EmailService()
+
+    @pytest.mark.asyncio
+    async def test_lists_human_readable_content_types(self):
+        service = self._service()
+        db = MagicMock()
+        listing_id = uuid4()
+        deliver = AsyncMock(return_value={"sent": 1, "failed": 0, "errors": []})
+
+        with patch.object(service, "_deliver", deliver):
+            campaign = await service.send_agent_notification(
+                db=db,
+                tenant_id=uuid4(),
+                agent_email="agent@test.com",
+                agent_name="Pat",
+                address="1 Ocean Dr",
+                content_types=["social_x", "custom_type"],
+                listing_id=listing_id,
+            )
+
+        personalizations, subject, html = deliver.call_args.args
+        subs = personalizations[0]["substitutions"]
+        assert subs["-items-"] == "<li>X (Twitter) Post</li><li>custom_type</li>"
+        assert subs["-greeting-"] == "Hi Pat,"
+        assert "-items-" in html
+        assert subject == "Your listing materials are ready — 1 Ocean Dr"
+        assert campaign.listing_id == listing_id
+        assert campaign.campaign_type == "agent_notify"
+        db.add.assert_called_once_with(campaign)
+
+    @pytest.mark.asyncio
+    async def test_batch_is_one_sendgrid_request(self):
+        service = self._service()
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        notifications = [
+            AgentNotification(
+                agent_email=f"agent{i}@test.com",
+                agent_name="" if i == 0 else f"Agent {i}",
+                address=f"{i} Main St",
+                content_types=["flyer"],
+                listing_id=uuid4(),
+            )
+            for i in range(3)
+        ]
+
+        with patch(
+            "httpx.AsyncClient.post", new_callable=AsyncMock, return_value=mock_response,
+        ) as post:
+            campaign = await service.send_agent_notifications(
+                db=MagicMock(), tenant_id=uuid4(), notifications=notifications,
+            )
+        await _http_client.close()
+
+        post.assert_awaited_once()
+        payload = _sent_payload(post.call_args.kwargs)
+        assert [p["subject"] for p in payload["personalizations"]] == [
+            f"Your listing materials are ready — {i} Main St" for i in range(3)
+        ]
+        assert payload["personalizations"][0]["substitutions"]["-greeting-"] == "Hi,"
+        assert payload["personalizations"][2]["substitutions"]["-brokerage-"] == "TestApp"
+        assert campaign.sent == 3
+        assert campaign.recipient_count == 3
+        assert campaign.listing_id is None
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_sends_and_records_nothing(self):
+        service = self._service()
+        db = MagicMock()
+
+        with patch.object(service, "_deliver", AsyncMock()) as deliver:
+            campaign = await service.send_agent_notifications(
+                db=db, tenant_id=uuid4(), notifications=[],
+            )
+
+        assert campaign is None
+        deliver.assert_not_called()
+        db.add.assert_not_called()
+
+    def test_queue_entry_round_trips(self):
+        tenant_id = uuid4()
+        notification = AgentNotification(
+            agent_email="agent@test.com",
+            agent_name="Pat",
+            address="1 Ocean Dr",
+            content_types=["flyer", "social_x"],
+            listing_id=uuid4(),
+        )
+        raw = encode_agent_notification(tenant_id, notification)
+        assert decode_agent_notification(raw) == (tenant_id, notification)
+
+
+class TestSharedHttpClient:
+    @pytest.mark.asyncio
+    async def test_batches_share_one_client(self):
+        with patch("app.services.email_service.get_settings") as mock:
+            mock.return_value.sendgrid_api_key = "sg-key"
+            mock.return_value.sendgrid_default_from_email = "from@test.com"
+            mock.return_value.sendgrid_default_from_name = "Test"
+            service = EmailService()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        clients = []
+
+        async def capture_post(self, url, **kwargs):
+            clients.append(self)
+            return mock_response
+
+        recipients = [f"user{i}@test.com" for i in range(1500)]
+        with patch("httpx.AsyncClient.post", autospec=True, side_effect=capture_post):
+            result = await service.send(recipients, "Subject", "<p>Hi</p>")
+        await _http_client.close()
+
+        assert result["sent"] == 1500
+        assert len(clients) == 2
+        assert clients[0] is clients[1]
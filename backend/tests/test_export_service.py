@@ -1,10 +1,18 @@
 """Unit tests for ExportService: txt, html, docx, pdf, format validation, XSS prevention."""
 import uuid
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from app.services.export_service import ExportService
+from app.services.export_service import _render_executor as _real_render_executor
+
+
+@pytest.fixture(autouse=True)
+def _render_in_thread():
+    """Run render-pool work on the default thread executor so in-process mocks apply."""
+    with patch("app.services.export_service._render_executor", return_value=None):
+        yield
 
 
 def _make_content(body="Test content body", content_type="listing_description"):
@@ -23,9 +31,7 @@ class TestExportTxt:
         content = _make_content()
         response = await service.export(content, "txt")
         assert response.media_type == "text/plain"
-        body_bytes = b""
-        async for chunk in response.body_iterator:
-            body_bytes += chunk if isinstance(chunk, bytes) else chunk.encode()
+        body_bytes = response.body
         assert body_bytes == b"Test content body"
 
     async def test_export_txt_content_disposition(self):
@@ -34,6 +40,11 @@ class TestExportTxt:
         response = await service.export(content, "txt")
         assert f"content-{content.id}.txt" in response.headers["content-disposition"]
 
+    async def test_export_txt_sets_content_length(self):
+        service = ExportService()
+        response = await service.export(_make_content(body="café"), "txt")
+        assert response.headers["content-length"] == "5"
+
 
 class TestExportHtml:
     async def test_export_html(self):
@@ -41,9 +52,7 @@ class TestExportHtml:
         content = _make_content()
         response = await service.export(content, "html")
         assert response.media_type == "text/html"
-        body_bytes = b""
-        async for chunk in response.body_iterator:
-            body_bytes += chunk if isinstance(chunk, bytes) else chunk.encode()
+        body_bytes = response.body
         html = body_bytes.decode("utf-8")
         assert "<!DOCTYPE html>" in html
         assert "Test content body" in html
@@ -52,14 +61,45 @@ class TestExportHtml:
         service = ExportService()
         content = _make_content(body='<script>alert("xss")</script>')
         response = await service.export(content, "html")
-        body_bytes = b""
-        async for chunk in response.body_iterator:
-            body_bytes += chunk if isinstance(chunk, bytes) else chunk.encode()
+        body_bytes = response.body
         html = body_bytes.decode("utf-8")
         # The <script> tag should be HTML-escaped, not raw
         assert "<script>" not in html
         assert "&lt;script&gt;" in html
 
+    async def test_export_html_keeps_dollar_signs_and_line_breaks(self):
+        service = ExportService()
+        content = _make_content(body="Priced at $500,000 & $title\nCall <today>")
+        response = await service.export(content, "html")
+        body_bytes = response.body
+        html = body_bytes.decode("utf-8")
+        assert "Priced at $500,000 &amp; $title<br>\nCall &lt;today&gt;" in html
+
+    async def test_export_html_document_shell(self):
+        service = ExportService()
+        content = _make_content(body="Line one\nLine two", content_type="email_<just_listed>")
+        response = await service.export(content, "html")
+        body_bytes = response.body
+        assert body_bytes == (
+            b'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8">'
+            b"<title>email_&lt;just_listed&gt;</title></head>\n<body>\n"
+            b'<div style="max-width: 800px; margin: 0 auto; font-family: Georgia, serif; '
+            b'padding: 2rem;">\nLine one<br>\nLine two\n</div>\n</body>\n</html>'
+        )
+
+    def test_body_html_matches_html_escape(self):
+        from html import escape
+
+        from app.services.export_service import _body_html
+
+        body = """Tom's "dream" home & <garden>\n\nNo. 2 > No. 1"""
+        assert _body_html(body) == escape(body).replace("\n", "<br>\n")
+
+    def test_body_html_without_special_characters(self):
+        from app.services.export_service import _body_html
+
+        assert _body_html("Open house Sunday\n\n2-4pm") == "Open house Sunday<br>\n<br>\n2-4pm"
+
 
 class TestExportDocx:
     async def test_export_docx(self):
@@ -77,6 +117,49 @@ class TestExportDocx:
         assert body_bytes[:2] == b"PK"
 
 
+    async def test_export_docx_builds_on_cached_skeleton(self):
+        import io
+
+        from docx import Document
+
+        from app.services import export_service
+
+        export_service._docx_skeleton.cache_clear()
+        with patch("docx.Document", wraps=Document) as mock_document:
+            for _ in range(2):
+                response = await ExportService().export(
+                    _make_content(body="First\n\nSecond"), "docx",
+                )
+                body_bytes = b"".join([chunk async for chunk in response.body_iterator])
+
+        # One bare Document() for the skeleton, then every export loads from bytes
+        assert [c.args for c in mock_document.call_args_list].count(()) == 1
+        paragraphs = [p.text for p in Document(io.BytesIO(body_bytes)).paragraphs]
+        assert paragraphs == ["Listing Description", "First", "Second"]
+
+
+    async def test_export_docx_paragraph_text_round_trips(self):
+        import io
+
+        from docx import Document
+
+        body = 'Tom & Jane\'s <"home">\tPool\nSpa\n\n\n\nLast'
+        response = await ExportService().export(_make_content(body=body), "docx")
+        doc = Document(io.BytesIO(b"".join([c async for c in response.body_iterator])))
+
+        assert [p.text for p in doc.paragraphs[1:]] == [
+            'Tom & Jane\'s <"home">\tPool\nSpa', "", "Last",
+        ]
+        assert doc.element.body[-1].tag.endswith("}sectPr")
+
+    def test_warm_export_renderers_builds_skeleton(self):
+        from app.services import export_service
+
+        export_service._docx_skeleton.cache_clear()
+        export_service.warm_export_renderers()
+        assert export_service._docx_skeleton.cache_info().currsize == 1
+
+
 class TestExportValidation:
     async def test_export_invalid_format(self):
         service = ExportService()
@@ -92,12 +175,17 @@ class TestExportPdf:
 
         # Mock weasyprint since it may not be installed in test env
         mock_html_cls = MagicMock()
-        mock_html_cls.return_value.write_pdf.return_value = b"%PDF-1.4 fake pdf bytes"
+        mock_html_cls.return_value.write_pdf.side_effect = (
+            lambda **kwargs: b"%PDF-1.4 fake pdf bytes"
+        )
 
-        with patch("app.services.export_service.HTML", mock_html_cls, create=True):
-            # Patch the import inside _export_pdf
-            with patch.dict("sys.modules", {"weasyprint": MagicMock(HTML=mock_html_cls)}):
-                response = await service.export(content, "pdf")
+        with (
+            patch("app.services.export_service.HTML", mock_html_cls, create=True),
+            patch("app.services.export_service._font_config", return_value=None),
+            # Patch the import inside _render_pdf_sync
+            patch.dict("sys.modules", {"weasyprint": MagicMock(HTML=mock_html_cls)}),
+        ):
+            response = await service.export(content, "pdf")
 
         assert response.media_type == "application/pdf"
         body_bytes = b""
@@ -115,10 +203,13 @@ class TestExportPdf:
             def __init__(self, string=""):
                 captured_html["html"] = string
 
-            def write_pdf(self):
+            def write_pdf(self, **kwargs):
                 return b"%PDF"
 
-        with patch.dict("sys.modules", {"weasyprint": MagicMock(HTML=MockHTML)}):
+        with (
+            patch("app.services.export_service._font_config", return_value=None),
+            patch.dict("sys.modules", {"weasyprint": MagicMock(HTML=MockHTML)}),
+        ):
             await service.export(content, "pdf")
 
         # The raw <script> should be escaped
@@ -126,23 +217,277 @@ class TestExportPdf:
         assert "&lt;script&gt;" in captured_html["html"]
 
 
+    async def test_export_pdf_renders_off_event_loop_with_font_config(self):
+        # Pool renders are routed to the default thread executor in this module
+        import threading
+
+        service = ExportService()
+        content = _make_content()
+        font_config = object()
+        render_calls = {}
+
+        class MockHTML:
+            def __init__(self, string=""):
+                pass
+
+            def write_pdf(self, **kwargs):
+                render_calls["thread"] = threading.current_thread()
+                render_calls["font_config"] = kwargs.get("font_config")
+                return b"%PDF"
+
+        with (
+            patch("app.services.export_service._font_config", return_value=font_config),
+            patch.dict("sys.modules", {"weasyprint": MagicMock(HTML=MockHTML)}),
+        ):
+            await service.export(content, "pdf")
+
+        assert render_calls["thread"] is not threading.current_thread()
+        assert render_calls["font_config"] is font_config
+
+
+    async def test_export_pdf_streams_large_output_in_chunks(self):
+        from app.services import export_service
+
+        service = ExportService()
+        content = _make_content()
+        payload = b"%PDF" + b"x" * (export_service._STREAM_CHUNK_SIZE * 2 + 10)
+
+        class MockHTML:
+            def __init__(self, string=""):
+                pass
+
+            def write_pdf(self, **kwargs):
+                return payload
+
+        with (
+            patch("app.services.export_service._font_config", return_value=None),
+            patch.dict("sys.modules", {"weasyprint": MagicMock(HTML=MockHTML)}),
+        ):
+            response = await service.export(content, "pdf")
+
+        chunks = [chunk async for chunk in response.body_iterator]
+        assert len(chunks) == 3
+        assert all(len(c) <= export_service._STREAM_CHUNK_SIZE for c in chunks)
+        assert b"".join(chunks) == payload
+
+
+class TestPdfRenderSetup:
+    def test_font_config_created_once_per_thread(self):
+        import threading
+
+        from app.services import export_service
+
+        fonts_module = MagicMock()
+        with (
+            patch.object(export_service, "_thread_state", threading.local()),
+            patch.dict("sys.modules", {
+                "weasyprint": MagicMock(),
+                "weasyprint.text": MagicMock(),
+                "weasyprint.text.fonts": fonts_module,
+            }),
+        ):
+            first = export_service._font_config()
+            second = export_service._font_config()
+
+        assert first is second
+        fonts_module.FontConfiguration.assert_called_once_with()
+
+    def test_pdf_template_styles_inline_without_stylesheet(self):
+        from app.services import export_service
+
+        template = export_service._PDF_TEMPLATE.template
+        assert "<style>" not in template
+        assert '<h1 style="color: #1a365d;">$title</h1>' in template
+
+
+class TestTitles:
+    def test_titles_are_escaped_and_cached(self):
+        from app.services import export_service
+
+        export_service._pdf_title.cache_clear()
+        assert export_service._html_title("a<b>") == b"a&lt;b&gt;"
+        assert export_service._pdf_title("open_house") == "Open House"
+        assert export_service._pdf_title("open_house") == "Open House"
+        assert export_service._pdf_title.cache_info().hits == 1
+
+
+class TestPdfCache:
+    @pytest.fixture(autouse=True)
+    def _empty_cache(self):
+        from app.services import export_service
+
+        with patch.object(export_service, "_pdf_cache", export_service.OrderedDict()):
+            yield
+
+    async def test_repeat_export_reuses_rendered_pdf(self):
+        content = _make_content()
+        with patch(
+            "app.services.export_service._run_in_render_pool",
+            new=AsyncMock(return_value=b"%PDF-cached"),
+        ) as run:
+            for _ in range(2):
+                response = await ExportService().export(content, "pdf")
+                body = b"".join([chunk async for chunk in response.body_iterator])
+                assert body == b"%PDF-cached"
+
+        run.assert_awaited_once()
+
+    async def test_edited_content_is_rendered_again(self):
+        content = _make_content()
+        with patch(
+            "app.services.export_service._run_in_render_pool",
+            new=AsyncMock(return_value=b"%PDF"),
+        ) as run:
+            await ExportService().export(content, "pdf")
+            content.body = "Edited body"
+            await ExportService().export(content, "pdf")
+            content.updated_at = object()
+            await ExportService().export(content, "pdf")
+
+        assert run.await_count == 3
+
+    def test_least_recently_used_entry_is_evicted(self):
+        from app.services import export_service
+
+        with patch.object(export_service, "_PDF_CACHE_SIZE", 2):
+            export_service._pdf_cache_put("a", b"A")
+            export_service._pdf_cache_put("b", b"B")
+            assert export_service._pdf_cache_get("a") == b"A"
+            export_service._pdf_cache_put("c", b"C")
+
+        assert export_service._pdf_cache_get("b") is None
+        assert export_service._pdf_cache_get("a") == b"A"
+        assert export_service._pdf_cache_get("c") == b"C"
+
+
+class TestSimplePdfEngine:
+    async def test_fpdf_engine_renders_without_weasyprint(self):
+        from app.services import export_service
+
+        content = _make_content(body="Ocean views\n\nCall today — 日本")
+        with (
+            patch.object(export_service, "_pdf_cache", export_service.OrderedDict()),
+            patch("app.services.export_service.get_settings") as mock_settings,
+            patch.dict("sys.modules", {"weasyprint": None}),
+        ):
+            mock_settings.return_value.export_pdf_engine = "fpdf"
+            response = await ExportService().export(content, "pdf")
+            body = b"".join([chunk async for chunk in response.body_iterator])
+
+        assert body.startswith(b"%PDF")
+
+    def test_invalid_engine_rejected(self):
+        from pydantic import ValidationError
+
+        from app.config import Settings
+
+        with pytest.raises(ValidationError, match="export_pdf_engine"):
+            Settings(export_pdf_engine="reportlab")
+
+
+class TestRenderPool:
+    def test_executor_is_lazily_spawned_process_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        from app.services import export_service
+
+        with (
+            patch.object(export_service, "_render_pool", None),
+            patch("app.services.export_service.get_settings") as mock_settings,
+        ):
+            mock_settings.return_value.export_render_workers = 2
+            pool = _real_render_executor()
+            try:
+                assert isinstance(pool, ProcessPoolExecutor)
+                assert pool._max_workers == 2
+                assert pool._mp_context.get_start_method() == "spawn"
+                assert pool._initializer is export_service._warm_render_worker
+                assert _real_render_executor() is pool
+            finally:
+                export_service.shutdown_render_pool()
+            assert export_service._render_pool is None
+
+    def test_warm_worker_renders_once_and_swallows_errors(self):
+        from app.services import export_service
+
+        with (
+            patch.object(export_service, "_render_pdf_sync") as render,
+            patch("app.services.flyer_service.warm_flyer_libraries") as warm_flyers,
+        ):
+            export_service._warm_render_worker()
+            render.assert_called_once()
+            warm_flyers.assert_called_once_with()
+            render.side_effect = OSError("no fonts")
+            warm_flyers.side_effect = ImportError("no pptx")
+            export_service._warm_render_worker()  # must not raise
+
+    async def test_pdf_export_renders_in_pool(self):
+        from app.services import export_service
+
+        content = _make_content()
+        with patch(
+            "app.services.export_service._run_in_render_pool",
+            new=AsyncMock(return_value=b"%PDF-bytes"),
+        ) as run:
+            response = await ExportService().export(content, "pdf")
+            body = b"".join([chunk async for chunk in response.body_iterator])
+
+        assert run.await_args.args[0] is export_service._render_pdf_sync
+        assert "Test content body" in run.await_args.args[1]
+        assert body == b"%PDF-bytes"
+
+    async def test_flyer_export_renders_in_pool(self):
+        from app.services import export_service
+
+        content = _make_content(body="Flyer copy")
+        listing = MagicMock(price=500000, bathrooms=2, features=None)
+        with patch(
+            "app.services.export_service._run_in_render_pool",
+            new=AsyncMock(return_value=b"PK-bytes"),
+        ) as run:
+            response = await ExportService().export(content, "pptx", listing=listing)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+
+        fn, fmt, _branding, listing_data, text = run.await_args.args
+        assert fn is export_service._render_flyer_sync
+        assert fmt == "pptx"
+        assert listing_data["price"] == 500000.0
+        assert listing_data["features"] == []
+        assert listing_data["bathrooms"] == 2.0
+        assert listing_data["address_full"] is listing.address_full
+        assert text == "Flyer copy"
+        assert body == b"PK-bytes"
+        assert (
+            response.headers["content-disposition"]
+            == f'attachment; filename="flyer-{content.id}.pptx"'
+        )
+
+    def test_flyer_render_job_is_picklable_and_returns_bytes(self):
+        import pickle
+
+        from app.services import export_service
+        from app.services.flyer_service import BrandingConfig
+
+        job = (export_service._render_flyer_sync, "pptx", BrandingConfig(),
+               {"address_full": "1 Main St", "price": 100000.0}, "Great home")
+        fn, *args = pickle.loads(pickle.dumps(job))  # noqa: S301
+        data = fn(*args)
+        assert data[:2] == b"PK"
+
+
 class TestExportEdgeCases:
     async def test_export_empty_body(self):
         service = ExportService()
         content = _make_content(body="")
         response = await service.export(content, "txt")
-        body_bytes = b""
-        async for chunk in response.body_iterator:
-            body_bytes += chunk if isinstance(chunk, bytes) else chunk.encode()
+        body_bytes = response.body
         assert body_bytes == b""
 
     async def test_export_unicode_body(self):
         service = ExportService()
         content = _make_content(body="Luxury résidence with café & naïve charm — 日本語テスト")
         response = await service.export(content, "txt")
-        body_bytes = b""
-        async for chunk in response.body_iterator:
-            body_bytes += chunk if isinstance(chunk, bytes) else chunk.encode()
+        body_bytes = response.body
         text = body_bytes.decode("utf-8")
         assert "résidence" in text
         assert "日本語テスト" in text
@@ -1,5 +1,8 @@
 """Tests for FlyerService (PPTX + PDF flyer generation)."""
 
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -9,6 +12,10 @@ from app.services.flyer_service import (
     _build_qr_url,
     _build_specs,
     _extract_body_copy,
+    _generate_qr_png,
+    _image_size,
+    _load_photos,
+    _photo_source,
     _sanitize_text,
 )
 
@@ -41,6 +48,31 @@ class TestBrandingConfig:
         assert config.brokerage_name == "From Settings"
         assert config.headline == "Price Reduced"
 
+    def test_derived_fields_follow_overrides(self, tmp_path):
+        logo = tmp_path / "logo.png"
+        logo.write_bytes(b"png")
+        config = BrandingConfig.from_settings(
+            {"flyer": {"accent_color": "#0000FF"}},
+            accent_color_hex="#00FF00", logo_path=str(logo),
+        )
+        assert config.accent_rgb == (0, 255, 0)
+        assert config.has_logo is True
+        assert BrandingConfig(accent_color_hex="bad").accent_rgb == (0xCC, 0x00, 0x00)
+        assert BrandingConfig(logo_path=str(tmp_path / "none.png")).has_logo is False
+
+    def test_logo_bytes_read_once_and_reset_by_overrides(self, tmp_path):
+        first, second = tmp_path / "a.png", tmp_path / "b.png"
+        first.write_bytes(b"first")
+        second.write_bytes(b"second")
+
+        config = BrandingConfig(logo_path=str(first))
+        assert config.logo_bytes == b"first"
+        first.write_bytes(b"changed")
+        assert config.logo_bytes == b"first"  # cached
+        config.logo_path = str(second)
+        config.__post_init__()
+        assert config.logo_bytes == b"second"
+
     def test_from_empty_settings(self):
         config = BrandingConfig.from_settings({})
         assert config.brokerage_name == "Your Brokerage"
@@ -59,6 +91,16 @@ class TestHelpers:
         assert "---" not in body
         assert "body paragraph" in body
 
+    def test_extract_body_copy_picks_first_longest_prose_line(self):
+        long_a = "A" * 70
+        long_b = "B" * 70
+        text = f"# Title\n---\n- **{long_a}**\n+ {long_b}\n* short"
+        assert _extract_body_copy(text) == long_a
+
+    def test_extract_body_copy_falls_back_to_first_lines(self):
+        text = "## Head\n**Pool**\n- Spa\n\n+ Dock\nGym"
+        assert _extract_body_copy(text) == "Pool Spa Dock"
+
     def test_extract_body_copy_plain_text(self):
         text = "Just a simple paragraph of marketing copy."
         body = _extract_body_copy(text)
@@ -79,6 +121,23 @@ class TestHelpers:
         assert "2.5 Bath" in joined
         assert "2,200" in joined
 
+    def test_build_specs_cache_keeps_int_and_float_apart(self):
+        assert _build_specs({"bedrooms": 2, "bathrooms": 2.0})[0] == "2 Bed / 2.0 Bath"
+        assert _build_specs({"bedrooms": 2.0, "bathrooms": 2})[0] == "2.0 Bed / 2 Bath"
+
+    def test_build_specs_coerces_string_and_float_values(self):
+        specs = _build_specs(
+            {"price": "725000.4", "bedrooms": 2, "bathrooms": 1, "sqft": 1850.0}
+        )
+        assert specs == ["$725,000", "2 Bed / 1 Bath", "1,850 Sq Ft"]
+        specs = _build_specs({"price": 725000.6, "bedrooms": 2, "bathrooms": 1, "sqft": "990"})
+        assert specs == ["$725,001", "2 Bed / 1 Bath", "990 Sq Ft"]
+
+    def test_build_specs_returns_fresh_list(self):
+        first = _build_specs({"bedrooms": 3, "bathrooms": 2})
+        first.append("mutated")
+        assert "mutated" not in _build_specs({"bedrooms": 3, "bathrooms": 2})
+
     def test_build_specs_missing_fields(self):
         listing_data = {"bedrooms": 2, "bathrooms": 1}
         specs = _build_specs(listing_data)
@@ -105,6 +164,51 @@ class TestHelpers:
         assert "Hello" in result
         assert "World" in result
 
+    def test_sanitize_text_replacements(self):
+        assert _sanitize_text("Plain ASCII") == "Plain ASCII"
+        latin1 = "Caf\u00e9 na\u00efve"
+        assert _sanitize_text(latin1) is latin1
+        assert _sanitize_text("Caf\u00e9 \u2014 \u201cviews\u201d\u2026 \u65e5") == (
+            'Caf\u00e9 -- "views"... ?'
+        )
+
+
+    def test_generate_qr_png_is_cached(self):
+        _generate_qr_png.cache_clear()
+        first = _generate_qr_png("https://example.com/listing/1")
+        second = _generate_qr_png("https://example.com/listing/1")
+        assert first.startswith(b"\x89PNG")
+        assert first is second
+        assert _generate_qr_png.cache_info().hits == 1
+
+
+    def test_load_photos_skips_missing_and_reads_sizes_once(self, tmp_path):
+        from PIL import Image
+
+        photo = tmp_path / "hero.jpg"
+        Image.new("RGB", (40, 30)).save(photo)
+
+        _image_size.cache_clear()
+        first = _load_photos([photo, tmp_path / "missing.jpg"])
+        second = _load_photos([photo])
+        mtime_ns = photo.stat().st_mtime_ns
+        assert first == second == [(str(photo), mtime_ns, 40, 30)]
+        assert _image_size.cache_info().misses == 1
+
+
+    def test_photo_source_downscales_only_oversized_photos(self, tmp_path):
+        from PIL import Image
+
+        photo = tmp_path / "big.png"
+        Image.new("RGBA", (2000, 1000)).save(photo)
+        loaded = _load_photos([photo])[0]
+
+        assert _photo_source(loaded, 10, 5) == str(photo)  # needs 2000px: keep
+        source = _photo_source(loaded, 2, 1)
+        with Image.open(source) as img:
+            assert img.format == "JPEG"
+            assert img.size == (400, 200)
+
 
 class TestFlyerService:
     def _sample_listing_data(self):
@@ -140,6 +244,96 @@ class TestFlyerService:
         except ImportError:
             pytest.skip("python-pptx not installed")
 
+    def test_pptx_and_pdf_share_one_qr_encoding(self):
+        branding = BrandingConfig(qr_base_url="https://example.com/qr-shared")
+        service = FlyerService(branding)
+        data = self._sample_listing_data()
+
+        _generate_qr_png.cache_clear()
+        service.generate_pptx(data, "Copy")
+        service.generate_pdf(data, "Copy")
+        info = _generate_qr_png.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+    def test_builders_render_with_photos(self, tmp_path):
+        from PIL import Image
+
+        paths = []
+        for i, size in enumerate([(800, 400), (300, 600), (500, 500)]):
+            path = tmp_path / f"photo{i}.jpg"
+            Image.new("RGB", size, (i * 60, 90, 120)).save(path)
+            paths.append(path)
+
+        service = FlyerService(BrandingConfig())
+        data = self._sample_listing_data()
+        assert service.generate_pptx(data, "Copy", paths).getvalue()[:2] == b"PK"
+        assert service.generate_pdf(data, "Copy", paths).getvalue()[:4] == b"%PDF"
+
+    def test_builders_place_logo_from_memory(self, tmp_path):
+        from PIL import Image
+
+        logo = tmp_path / "logo.png"
+        Image.new("RGBA", (320, 120), (200, 0, 0, 255)).save(logo)
+        service = FlyerService(BrandingConfig(logo_path=str(logo)))
+        data = self._sample_listing_data()
+
+        with patch.object(Path, "read_bytes", autospec=True, side_effect=Path.read_bytes) as read:
+            pptx, pdf = service.generate_pptx(data, "Copy"), service.generate_pdf(data, "Copy")
+
+        assert [c.args[0] for c in read.call_args_list].count(logo) == 1
+        assert pptx.getvalue()[:2] == b"PK"
+        assert pdf.getvalue()[:4] == b"%PDF"
+
+    def test_pdf_footer_handles_non_latin1_branding(self):
+        branding = BrandingConfig(
+            brokerage_address="1 Main St \u2014 Suite 2\nCaf\u00e9 Town",
+            brokerage_phone="555 \u2022 1234",
+            headline="Just Listed \u2014 Open House",
+        )
+        pdf = FlyerService(branding).generate_pdf(self._sample_listing_data(), "Copy")
+        assert pdf.getvalue()[:4] == b"%PDF"
+
+    def test_generate_both_returns_pptx_and_pdf(self, tmp_path):
+        from PIL import Image
+
+        from app.services.flyer_service import _downscaled_jpeg
+
+        path = tmp_path / "hero.jpg"
+        Image.new("RGB", (4000, 3000)).save(path)
+
+        _downscaled_jpeg.cache_clear()
+        service = FlyerService(BrandingConfig())
+        pptx, pdf = service.generate_both(self._sample_listing_data(), "Copy", [path])
+        assert pptx.getvalue()[:2] == b"PK"
+        assert pdf.getvalue()[:4] == b"%PDF"
+        assert _downscaled_jpeg.cache_info().currsize == 1  # one resize for both
+
+    def test_large_photos_are_embedded_downscaled(self, tmp_path):
+        import os
+
+        from PIL import Image
+
+        path = tmp_path / "hero.jpg"
+        noise = os.urandom(3000 * 2000 * 3)
+        Image.frombytes("RGB", (3000, 2000), noise).save(path, quality=95)
+
+        service = FlyerService(BrandingConfig())
+        data = self._sample_listing_data()
+        pdf = service.generate_pdf(data, "Copy", [path]).getvalue()
+        pptx = service.generate_pptx(data, "Copy", [path]).getvalue()
+        assert len(pdf) < path.stat().st_size / 4
+        assert len(pptx) < path.stat().st_size / 4
+
+    def test_generate_writes_into_caller_stream(self):
+        service = FlyerService(BrandingConfig(brokerage_name="Test Realty"))
+        data = self._sample_listing_data()
+        for generate, magic in ((service.generate_pptx, b"PK"), (service.generate_pdf, b"%PDF")):
+            with tempfile.SpooledTemporaryFile() as spool:
+                spool.write(b"prefix")
+                assert generate(data, "Copy", out=spool) is spool
+                assert spool.tell() == len(b"prefix")
+                assert spool.read(len(magic)) == magic
+
     def test_generate_pdf_returns_bytesio(self):
         branding = BrandingConfig(brokerage_name="Test Realty")
         service = FlyerService(branding)
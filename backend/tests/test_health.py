@@ -123,7 +123,7 @@ class TestExceptionHandlers:
         )
 
         mock_ai = MagicMock()
-        mock_ai.generate = AsyncMock(side_effect=CircuitBreakerOpenError())
+        mock_ai.generate_variants = AsyncMock(side_effect=CircuitBreakerOpenError())
 
         with patch("app.api.v1.content.AIService", return_value=mock_ai):
             response = await client.post(
@@ -0,0 +1,69 @@
+"""Tests for SharedHttpClient loop binding, reuse, and shutdown."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http_client import SharedHttpClient, close_http_clients
+
+
+def _shared() -> SharedHttpClient:
+    return SharedHttpClient(
+        timeout=httpx.Timeout(5.0),
+        limits=httpx.Limits(max_connections=2, max_keepalive_connections=1),
+    )
+
+
+class TestSharedHttpClient:
+    @pytest.mark.asyncio
+    async def test_client_reused_within_loop(self):
+        shared = _shared()
+        try:
+            assert shared.client is shared.client
+        finally:
+            await shared.close()
+
+    @pytest.mark.asyncio
+    async def test_client_uses_given_timeout(self):
+        shared = _shared()
+        try:
+            assert shared.client.timeout == httpx.Timeout(5.0)
+        finally:
+            await shared.close()
+
+    @pytest.mark.asyncio
+    async def test_close_resets_client(self):
+        shared = _shared()
+        first = shared.client
+        await shared.close()
+        assert first.is_closed
+        second = shared.client
+        try:
+            assert second is not first
+        finally:
+            await shared.close()
+
+    def test_client_replaced_on_new_loop(self):
+        shared = _shared()
+
+        async def _get():
+            return shared.client
+
+        first = asyncio.run(_get())
+        second = asyncio.run(_get())
+        assert second is not first
+
+    @pytest.mark.asyncio
+    async def test_close_noop_when_unused(self):
+        shared = _shared()
+        # Should not raise
+        await shared.close()
+
+    @pytest.mark.asyncio
+    async def test_close_http_clients_closes_every_client(self):
+        shared = [_shared(), _shared()]
+        clients = [s.client for s in shared]
+
+        await close_http_clients()
+
+        assert all(client.is_closed for client in clients)
@@ -2,7 +2,10 @@
 
 import uuid
 
+import pytest
 from httpx import AsyncClient
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import hash_password
@@ -11,6 +14,7 @@ from app.models.lead import Lead
 from app.models.lead_activity import LeadActivity
 from app.models.tenant import Tenant
 from app.models.user import User
+from app.services.lead_service import VALID_STATUSES
 from tests.conftest import auth_headers
 
 
@@ -146,6 +150,76 @@ class TestListLeads:
         assert data["total"] == 5
         assert len(data["leads"]) == 2
 
+    async def test_list_leads_total_past_last_page(
+        self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        for i in range(3):
+            await _lead(db_session, test_tenant, test_user, page, first_name=f"Lead{i}")
+        headers = await auth_headers(client, "test@example.com", "testpassword123")
+        resp = await client.get(
+            "/api/v1/leads", headers=headers, params={"page": 2, "page_size": 2},
+        )
+        data = resp.json()
+        assert data["total"] == 3
+        assert len(data["leads"]) == 1
+
+        resp = await client.get(
+            "/api/v1/leads", headers=headers, params={"page": 5, "page_size": 2},
+        )
+        data = resp.json()
+        assert data["total"] == 3
+        assert data["leads"] == []
+
+    async def test_list_leads_cursor_walks_all_pages(
+        self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        for i in range(5):
+            await _lead(
+                db_session, test_tenant, test_user, page, first_name=f"Lead{i}",
+            )
+        headers = await auth_headers(client, "test@example.com", "testpassword123")
+        resp = await client.get(
+            "/api/v1/leads", headers=headers, params={"page_size": 2},
+        )
+        data = resp.json()
+        seen = [lead["id"] for lead in data["leads"]]
+        while data["next_cursor"]:
+            resp = await client.get(
+                "/api/v1/leads", headers=headers,
+                params={"page_size": 2, "cursor": data["next_cursor"]},
+            )
+            data = resp.json()
+            assert data["total"] is None
+            seen += [lead["id"] for lead in data["leads"]]
+        assert len(seen) == len(set(seen)) == 5
+
+    async def test_list_leads_cursor_with_total(
+        self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        for i in range(3):
+            await _lead(db_session, test_tenant, test_user, page, first_name=f"Lead{i}")
+        headers = await auth_headers(client, "test@example.com", "testpassword123")
+        first = (await client.get(
+            "/api/v1/leads", headers=headers, params={"page_size": 1},
+        )).json()
+        resp = await client.get(
+            "/api/v1/leads", headers=headers,
+            params={"page_size": 1, "cursor": first["next_cursor"], "include_total": True},
+        )
+        data = resp.json()
+        assert data["total"] == 3
+        assert data["leads"][0]["id"] != first["leads"][0]["id"]
+
+    async def test_list_leads_invalid_cursor(self, client: AsyncClient, test_user: User):
+        headers = await auth_headers(client, "test@example.com", "testpassword123")
+        resp = await client.get(
+            "/api/v1/leads", headers=headers, params={"cursor": "not-a-cursor"},
+        )
+        assert resp.status_code == 400
+
     async def test_agent_sees_only_own_leads(
         self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
     ):
@@ -339,6 +413,101 @@ class TestUpdateLead:
         assert resp.status_code == 403
 
 
+class TestBulkUpdateStatus:
+    async def test_bulk_moves_leads_and_logs_activity(
+        self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        fresh = await _lead(db_session, test_tenant, test_user, page)
+        showing = await _lead(db_session, test_tenant, test_user, page, pipeline_status="showing")
+        closed = await _lead(db_session, test_tenant, test_user, page, pipeline_status="closed")
+        headers = await auth_headers(client, "test@example.com", "testpassword123")
+        resp = await client.post(
+            "/api/v1/leads/bulk-status",
+            headers=headers,
+            json={
+                "lead_ids": [str(fresh.id), str(showing.id), str(closed.id), str(uuid.uuid4())],
+                "pipeline_status": "closed",
+            },
+        )
+        assert resp.status_code == 200
+        assert sorted(resp.json()["updated"]) == sorted([str(fresh.id), str(showing.id)])
+
+        for lead in (fresh, showing):
+            await db_session.refresh(lead)
+            assert lead.pipeline_status == "closed"
+            assert lead.closed_at is not None
+        await db_session.refresh(closed)
+        assert closed.closed_at is None  # Already closed, left untouched
+
+        result = await db_session.execute(
+            select(LeadActivity.lead_id, LeadActivity.old_value, LeadActivity.new_value)
+            .where(LeadActivity.activity_type == "status_change")
+        )
+        assert sorted(result.all()) == sorted([
+            (fresh.id, "new", "closed"), (showing.id, "showing", "closed"),
+        ])
+
+    async def test_bulk_agent_moves_only_own_leads(
+        self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        others = await _lead(db_session, test_tenant, test_user, page)
+        agent = await _agent_user(db_session, test_tenant)
+        own = await _lead(db_session, test_tenant, agent, page)
+        headers = await auth_headers(client, "agent@example.com", "Agentpass123!")
+        resp = await client.post(
+            "/api/v1/leads/bulk-status",
+            headers=headers,
+            json={"lead_ids": [str(others.id), str(own.id)], "pipeline_status": "contacted"},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["updated"] == [str(own.id)]
+
+    async def test_bulk_invalid_status(self, client: AsyncClient, test_user: User):
+        headers = await auth_headers(client, "test@example.com", "testpassword123")
+        resp = await client.post(
+            "/api/v1/leads/bulk-status",
+            headers=headers,
+            json={"lead_ids": [str(uuid.uuid4())], "pipeline_status": "nonexistent"},
+        )
+        assert resp.status_code == 400
+
+
+
+class TestPipelineStatusSchema:
+    """ck_leads_pipeline_status and trg_leads_closed_at, enforced by the database."""
+
+    async def test_every_valid_status_accepted(
+        self, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        for status in VALID_STATUSES:
+            lead = await _lead(db_session, test_tenant, test_user, page, pipeline_status=status)
+            assert lead.pipeline_status == status
+
+    async def test_unknown_status_rejected(
+        self, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        lead = await _lead(db_session, test_tenant, test_user, page)
+        with pytest.raises(IntegrityError, match="ck_leads_pipeline_status"):
+            await db_session.execute(
+                update(Lead).where(Lead.id == lead.id).values(pipeline_status="qualified")
+            )
+
+    async def test_set_based_close_stamps_closed_at(
+        self, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        lead = await _lead(db_session, test_tenant, test_user, page, pipeline_status="showing")
+        await db_session.execute(
+            text("UPDATE leads SET pipeline_status = 'closed' WHERE id = :id"), {"id": lead.id},
+        )
+        closed_at = await db_session.scalar(select(Lead.closed_at).where(Lead.id == lead.id))
+        assert closed_at is not None
+
+
 # ── Delete ────────────────────────────────────────────────────────
 
 
@@ -460,6 +629,31 @@ class TestLeadAnalytics:
         assert data["by_status"]["new"] == 1
         assert data["by_status"]["contacted"] == 1
 
+    async def test_summary_breakdowns(
+        self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
+    ):
+        page = await _agent_page(db_session, test_tenant, test_user)
+        await _lead(db_session, test_tenant, test_user, page, utm_source="google")
+        await _lead(db_session, test_tenant, test_user, page, utm_source="google")
+        closed = await _lead(
+            db_session, test_tenant, test_user, page, pipeline_status="closed",
+        )
+        closed.closed_value = 450000
+        unassigned = await _lead(db_session, test_tenant, test_user, page)
+        unassigned.agent_id = None
+        await db_session.flush()
+
+        headers = await auth_headers(client, "test@example.com", "testpassword123")
+        resp = await client.get("/api/v1/leads/analytics/summary", headers=headers)
+        data = resp.json()
+        assert data["total_leads"] == 4
+        assert data["by_status"] == {"new": 3, "closed": 1}
+        assert data["by_source"] == {"google": 2, "direct": 2}
+        assert data["by_agent"] == [
+            {"agent_name": test_user.full_name, "agent_id": str(test_user.id), "count": 3},
+        ]
+        assert float(data["total_closed_value"]) == 450000
+
     async def test_funnel(
         self, client: AsyncClient, test_user: User, test_tenant: Tenant, db_session: AsyncSession,
     ):
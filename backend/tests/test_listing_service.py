@@ -145,3 +145,106 @@ class TestUpsertFromMls:
         assert is_new is False
         assert updated.price == 400000  # Not overwritten by None
         assert updated.status == "sold"
+
+    @pytest.mark.asyncio
+    async def test_repeat_upsert_updates_same_row(
+        self, db_session: AsyncSession, test_tenant: Tenant,
+    ):
+        conn = _make_connection(db_session, test_tenant)
+        await db_session.flush()
+        service = ListingService(db_session)
+
+        first, first_new = await service.upsert_from_mls(
+            tenant_id=test_tenant.id,
+            mls_connection_id=conn.id,
+            mls_data={"mls_listing_id": "MLS-004", "price": 600000, "address_city": "Naples"},
+        )
+        second, second_new = await service.upsert_from_mls(
+            tenant_id=test_tenant.id,
+            mls_connection_id=conn.id,
+            mls_data={"mls_listing_id": "MLS-004", "price": 575000, "address_city": None},
+        )
+
+        assert (first_new, second_new) == (True, False)
+        assert second.id == first.id
+        assert second.price == 575000
+        assert second.address_city == "Naples"
+        assert second.updated_at >= first.created_at
+
+    @pytest.mark.asyncio
+    async def test_missing_mls_id_always_inserts(
+        self, db_session: AsyncSession, test_tenant: Tenant,
+    ):
+        conn = _make_connection(db_session, test_tenant)
+        await db_session.flush()
+        service = ListingService(db_session)
+
+        results = [
+            await service.upsert_from_mls(
+                tenant_id=test_tenant.id,
+                mls_connection_id=conn.id,
+                mls_data={"mls_listing_id": None, "price": 100000},
+            )
+            for _ in range(2)
+        ]
+
+        assert [is_new for _, is_new in results] == [True, True]
+        assert results[0][0].id != results[1][0].id
+
+
+class TestBulkUpsertFromMls:
+    @pytest.mark.asyncio
+    async def test_bulk_creates_and_updates(self, db_session: AsyncSession, test_tenant: Tenant):
+        conn = _make_connection(db_session, test_tenant)
+        await db_session.flush()
+        service = ListingService(db_session)
+
+        existing, _ = await service.upsert_from_mls(
+            tenant_id=test_tenant.id,
+            mls_connection_id=conn.id,
+            mls_data={"mls_listing_id": "MLS-B1", "price": 500000, "address_city": "Miami"},
+        )
+        results = await service.bulk_upsert_from_mls(
+            tenant_id=test_tenant.id,
+            mls_connection_id=conn.id,
+            rows=[
+                {"mls_listing_id": "MLS-B1", "price": 480000, "address_city": None},
+                {"mls_listing_id": "MLS-B2", "price": 900000, "address_city": "Tampa"},
+                # Different key set, written by a separate statement
+                {"mls_listing_id": "MLS-B3", "bedrooms": 3, "unmapped_field": "x"},
+            ],
+        )
+
+        assert len(results) == 3
+        by_id = dict(results)
+        assert by_id[existing.id] is False
+        assert sorted(by_id.values()) == [False, True, True]
+
+        await db_session.refresh(existing)
+        assert existing.price == 480000
+        assert existing.address_city == "Miami"  # Not overwritten by None
+
+    @pytest.mark.asyncio
+    async def test_bulk_merges_repeated_listing(
+        self, db_session: AsyncSession, test_tenant: Tenant,
+    ):
+        conn = _make_connection(db_session, test_tenant)
+        await db_session.flush()
+        service = ListingService(db_session)
+
+        results = await service.bulk_upsert_from_mls(
+            tenant_id=test_tenant.id,
+            mls_connection_id=conn.id,
+            rows=[
+                {"mls_listing_id": "MLS-B4", "price": 300000, "address_city": "Orlando"},
+                {"mls_listing_id": "MLS-B4", "price": 295000, "bedrooms": None},
+                {"mls_listing_id": None, "price": 100000},
+                {"mls_listing_id": None, "price": 100000},
+            ],
+        )
+
+        assert len(results) == 3
+        assert all(is_new for _, is_new in results)
+        listing = await db_session.get(Listing, results[0][0])
+        assert listing.price == 295000
+        assert listing.address_city == "Orlando"
@@ -30,6 +30,23 @@ class TestLookup:
         result = lookup({"address_city": "Fort Lauderdale", "address_zip": "33308"}, areas)
         assert result["name"] == "Zip Match"
 
+    def test_lookup_later_area_wins_overlap(self):
+        areas = [
+            {"name": "Old", "zip_codes": ["33308"], "stats": {}},
+            "not-an-area",
+            {"name": "New", "zip_codes": [33308], "stats": {}},
+        ]
+        result = lookup({"address_zip": "33308"}, areas)
+        assert result["name"] == "New"
+
+    def test_lookup_leading_zero_zip_matches_strings_only(self):
+        areas = [
+            {"name": "Numeric", "zip_codes": [2134], "stats": {}},
+            {"name": "Boston", "zip_codes": ["02134"], "stats": {}},
+        ]
+        assert lookup({"address_zip": "02134"}, areas)["name"] == "Boston"
+        assert lookup({"address_zip": "02134"}, areas[:1]) is None
+
     def test_lookup_no_match(self):
         areas = [{"name": "Elsewhere", "zip_codes": ["99999"], "stats": {}}]
         result = lookup({"address_city": "Nowhere", "address_zip": "00000"}, areas)
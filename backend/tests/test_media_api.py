@@ -1,7 +1,9 @@
 """Tests for media upload/presigned URL endpoints and MediaService."""
+import hashlib
 import io
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 from httpx import AsyncClient
 
@@ -23,6 +25,18 @@ PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
 WEBP_BYTES = b"RIFF" + b"\x00\x00\x00\x00" + b"WEBP" + b"\x00" * 100
 
 
+@pytest.fixture(autouse=True)
+def _clear_presign_cache():
+    from app.services.media_service import _presign_cache, _s3_client
+
+    # Tests patch boto3.client per case, so the shared client must not leak
+    _presign_cache.clear()
+    _s3_client.cache_clear()
+    yield
+    _presign_cache.clear()
+    _s3_client.cache_clear()
+
+
 class TestUploadMedia:
     @pytest.mark.asyncio
     async def test_upload_jpeg(
@@ -51,6 +65,35 @@ class TestUploadMedia:
         data = response.json()
         assert data["content_type"] == "image/jpeg"
 
+    @pytest.mark.asyncio
+    async def test_upload_passes_rewound_stream(
+        self, client: AsyncClient, test_user: User, test_tenant: Tenant
+    ):
+        headers = _auth_token(test_user, test_tenant)
+        received = {}
+
+        async def _upload_validated(contents, filename, content_type, tenant_id):
+            received["body"] = contents.read()
+            return {
+                "media_id": filename,
+                "key": f"{tenant_id}/{filename}.jpg",
+                "content_type": content_type,
+                "size": len(received["body"]),
+            }
+
+        mock_service = MagicMock()
+        mock_service.upload_validated = _upload_validated
+
+        with patch("app.api.v1.media.MediaService", return_value=mock_service):
+            response = await client.post(
+                "/api/v1/media/upload",
+                headers=headers,
+                files={"file": ("photo.jpg", io.BytesIO(JPEG_BYTES), "image/jpeg")},
+            )
+
+        assert response.status_code == 200
+        assert received["body"] == JPEG_BYTES
+
     @pytest.mark.asyncio
     async def test_upload_png(
         self, client: AsyncClient, test_user: User, test_tenant: Tenant
@@ -179,12 +222,15 @@ class TestMediaService:
         from app.services.media_service import MediaService
 
         mock_s3 = MagicMock()
-        mock_s3.put_object = MagicMock()
+        mock_redis = AsyncMock()
 
-        with patch("app.services.media_service.boto3.client", return_value=mock_s3):
+        with (
+            patch("app.services.media_service.boto3.client", return_value=mock_s3),
+            patch("app.services.media_service.get_redis", return_value=mock_redis),
+        ):
             service = MediaService()
             result = await service.upload_validated(
-                contents=JPEG_BYTES,
+                contents=io.BytesIO(JPEG_BYTES),
                 filename="test-file",
                 content_type="image/jpeg",
                 tenant_id="tenant-1",
@@ -193,7 +239,15 @@ class TestMediaService:
         assert result["media_id"] == "test-file"
         assert result["key"] == "tenant-1/test-file.jpg"
         assert result["size"] == len(JPEG_BYTES)
-        mock_s3.put_object.assert_called_once()
+        mock_s3.upload_fileobj.assert_called_once()
+        mock_redis.set.assert_awaited_once()
+        assert mock_redis.set.call_args.args == ("media_key:tenant-1:test-file", result["key"])
+        fileobj, bucket, key = mock_s3.upload_fileobj.call_args.args
+        assert fileobj.tell() == 0
+        assert key == "tenant-1/test-file.jpg"
+        assert mock_s3.upload_fileobj.call_args.kwargs == {
+            "ExtraArgs": {"ContentType": "image/jpeg"},
+        }
 
     @pytest.mark.asyncio
     async def test_get_presigned_url_found(self):
@@ -225,13 +279,83 @@ class TestMediaService:
 
         assert result == {"error": "File not found"}
 
+    @pytest.mark.asyncio
+    async def test_get_presigned_url_uses_cached_key(self):
+        from app.services.media_service import MediaService
+
+        mock_s3 = MagicMock()
+        mock_s3.generate_presigned_url = MagicMock(return_value="https://signed-url")
+        mock_redis = AsyncMock()
+        mock_redis.get.return_value = "t1/m1.png"
+
+        with (
+            patch("app.services.media_service.boto3.client", return_value=mock_s3),
+            patch("app.services.media_service.get_redis", return_value=mock_redis),
+        ):
+            service = MediaService()
+            result = await service.get_presigned_url("m1", "t1")
+
+        assert result["key"] == "t1/m1.png"
+        mock_redis.get.assert_awaited_once_with("media_key:t1:m1")
+        mock_s3.list_objects_v2.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_presigned_url_backfills_cache_on_miss(self):
+        from app.services.media_service import MediaService
+
+        mock_s3 = MagicMock()
+        mock_s3.list_objects_v2 = MagicMock(
+            return_value={"Contents": [{"Key": "t1/m1.jpg"}]}
+        )
+        mock_redis = AsyncMock()
+        mock_redis.get.return_value = None
+
+        with (
+            patch("app.services.media_service.boto3.client", return_value=mock_s3),
+            patch("app.services.media_service.get_redis", return_value=mock_redis),
+        ):
+            service = MediaService()
+            result = await service.get_presigned_url("m1", "t1")
+
+        assert result["key"] == "t1/m1.jpg"
+        mock_redis.set.assert_awaited_once()
+        assert mock_redis.set.call_args.args == ("media_key:t1:m1", "t1/m1.jpg")
+
+    @pytest.mark.asyncio
+    async def test_get_presigned_url_reuses_signature_until_half_life(self):
+        from app.services import media_service
+        from app.services.media_service import MediaService
+
+        mock_s3 = MagicMock()
+        mock_s3.list_objects_v2 = MagicMock(
+            return_value={"Contents": [{"Key": "t1/m1.jpg"}]}
+        )
+        mock_s3.generate_presigned_url = MagicMock(side_effect=["https://a", "https://b"])
+
+        with (
+            patch("app.services.media_service.boto3.client", return_value=mock_s3),
+            patch.object(media_service.time, "monotonic", return_value=1000.0) as now,
+        ):
+            service = MediaService()
+            first = await service.get_presigned_url("m1", "t1")
+            now.return_value = 1000.0 + media_service.PRESIGN_TTL_SECONDS / 2 - 1
+            again = await service.get_presigned_url("m1", "t1")
+            now.return_value = 1000.0 + media_service.PRESIGN_TTL_SECONDS / 2
+            later = await service.get_presigned_url("m1", "t1")
+
+        assert first["url"] == again["url"] == "https://a"
+        assert later["url"] == "https://b"
+        assert mock_s3.generate_presigned_url.call_count == 2
+
     @pytest.mark.asyncio
     async def test_download_from_url(self):
-        import httpx as _httpx
         from app.services.media_service import MediaService
 
         mock_s3 = MagicMock()
-        mock_s3.put_object = MagicMock()
+        uploaded = {}
+        mock_s3.upload_fileobj = MagicMock(
+            side_effect=lambda fileobj, *a, **kw: uploaded.setdefault("body", fileobj.read()),
+        )
 
         chunk_data = b"\xff\xd8" + b"\x00" * 98
 
@@ -258,7 +382,7 @@ class TestMediaService:
         with (
             patch("app.services.media_service.boto3.client", return_value=mock_s3),
             patch.object(
-                _httpx, "AsyncClient", return_value=mock_http_client,
+                httpx, "AsyncClient", return_value=mock_http_client,
             ),
         ):
             service = MediaService()
@@ -271,7 +395,95 @@ class TestMediaService:
         assert "media_id" in result
         assert "key" in result
         assert result["key"].startswith("t1/mls/")
-        mock_s3.put_object.assert_called_once()
+        mock_s3.upload_fileobj.assert_called_once()
+        assert uploaded["body"] == chunk_data
+
+    @pytest.mark.asyncio
+    async def test_download_from_url_reuses_identical_file(self):
+        from app.services.media_service import MediaService, media_digest_cache_key
+
+        mock_s3 = MagicMock()
+        store = {}
+        mock_redis = AsyncMock()
+        mock_redis.get = AsyncMock(side_effect=store.get)
+        mock_redis.set = AsyncMock(side_effect=lambda key, value, ex: store.update({key: value}))
+
+        def _http_client(body):
+            mock_response = MagicMock()
+            mock_response.headers = {"content-type": "image/jpeg"}
+            mock_response.raise_for_status = MagicMock()
+
+            async def _aiter_bytes(size):
+                yield body
+
+            mock_response.aiter_bytes = _aiter_bytes
+            mock_stream = AsyncMock()
+            mock_stream.__aenter__ = AsyncMock(return_value=mock_response)
+            mock_stream.__aexit__ = AsyncMock(return_value=None)
+            client = AsyncMock()
+            client.__aenter__ = AsyncMock(return_value=client)
+            client.__aexit__ = AsyncMock(return_value=None)
+            client.stream = MagicMock(return_value=mock_stream)
+            return client
+
+        photo = b"\xff\xd8" + b"\x01" * 98
+        with (
+            patch("app.services.media_service.boto3.client", return_value=mock_s3),
+            patch("app.services.media_service.get_redis", return_value=mock_redis),
+            patch.object(
+                httpx, "AsyncClient",
+                side_effect=[_http_client(photo), _http_client(photo), _http_client(b"other")],
+            ),
+        ):
+            service = MediaService()
+            results = [
+                await service.download_from_url(
+                    url=f"https://photos.example.com/{i}.jpg", tenant_id="t1",
+                    filename=f"listing-abc-{i}.jpg",
+                )
+                for i in range(3)
+            ]
+
+        assert results[1] == results[0]
+        assert results[2]["media_id"] != results[0]["media_id"]
+        assert mock_s3.upload_fileobj.call_count == 2
+        assert media_digest_cache_key("t1", hashlib.sha256(photo).hexdigest()) in store
+
+    @pytest.mark.asyncio
+    async def test_uploads_run_on_bounded_s3_pool(self):
+        import threading
+
+        from app.services import media_service
+        from app.services.media_service import MediaService
+
+        threads = []
+        mock_s3 = MagicMock()
+        mock_s3.upload_fileobj = MagicMock(
+            side_effect=lambda *a, **kw: threads.append(threading.current_thread().name),
+        )
+
+        with patch("app.services.media_service.boto3.client", return_value=mock_s3):
+            service = MediaService()
+            await service.upload_validated(
+                contents=io.BytesIO(JPEG_BYTES), filename="pooled",
+                content_type="image/jpeg", tenant_id="tenant-1",
+            )
+
+        assert threads[0].startswith("s3")
+        media_service.shutdown_s3_pool()
+        assert media_service._s3_pool is None
+
+    def test_instances_share_one_s3_client(self):
+        from app.config import get_settings
+        from app.services.media_service import MediaService
+
+        with patch("app.services.media_service.boto3.client") as mock_client:
+            first, second = MediaService(), MediaService()
+
+        assert first.s3 is second.s3
+        mock_client.assert_called_once()
+        config = mock_client.call_args.kwargs["config"]
+        assert config.max_pool_connections == get_settings().s3_max_pool_connections
 
     @pytest.mark.asyncio
     async def test_upload_with_file(self):
@@ -279,12 +491,11 @@ class TestMediaService:
         from app.services.media_service import MediaService
 
         mock_s3 = MagicMock()
-        mock_s3.put_object = MagicMock()
 
         mock_file = AsyncMock()
         mock_file.filename = "photo.jpg"
         mock_file.content_type = "image/jpeg"
-        mock_file.read = AsyncMock(return_value=JPEG_BYTES)
+        mock_file.file = io.BytesIO(JPEG_BYTES)
 
         with patch("app.services.media_service.boto3.client", return_value=mock_s3):
             service = MediaService()
@@ -295,7 +506,8 @@ class TestMediaService:
         assert result["size"] == len(JPEG_BYTES)
         assert result["key"].startswith("tenant-1/")
         assert result["key"].endswith(".jpg")
-        mock_s3.put_object.assert_called_once()
+        mock_s3.upload_fileobj.assert_called_once()
+        assert mock_s3.upload_fileobj.call_args.args[0] is mock_file.file
 
     @pytest.mark.asyncio
     async def test_upload_no_filename(self):
@@ -303,12 +515,11 @@ class TestMediaService:
         from app.services.media_service import MediaService
 
         mock_s3 = MagicMock()
-        mock_s3.put_object = MagicMock()
 
         mock_file = AsyncMock()
         mock_file.filename = None
         mock_file.content_type = None
-        mock_file.read = AsyncMock(return_value=b"\x00" * 10)
+        mock_file.file = io.BytesIO(b"\x00" * 10)
 
         with patch("app.services.media_service.boto3.client", return_value=mock_s3):
             service = MediaService()
@@ -319,7 +530,6 @@ class TestMediaService:
     @pytest.mark.asyncio
     async def test_download_content_length_too_large(self):
         """Reject download when content-length exceeds limit."""
-        import httpx as _httpx
         from app.services.media_service import MediaService
 
         mock_s3 = MagicMock()
@@ -339,7 +549,7 @@ class TestMediaService:
 
         with (
             patch("app.services.media_service.boto3.client", return_value=mock_s3),
-            patch.object(_httpx, "AsyncClient", return_value=mock_http_client),
+            patch.object(httpx, "AsyncClient", return_value=mock_http_client),
         ):
             service = MediaService()
             with pytest.raises(ValueError, match="File too large"):
@@ -352,7 +562,6 @@ class TestMediaService:
     @pytest.mark.asyncio
     async def test_download_chunk_exceeds_limit(self):
         """Reject download when chunked data exceeds size limit."""
-        import httpx as _httpx
         from app.services.media_service import MediaService
 
         mock_s3 = MagicMock()
@@ -381,7 +590,7 @@ class TestMediaService:
 
         with (
             patch("app.services.media_service.boto3.client", return_value=mock_s3),
-            patch.object(_httpx, "AsyncClient", return_value=mock_http_client),
+            patch.object(httpx, "AsyncClient", return_value=mock_http_client),
         ):
             service = MediaService()
             with pytest.raises(ValueError, match="byte limit"):
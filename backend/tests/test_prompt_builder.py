@@ -3,7 +3,7 @@
 from unittest.mock import MagicMock
 
 
-from app.services.prompt_builder import PromptBuilder, SYSTEM_PROMPTS
+from app.services.prompt_builder import PromptBuilder, SYSTEM_PROMPTS, split_batch_response
 
 
 def _mock_listing(**overrides):
@@ -100,6 +100,17 @@ class TestPromptBuilderBasics:
         assert "ADDITIONAL INSTRUCTIONS:" in user
         assert "Focus on the ocean view." in user
 
+    def test_rendered_system_prompt_is_reused(self):
+        from app.services.prompt_builder import _render_system
+
+        _render_system.cache_clear()
+        builder = PromptBuilder()
+        first, _ = builder.build(listing=_mock_listing(), content_type="flyer", tone="luxury")
+        second, _ = builder.build(listing=_mock_listing(), content_type="flyer", tone="luxury")
+
+        assert second == first
+        assert _render_system.cache_info().hits == 1
+
     def test_unknown_content_type_falls_back(self):
         builder = PromptBuilder()
         system, _ = builder.build(
@@ -330,3 +341,39 @@ class TestMarketDataInjection:
         )
         assert "MARKET CONTEXT:" in user
         assert "$485,000" in user
+
+
+class TestBatchPrompt:
+    def test_build_batch_numbers_each_task_and_sends_listing_once(self):
+        builder = PromptBuilder()
+        system, user = builder.build_batch(
+            listing=_mock_listing(),
+            content_types=["social_instagram", "flyer"],
+            tone="luxury",
+            brand_profile=_mock_brand(),
+        )
+        assert "=== [1] social_instagram ===" in system
+        assert "=== [2] flyer ===" in system
+        assert "{tone}" not in system
+        assert "BRAND VOICE:" in system
+        assert user.count("LISTING DATA:") == 1
+        assert user.endswith("Generate all 2 pieces now.")
+
+    def test_split_batch_response(self):
+        text = (
+            "=== [1] social_instagram ===\nHook line\n#realestate\n\n"
+            "=== [2] flyer ===\nHEADLINE\nBody copy\n"
+        )
+        assert split_batch_response(text, ["social_instagram", "flyer"]) == {
+            "social_instagram": "Hook line\n#realestate",
+            "flyer": "HEADLINE\nBody copy",
+        }
+
+    def test_split_batch_response_drops_mismatched_and_empty_sections(self):
+        text = (
+            "=== [1] flyer ===\nwrong position\n"
+            "=== [2] flyer ===\n\n"
+            "=== [3] social_x ===\nShort post\n"
+        )
+        sections = split_batch_response(text, ["listing_description", "flyer", "social_x"])
+        assert sections == {"social_x": "Short post"}
@@ -1,13 +1,18 @@
 """Tests for public (unauthenticated) endpoints: landing pages, lead capture, visits."""
 
+from unittest.mock import AsyncMock, patch
+
 from httpx import AsyncClient
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import hash_password
 from app.models.agent_page import AgentPage
 from app.models.listing import Listing
+from app.models.page_visit import PageVisit
 from app.models.tenant import Tenant
 from app.models.user import User
+from app.services.lead_service import PAGE_VISIT_BUFFER_KEY, decode_page_visit
 
 
 # ── Helpers ───────────────────────────────────────────────────────
@@ -242,6 +247,51 @@ class TestRecordVisit:
         )
         assert resp.status_code == 201
 
+    async def test_record_visit_buffers_in_redis(
+        self, client: AsyncClient, db_session: AsyncSession,
+    ):
+        tenant, _, page, listing = await _setup_public(db_session)
+        mock_redis = AsyncMock()
+        with patch("app.services.lead_service.get_redis", AsyncMock(return_value=mock_redis)):
+            resp = await client.post(
+                "/api/v1/public/visits",
+                json={
+                    "tenant_slug": tenant.slug,
+                    "agent_slug": page.slug,
+                    "listing_id": str(listing.id),
+                    "utm_source": "facebook",
+                },
+            )
+        assert resp.status_code == 201
+
+        key, payload = mock_redis.rpush.await_args.args
+        assert key == PAGE_VISIT_BUFFER_KEY
+        row = decode_page_visit(payload)
+        assert (row["tenant_id"], row["agent_page_id"]) == (tenant.id, page.id)
+        assert row["listing_id"] == listing.id
+        assert row["utm_source"] == "facebook"
+        result = await db_session.execute(select(func.count()).select_from(PageVisit))
+        assert result.scalar_one() == 0
+
+    async def test_record_visit_inserts_without_redis(
+        self, client: AsyncClient, db_session: AsyncSession,
+    ):
+        tenant, _, page, _ = await _setup_public(db_session)
+        with patch(
+            "app.services.lead_service.get_redis",
+            AsyncMock(side_effect=RuntimeError("Redis pool not initialized")),
+        ):
+            resp = await client.post(
+                "/api/v1/public/visits",
+                json={"tenant_slug": tenant.slug, "agent_slug": page.slug},
+            )
+        assert resp.status_code == 201
+
+        result = await db_session.execute(
+            select(PageVisit).where(PageVisit.agent_page_id == page.id)
+        )
+        assert len(result.scalars().all()) == 1
+
     async def test_record_visit_invalid_agent(
         self, client: AsyncClient, db_session: AsyncSession,
     ):
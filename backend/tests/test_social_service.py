@@ -1,5 +1,7 @@
 """Tests for SocialService (Meta Graph API) and photo URL validation."""
 
+import asyncio
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
@@ -8,6 +10,15 @@ import pytest
 from app.services.social_service import SocialService, validate_photo_url
 
 
+@pytest.fixture(autouse=True)
+def _clear_photo_url_cache():
+    from app.services.social_service import _valid_photo_urls
+
+    _valid_photo_urls.clear()
+    yield
+    _valid_photo_urls.clear()
+
+
 class TestValidatePhotoUrl:
     @pytest.mark.asyncio
     async def test_empty_url(self):
@@ -72,6 +83,60 @@ class TestValidatePhotoUrl:
         assert "timed out" in result["error"]
 
 
+    @pytest.mark.asyncio
+    async def test_valid_url_not_rechecked(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {"content-type": "image/jpeg"}
+
+        with patch(
+            "httpx.AsyncClient.head", new_callable=AsyncMock, return_value=mock_response,
+        ) as head:
+            first = await validate_photo_url("https://cdn.example.com/hero.jpg")
+            second = await validate_photo_url("https://cdn.example.com/hero.jpg")
+
+        assert first == second == {"valid": True, "error": None}
+        head.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_rechecked(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_response.headers = {}
+
+        with patch(
+            "httpx.AsyncClient.head", new_callable=AsyncMock, return_value=mock_response,
+        ) as head:
+            await validate_photo_url("https://cdn.example.com/missing.jpg")
+            await validate_photo_url("https://cdn.example.com/missing.jpg")
+
+        assert head.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_head_rejected_falls_back_to_ranged_get(self):
+        head_response = MagicMock()
+        head_response.status_code = 405
+        head_response.headers = {}
+        get_response = MagicMock()
+        get_response.status_code = 206
+        get_response.headers = {"content-type": "image/webp"}
+        requests = []
+
+        @asynccontextmanager
+        async def stream(self, method, url, **kwargs):
+            requests.append((method, kwargs["headers"]))
+            yield get_response
+
+        with (
+            patch("httpx.AsyncClient.head", new_callable=AsyncMock, return_value=head_response),
+            patch("httpx.AsyncClient.stream", stream),
+        ):
+            result = await validate_photo_url("https://cdn.example.com/no-head.webp")
+
+        assert result == {"valid": True, "error": None}
+        assert requests == [("GET", {"Range": "bytes=0-0"})]
+
+
 class TestSocialServiceInit:
     def test_from_tenant_settings_configured(self):
         settings = {
@@ -221,3 +286,68 @@ class TestPostListing:
 
         assert results["instagram"]["success"] is False
         assert "validation failed" in results["instagram"]["error"].lower()
+
+    @pytest.mark.asyncio
+    async def test_posts_to_both_platforms_concurrently(self):
+        service = SocialService("token", "page123", ig_user_id="ig456")
+        both_started = asyncio.Event()
+        started = []
+
+        async def post(platform, **kwargs):
+            started.append(platform)
+            if len(started) == 2:
+                both_started.set()
+            # Sequential posting would hang here waiting for the other platform
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+            return {"success": True, "post_id": f"{platform}_1", "error": None}
+
+        async def post_fb(**kwargs):
+            return await post("facebook", **kwargs)
+
+        async def post_ig(**kwargs):
+            return await post("instagram", **kwargs)
+
+        with (
+            patch(
+                "app.services.social_service.validate_photo_url",
+                AsyncMock(return_value={"valid": True, "error": None}),
+            ),
+            patch.object(service, "post_to_facebook", post_fb),
+            patch.object(service, "post_to_instagram", post_ig),
+        ):
+            results = await service.post_listing(
+                fb_text="Check this out!",
+                ig_text="Beautiful view!",
+                photo_url="https://example.com/photo.jpg",
+            )
+
+        assert list(results) == ["facebook", "instagram"]
+        assert results["facebook"]["post_id"] == "facebook_1"
+        assert results["instagram"]["post_id"] == "instagram_1"
+
+    @pytest.mark.asyncio
+    async def test_one_platform_error_keeps_other_result(self):
+        service = SocialService("token", "page123", ig_user_id="ig456")
+
+        with (
+            patch(
+                "app.services.social_service.validate_photo_url",
+                AsyncMock(return_value={"valid": True, "error": None}),
+            ),
+            patch.object(
+                service, "post_to_facebook", AsyncMock(side_effect=ValueError("bad body")),
+            ),
+            patch.object(
+                service, "post_to_instagram",
+                AsyncMock(return_value={"success": True, "post_id": "ig_1", "error": None}),
+            ),
+        ):
+            results = await service.post_listing(
+                fb_text="Check this out!",
+                ig_text="Beautiful view!",
+                photo_url="https://example.com/photo.jpg",
+            )
+
+        assert results["facebook"]["success"] is False
+        assert "bad body" in results["facebook"]["error"]
+        assert results["instagram"] == {"success": True, "post_id": "ig_1", "error": None}
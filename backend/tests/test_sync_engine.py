@@ -25,6 +25,21 @@ def _make_connection(tenant_id, watermark=None) -> MLSConnection:
     return conn
 
 
+def _listing_service(mock_upsert) -> MagicMock:
+    """ListingService stub whose bulk upsert feeds each row through mock_upsert."""
+
+    async def bulk_upsert_from_mls(tenant_id, mls_connection_id, rows):
+        written = []
+        for row in rows:
+            listing, is_new = await mock_upsert(
+                tenant_id=tenant_id, mls_connection_id=mls_connection_id, mls_data=row,
+            )
+            written.append((listing.id, is_new))
+        return written
+
+    return MagicMock(bulk_upsert_from_mls=bulk_upsert_from_mls)
+
+
 def _reso_property(key="ABC123", mod_ts="2025-01-15T10:00:00Z"):
     return {
         "ListingKey": key,
@@ -91,7 +106,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         assert stats["total"] == 1
@@ -133,7 +148,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         assert stats["total"] == 200
@@ -184,7 +199,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         assert stats["errors"] == 1
@@ -218,7 +233,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         assert stats["errors"] == 1
@@ -253,7 +268,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             await engine.sync_connection(conn)
 
         mock_auto_gen.delay.assert_called_once_with(
@@ -289,7 +304,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             await engine.sync_connection(conn)
 
         mock_auto_gen.delay.assert_not_called()
@@ -347,7 +362,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             await engine.sync_connection(conn)
 
         assert conn.sync_watermark == "2025-01-15T12:00:00Z"
@@ -395,7 +410,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         assert stats["created"] == 2
@@ -470,7 +485,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         assert stats["total"] == 2
@@ -510,7 +525,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         # Sync should still report success; auto-gen failure is non-fatal
@@ -572,7 +587,7 @@ class TestSyncConnection:
         ):
             engine = SyncEngine.__new__(SyncEngine)
             engine.db = db_session
-            engine.listing_service = MagicMock(upsert_from_mls=mock_upsert)
+            engine.listing_service = _listing_service(mock_upsert)
             stats = await engine.sync_connection(conn)
 
         assert stats["total"] == 1
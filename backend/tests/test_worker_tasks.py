@@ -1,6 +1,7 @@
 """Tests for Celery worker tasks (async helpers + Celery wrappers)."""
+from contextlib import nullcontext
 from unittest.mock import AsyncMock, MagicMock, patch
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 import pytest
 from celery.exceptions import SoftTimeLimitExceeded
@@ -32,7 +33,7 @@ class TestSyncTenantHelper:
         # Local imports in _sync_tenant — patch at source modules
         with (
             patch(
-                "app.core.database.async_session_factory",
+                "app.core.database.worker_session_factory",
                 return_value=mock_session,
             ),
             patch(
@@ -64,7 +65,7 @@ class TestSyncTenantHelper:
 
         with (
             patch(
-                "app.core.database.async_session_factory",
+                "app.core.database.worker_session_factory",
                 return_value=mock_session,
             ),
             patch(
@@ -95,13 +96,24 @@ class TestSyncTenantHelper:
             side_effect=[Exception("boom"), None],
         ):
             with patch(
-                "app.core.database.async_session_factory",
+                "app.core.database.worker_session_factory",
                 return_value=mock_session,
             ):
                 # Should not raise — errors are caught
                 await _sync_all()
 
 
+class TestWorkerSessions:
+    def test_workers_do_not_pool_connections(self):
+        """Each task runs in a fresh event loop, so pooled connections can't be reused."""
+        from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+        from app.core.database import engine, worker_engine
+
+        assert isinstance(worker_engine.pool, NullPool)
+        assert isinstance(engine.pool, AsyncAdaptedQueuePool)
+
+
 class TestSyncMlsListingsCeleryTask:
     def test_celery_task_calls_asyncio_run(self):
         from app.workers.tasks.mls_sync import sync_mls_listings
@@ -254,9 +266,9 @@ class TestBatchGenerateHelper:
         mock_session.commit = AsyncMock()
 
         mock_listing = MagicMock()
-        mock_listing.id = listing_id
+        mock_listing.id = UUID(listing_id)
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = mock_listing
+        mock_result.scalars.return_value = [mock_listing]
         mock_session.execute = AsyncMock(return_value=mock_result)
 
         mock_ai = MagicMock()
@@ -276,13 +288,13 @@ class TestBatchGenerateHelper:
         # Local imports in _batch_generate — patch at source modules
         with (
             patch(
-                "app.core.database.async_session_factory",
+                "app.workers.tasks.content_batch.worker_session_factory",
                 return_value=mock_session,
             ),
-            patch("app.middleware.tenant_context.set_tenant_context", new_callable=AsyncMock),
-            patch("app.services.ai_service.AIService", return_value=mock_ai),
+            patch("app.workers.tasks.content_batch.set_tenant_context", new_callable=AsyncMock),
+            patch("app.workers.tasks.content_batch.AIService", return_value=mock_ai),
             patch(
-                "app.services.content_service.ContentService",
+                "app.workers.tasks.content_batch.ContentService",
                 return_value=mock_content_service,
             ),
         ):
@@ -313,9 +325,10 @@ class TestBatchGenerateHelper:
         mock_session.__aexit__ = AsyncMock(return_value=None)
         mock_session.commit = AsyncMock()
 
-        mock_listing = MagicMock()
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = mock_listing
+        mock_result.scalars.return_value = [
+            MagicMock(id=UUID(lid1)), MagicMock(id=UUID(lid2)),
+        ]
         mock_session.execute = AsyncMock(return_value=mock_result)
 
         mock_ai = MagicMock()
@@ -334,13 +347,13 @@ class TestBatchGenerateHelper:
 
         with (
             patch(
-                "app.core.database.async_session_factory",
+                "app.workers.tasks.content_batch.worker_session_factory",
                 return_value=mock_session,
             ),
-            patch("app.middleware.tenant_context.set_tenant_context", new_callable=AsyncMock),
-            patch("app.services.ai_service.AIService", return_value=mock_ai),
+            patch("app.workers.tasks.content_batch.set_tenant_context", new_callable=AsyncMock),
+            patch("app.workers.tasks.content_batch.AIService", return_value=mock_ai),
             patch(
-                "app.services.content_service.ContentService",
+                "app.workers.tasks.content_batch.ContentService",
                 return_value=mock_content_service,
             ),
         ):
@@ -357,6 +370,67 @@ class TestBatchGenerateHelper:
         # Commit should still be called
         mock_session.commit.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_batch_generate_overlaps_up_to_ai_concurrency(self):
+        import asyncio
+
+        from app.workers.tasks.content_batch import _batch_generate
+
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+        listing_ids = [uuid4() for _ in range(5)]
+        mock_result = MagicMock()
+        mock_result.scalars.return_value = [MagicMock(id=lid) for lid in listing_ids]
+        mock_session.execute = AsyncMock(return_value=mock_result)
+
+        in_flight = peak = 0
+
+        async def generate(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"body": "OK", "model": "m", "metadata": {}}
+
+        mock_ai = MagicMock()
+        mock_ai.generate = generate
+        mock_content_service = MagicMock()
+        mock_content_service.create = AsyncMock()
+
+        with (
+            patch(
+                "app.workers.tasks.content_batch.worker_session_factory",
+                return_value=mock_session,
+            ),
+            patch("app.workers.tasks.content_batch.set_tenant_context", new_callable=AsyncMock),
+            patch("app.workers.tasks.content_batch.AIService", return_value=mock_ai),
+            patch(
+                "app.workers.tasks.content_batch.ContentService",
+                return_value=mock_content_service,
+            ),
+            patch(
+                "app.workers.tasks.content_batch.get_settings",
+                return_value=MagicMock(ai_concurrency=2),
+            ),
+        ):
+            await _batch_generate(
+                tenant_id=str(uuid4()), user_id=str(uuid4()),
+                listing_ids=[str(lid) for lid in listing_ids],
+                content_type="listing_description", tone="professional",
+                brand_profile_id=None,
+            )
+
+        assert peak == 2
+        assert mock_content_service.create.await_count == 5
+        # One query loads every listing in the batch
+        listing_queries = [
+            c for c in mock_session.execute.await_args_list if "listings" in str(c.args[0])
+        ]
+        assert len(listing_queries) == 1
+        mock_session.commit.assert_called_once()
+
 
 class TestBatchGenerateListingNotFound:
     @pytest.mark.asyncio
@@ -373,17 +447,20 @@ class TestBatchGenerateListingNotFound:
         mock_session.commit = AsyncMock()
 
         mock_result = MagicMock()
-        mock_result.scalar_one_or_none.return_value = None  # listing not found
+        mock_result.scalars.return_value = []  # listing not found
         mock_session.execute = AsyncMock(return_value=mock_result)
 
         mock_ai = MagicMock()
         mock_ai.generate = AsyncMock()
 
         with (
-            patch("app.core.database.async_session_factory", return_value=mock_session),
-            patch("app.middleware.tenant_context.set_tenant_context", new_callable=AsyncMock),
-            patch("app.services.ai_service.AIService", return_value=mock_ai),
-            patch("app.services.content_service.ContentService"),
+            patch(
+                "app.workers.tasks.content_batch.worker_session_factory",
+                return_value=mock_session,
+            ),
+            patch("app.workers.tasks.content_batch.set_tenant_context", new_callable=AsyncMock),
+            patch("app.workers.tasks.content_batch.AIService", return_value=mock_ai),
+            patch("app.workers.tasks.content_batch.ContentService"),
         ):
             await _batch_generate(
                 tenant_id=tenant_id, user_id=user_id,
@@ -475,7 +552,7 @@ class TestDownloadPhotosErrorHandling:
             patch("app.services.media_service.MediaService", return_value=mock_media),
             patch(
                 "app.workers.tasks.media_process"
-                ".async_session_factory",
+                ".worker_session_factory",
                 return_value=mock_session,
             ),
             patch(
@@ -526,7 +603,7 @@ class TestDownloadPhotosHelper:
                 return_value=mock_media,
             ),
             patch(
-                "app.workers.tasks.media_process.async_session_factory",
+                "app.workers.tasks.media_process.worker_session_factory",
                 return_value=mock_session,
             ),
             patch(
@@ -541,6 +618,48 @@ class TestDownloadPhotosHelper:
         mock_media.download_from_url.assert_called_once()
         assert mock_listing.photos == [{"media_id": "m1", "key": "path/photo.jpg"}]
 
+    @pytest.mark.asyncio
+    async def test_download_photos_concurrent_bounded_and_ordered(self):
+        import asyncio
+
+        from app.workers.tasks import media_process
+
+        in_flight = 0
+        peak = 0
+
+        async def _download(url, tenant_id, filename):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            order = int(url.rsplit("/", 1)[1].split(".")[0])
+            await asyncio.sleep(0.001 * (10 - order))  # later photos finish first
+            in_flight -= 1
+            return {"media_id": f"m{order}", "key": f"path/{order}.jpg"}
+
+        mock_media = MagicMock()
+        mock_media.download_from_url = _download
+
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+        mock_listing = MagicMock()
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = mock_listing
+        mock_session.execute = AsyncMock(return_value=mock_result)
+
+        with (
+            patch("app.services.media_service.MediaService", return_value=mock_media),
+            patch.object(media_process, "worker_session_factory", return_value=mock_session),
+            patch.object(media_process, "set_tenant_context", new_callable=AsyncMock),
+        ):
+            await media_process._download_photos(
+                str(uuid4()), str(uuid4()),
+                [{"url": f"https://example.com/{i}.jpg", "order": i} for i in range(10)],
+            )
+
+        assert peak == media_process.PHOTO_DOWNLOAD_CONCURRENCY
+        assert [p["media_id"] for p in mock_listing.photos] == [f"m{i}" for i in range(10)]
+
     @pytest.mark.asyncio
     async def test_download_empty_urls(self):
         from app.workers.tasks.media_process import _download_photos
@@ -572,3 +691,343 @@ class TestDownloadPhotosHelper:
             )
 
         mock_media.download_from_url.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_resync_dedupes_through_task_redis_pool(self):
+        """A worker re-sync finds already-stored photos via the pool it opens."""
+        import httpx as _httpx
+
+        from app.services.media_service import _s3_client
+        from app.workers.tasks import media_process
+
+        cache: dict[str, str] = {}
+        redis_client = MagicMock()
+        redis_client.get = AsyncMock(side_effect=cache.get)
+        redis_client.set = AsyncMock(
+            side_effect=lambda key, value, ex=None: cache.__setitem__(key, value)
+        )
+        mock_pool = MagicMock()
+        mock_pool.initialize = AsyncMock()
+        mock_pool.close = AsyncMock()
+        mock_pool.client = redis_client
+
+        def _http_client(*args, **kwargs):
+            response = MagicMock()
+            response.headers = {"content-type": "image/jpeg"}
+
+            async def _aiter_bytes(size):
+                yield b"same photo bytes"
+
+            response.aiter_bytes = _aiter_bytes
+            stream = AsyncMock()
+            stream.__aenter__ = AsyncMock(return_value=response)
+            stream.__aexit__ = AsyncMock(return_value=None)
+            client = AsyncMock()
+            client.__aenter__ = AsyncMock(return_value=client)
+            client.__aexit__ = AsyncMock(return_value=None)
+            client.stream = MagicMock(return_value=stream)
+            return client
+
+        listings = [MagicMock(), MagicMock()]
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+        mock_session.execute = AsyncMock(
+            side_effect=[MagicMock(scalar_one_or_none=MagicMock(return_value=listing))
+                         for listing in listings]
+        )
+        mock_s3 = MagicMock()
+        tenant_id = str(uuid4())
+        photos = [{"url": "https://mls.example.com/1.jpg", "order": 0}]
+
+        _s3_client.cache_clear()
+        try:
+            with (
+                patch.object(media_process, "RedisPool", return_value=mock_pool),
+                patch("app.services.media_service.boto3.client", return_value=mock_s3),
+                patch.object(_httpx, "AsyncClient", side_effect=_http_client),
+                patch.object(media_process, "worker_session_factory", return_value=mock_session),
+                patch.object(media_process, "set_tenant_context", new_callable=AsyncMock),
+            ):
+                await media_process._download_photos(tenant_id, str(uuid4()), photos)
+                await media_process._download_photos(tenant_id, str(uuid4()), photos)
+        finally:
+            _s3_client.cache_clear()
+
+        mock_s3.upload_fileobj.assert_called_once()
+        assert listings[1].photos == listings[0].photos
+        assert mock_pool.initialize.await_count == 2
+        assert mock_pool.close.await_count == 2
+
+
+class TestReconcileUsageCountersCeleryTask:
+    def test_calls_asyncio_run(self):
+        from app.workers.tasks.usage_reconcile import reconcile_usage_counters
+
+        with patch("app.workers.tasks.usage_reconcile.asyncio.run") as mock_run:
+            reconcile_usage_counters()
+        mock_run.assert_called_once()
+
+    def test_retries_on_error(self):
+        from app.workers.tasks.usage_reconcile import reconcile_usage_counters
+
+        with (
+            patch(
+                "app.workers.tasks.usage_reconcile.asyncio.run",
+                side_effect=RuntimeError("db down"),
+            ),
+            patch.object(
+                reconcile_usage_counters, "retry", side_effect=RuntimeError("retry"),
+            ) as mock_retry,
+            pytest.raises(RuntimeError, match="retry"),
+        ):
+            reconcile_usage_counters()
+        mock_retry.assert_called_once()
+
+
+class TestReconcileUsageCountersHelper:
+    @pytest.mark.asyncio
+    async def test_rewrites_each_counter_under_tenant_lock(self):
+        from datetime import UTC, datetime
+
+        from app.services.content_service import usage_counter_key
+        from app.workers.tasks.usage_reconcile import _reconcile
+
+        tenant_id = uuid4()
+        counter_only_tenant = uuid4()
+        now = datetime.now(UTC)
+
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+        mock_result = MagicMock()
+        mock_result.scalars.return_value = [tenant_id]
+        mock_session.execute = AsyncMock(return_value=mock_result)
+
+        async def scan_iter(match):
+            for key in (usage_counter_key(tenant_id, now),
+                        usage_counter_key(counter_only_tenant, now)):
+                yield key
+
+        mock_redis = MagicMock()
+        mock_redis.scan_iter = scan_iter
+
+        mock_pool = MagicMock()
+        mock_pool.initialize = AsyncMock()
+        mock_pool.close = AsyncMock()
+        mock_pool.client = mock_redis
+
+        mock_service = MagicMock()
+        mock_service.get_monthly_usage = AsyncMock()
+
+        with (
+            patch("app.core.database.worker_session_factory", return_value=mock_session),
+            patch("app.core.redis.RedisPool", return_value=mock_pool),
+            patch("app.middleware.tenant_context.set_tenant_context", new_callable=AsyncMock),
+            patch(
+                "app.services.content_service.ContentService", return_value=mock_service,
+            ) as mock_service_cls,
+        ):
+            await _reconcile()
+
+        # Every tenant with events or a counter goes through the locked read,
+        # which re-seeds its counter, and commits to release the lock
+        locked = {
+            call.args[0] for call in mock_service.get_monthly_usage.await_args_list
+            if call.kwargs == {"lock": True}
+        }
+        assert locked == {tenant_id, counter_only_tenant}
+        assert all(
+            call.kwargs == {"redis": mock_redis} for call in mock_service_cls.call_args_list
+        )
+        assert mock_session.commit.await_count == 2
+        mock_pool.close.assert_awaited_once()
+
+
+class TestFlushPageVisitsCeleryTask:
+    def test_calls_asyncio_run(self):
+        from app.workers.tasks.visit_flush import flush_page_visits
+
+        with patch("app.workers.tasks.visit_flush.asyncio.run") as mock_run:
+            flush_page_visits()
+        mock_run.assert_called_once()
+
+
+class TestFlushPageVisitsHelper:
+    @pytest.mark.asyncio
+    async def test_skips_run_while_locked(self):
+        from app.workers.tasks.visit_flush import _flush
+
+        mock_redis = AsyncMock()
+        mock_redis.set.return_value = None
+        mock_pool = MagicMock()
+        mock_pool.initialize = AsyncMock()
+        mock_pool.close = AsyncMock()
+        mock_pool.client = mock_redis
+
+        with patch("app.core.redis.RedisPool", return_value=mock_pool):
+            assert await _flush() == 0
+
+        mock_redis.lrange.assert_not_called()
+        mock_redis.delete.assert_not_called()
+        mock_pool.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_drain_trims_only_after_commit(self):
+        from app.workers.tasks.visit_flush import _drain
+
+        mock_redis = AsyncMock()
+        mock_redis.lrange.return_value = ["a", "b"]
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+
+        with patch(
+            "app.workers.tasks.visit_flush._insert_visits", AsyncMock(return_value=2),
+        ):
+            flushed = await _drain(mock_redis, MagicMock(return_value=mock_session), "buf")
+
+        assert flushed == 2
+        mock_session.commit.assert_awaited_once()
+        mock_redis.ltrim.assert_awaited_once_with("buf", 2, -1)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_copy", [True, False], ids=["copy", "values"])
+    async def test_insert_visits_replays_and_skips_deleted_pages(
+        self, db_session, test_tenant, use_copy
+    ):
+        import json
+        from datetime import UTC, datetime
+
+        from sqlalchemy import select
+
+        from app.core.security import hash_password
+        from app.models.agent_page import AgentPage
+        from app.models.page_visit import PageVisit
+        from app.models.user import User
+        from app.workers.tasks.visit_flush import _insert_visit_values, _insert_visits
+
+        user = User(
+            tenant_id=test_tenant.id,
+            email="visits@example.com",
+            password_hash=hash_password("Visits1234!"),
+            full_name="Visit Agent",
+            role="agent",
+        )
+        db_session.add(user)
+        await db_session.flush()
+        page = AgentPage(tenant_id=test_tenant.id, user_id=user.id, slug="visits", theme={})
+        db_session.add(page)
+        await db_session.flush()
+
+        def buffered(agent_page_id, listing_id=None):
+            return json.dumps({
+                "id": uuid4(),
+                "tenant_id": test_tenant.id,
+                "agent_page_id": agent_page_id,
+                "listing_id": listing_id,
+                "utm_source": "email",
+                "created_at": datetime.now(UTC),
+            }, default=str)
+
+        raw = [buffered(page.id, listing_id=uuid4()), buffered(uuid4()), "not json"]
+        # Drivers without COPY support take the multi-row VALUES path
+        async def without_copy(session, driver, rows):
+            return await _insert_visit_values(session, rows)
+
+        copy_path = patch("app.workers.tasks.visit_flush._copy_visits", new=without_copy)
+        with nullcontext() if use_copy else copy_path:
+            assert await _insert_visits(db_session, raw) == 1
+            # A replayed batch (crash before the trim) inserts nothing new
+            assert await _insert_visits(db_session, raw) == 0
+
+        result = await db_session.execute(select(PageVisit))
+        visits = result.scalars().all()
+        assert len(visits) == 1
+        assert visits[0].agent_page_id == page.id
+        assert visits[0].listing_id is None
+        assert visits[0].utm_source == "email"
+
+
+class TestFlushAgentNotificationsCeleryTask:
+    def test_calls_asyncio_run(self):
+        from app.workers.tasks.notify_flush import flush_agent_notifications
+
+        with patch("app.workers.tasks.notify_flush.asyncio.run") as mock_run:
+            flush_agent_notifications()
+        mock_run.assert_called_once()
+
+
+class TestFlushAgentNotificationsHelper:
+    @pytest.mark.asyncio
+    async def test_skips_run_while_locked(self):
+        from app.workers.tasks.notify_flush import _flush
+
+        mock_redis = AsyncMock()
+        mock_redis.set.return_value = None
+        mock_pool = MagicMock()
+        mock_pool.initialize = AsyncMock()
+        mock_pool.close = AsyncMock()
+        mock_pool.client = mock_redis
+
+        with patch("app.core.redis.RedisPool", return_value=mock_pool):
+            assert await _flush() == 0
+
+        mock_redis.lpop.assert_not_called()
+        mock_pool.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_drain_pops_until_short_batch(self):
+        from app.workers.tasks import notify_flush
+
+        mock_redis = AsyncMock()
+        mock_redis.lpop.side_effect = [["a"] * notify_flush.FLUSH_BATCH_SIZE, ["b"]]
+        send_batch = AsyncMock(side_effect=lambda factory, raw: len(raw))
+
+        with patch.object(notify_flush, "_send_batch", send_batch):
+            sent = await notify_flush._drain(mock_redis, MagicMock(), "queue")
+
+        assert sent == notify_flush.FLUSH_BATCH_SIZE + 1
+        assert mock_redis.lpop.await_count == 2
+        mock_redis.lpop.assert_awaited_with("queue", notify_flush.FLUSH_BATCH_SIZE)
+
+    @pytest.mark.asyncio
+    async def test_send_batch_coalesces_per_tenant(self):
+        from app.services.email_service import AgentNotification, encode_agent_notification
+        from app.workers.tasks.notify_flush import _send_batch
+
+        tenant_a, tenant_b = uuid4(), uuid4()
+
+        def note(i):
+            return AgentNotification(
+                agent_email=f"a{i}@x.com", agent_name="A", address=f"{i} Main",
+                content_types=["flyer"], listing_id=uuid4(),
+            )
+
+        raw = [
+            encode_agent_notification(tenant_a, note(0)),
+            encode_agent_notification(tenant_b, note(1)),
+            "not json",
+            encode_agent_notification(tenant_a, note(2)),
+        ]
+        mock_session = AsyncMock()
+        mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+        mock_session.__aexit__ = AsyncMock(return_value=None)
+        mock_session.scalar = AsyncMock(return_value="Ocean Realty")
+        mock_service = MagicMock()
+        mock_service.send_agent_notifications = AsyncMock(
+            side_effect=lambda **kw: MagicMock(sent=len(kw["notifications"])),
+        )
+
+        with (
+            patch("app.services.email_service.EmailService", return_value=mock_service),
+            patch("app.middleware.tenant_context.set_tenant_context", new=AsyncMock()),
+        ):
+            sent = await _send_batch(MagicMock(return_value=mock_session), raw)
+
+        assert sent == 3
+        calls = mock_service.send_agent_notifications.call_args_list
+        assert [c.kwargs["tenant_id"] for c in calls] == [tenant_a, tenant_b]
+        assert [n.address for n in calls[0].kwargs["notifications"]] == ["0 Main", "2 Main"]
+        assert calls[0].kwargs["brokerage_name"] == "Ocean Realty"
+        assert mock_session.commit.await_count == 2